@@ -1,14 +1,203 @@
 import os
 import os.path as op
+import mmap
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime
 import quantities as pq
 
+CHUNKSIZE = 2**20
 
-def auto_denoise(anas, thresh=None, copy_signal=True):
+
+def _channel_blocks(nchannels, nblocks):
+    edges = np.linspace(0, nchannels, min(nblocks, nchannels) + 1).astype(int)
+    return [slice(start, stop) for start, stop in zip(edges[:-1], edges[1:])]
+
+
+def _time_blocks(nsamples, chunksize):
+    return [slice(start, min(start + chunksize, nsamples))
+            for start in range(0, nsamples, chunksize)]
+
+
+def _in_place(anas, copy_signal):
+    # NOTE only ndarrays (np.memmap included) can be modified in place, other
+    # array-likes such as lazy channel arrays are processed in a copy
+    return not copy_signal and isinstance(anas, np.ndarray)
+
+
+def _number_of_workers(parallel, nprocesses):
+    if parallel not in (True, False, 'threads', 'processes'):
+        raise ValueError("parallel must be True, False, 'threads' or 'processes'")
+    if not parallel:
+        return 1
+    return nprocesses or os.cpu_count() or 1
+
+
+def _memmap_spec(array):
+    """Return what is needed to open a memory-mapped array in another process."""
+    transposed = False
+    if (isinstance(array, np.memmap) and isinstance(array.base, np.memmap) and
+            array.shape == array.base.shape[::-1] and
+            array.strides == array.base.strides[::-1]):
+        array, transposed = array.base, True
+    if (not isinstance(array, np.memmap) or not isinstance(array.base, mmap.mmap)
+            or array.mode == 'c'):
+        raise ValueError("parallel='processes' needs signals memory-mapped from "
+                         "a file, for instance with np.memmap, and "
+                         "copy_signal=False")
+    order = 'F' if array.flags.f_contiguous and not array.flags.c_contiguous else 'C'
+    return {'filename': array.filename, 'dtype': array.dtype.str,
+            'mode': 'r' if array.mode == 'r' else 'r+', 'offset': array.offset,
+            'shape': array.shape, 'order': order, 'transposed': transposed}
+
+
+def _open_memmap(spec):
+    array = np.memmap(spec['filename'], dtype=spec['dtype'], mode=spec['mode'],
+                      offset=spec['offset'], shape=spec['shape'],
+                      order=spec['order'])
+    return array.T if spec['transposed'] else array
+
+
+def _memmap_worker(worker, source_spec, target_spec, block, kwargs):
+    source = _open_memmap(source_spec)
+    target = source if target_spec == source_spec else _open_memmap(target_spec)
+    result = worker(source, target, block, **kwargs)
+    target.flush()
+    return result
+
+
+def _map_blocks(worker, source, target, blocks, nworkers, parallel, **kwargs):
+    """
+    Call worker(source, target, block, **kwargs) for each block and return
+    the results in order. With nworkers > 1 the blocks run in a thread pool
+    (numpy and scipy.signal release the GIL while they work) or, with
+    parallel='processes', in processes that open the memory-mapped source
+    and target themselves.
+    """
+    if nworkers < 2 or len(blocks) < 2:
+        return [worker(source, target, block, **kwargs) for block in blocks]
+    if parallel == 'processes':
+        source_spec = _memmap_spec(source)
+        target_spec = _memmap_spec(target)
+        with ProcessPoolExecutor(max_workers=nworkers) as executor:
+            futures = [
+                executor.submit(_memmap_worker, worker, source_spec,
+                                target_spec, block, kwargs)
+                for block in blocks
+            ]
+            return [future.result() for future in futures]
+    with ThreadPoolExecutor(max_workers=nworkers) as executor:
+        futures = [
+            executor.submit(worker, source, target, block, **kwargs)
+            for block in blocks
+        ]
+        return [future.result() for future in futures]
+
+
+def _sos_padlen(sos):
+    """Default padding of scipy.signal.sosfiltfilt."""
+    ntaps = 2 * len(sos) + 1
+    ntaps -= min((sos[:, 2] == 0).sum(), (sos[:, 5] == 0).sum())
+    return 3 * ntaps
+
+
+def _settle_samples(sos, tol=1e-12):
+    """Number of samples until the response of the filter decays below tol."""
+    from scipy.signal import sos2zpk
+    _, poles, _ = sos2zpk(sos)
+    radius = np.max(np.abs(poles)) if len(poles) > 0 else 0
+    if radius == 0:
+        return len(sos) * 2
+    return int(np.ceil(np.log(tol) / np.log(radius)))
+
+
+def _sosfilt_block(source, target, channels, sos, chunksize):
+    """Causal filter, chunk by chunk in time with the filter state carried."""
+    from scipy.signal import sosfilt
+    x = source[channels]
+    y = target[channels]
+    state = np.zeros((len(sos), x.shape[0], 2))
+    for block in _time_blocks(x.shape[-1], chunksize):
+        y[:, block], state = sosfilt(sos, x[:, block], zi=state)
+
+
+def _sosfiltfilt_block(source, target, channels, sos, padlen, chunksize,
+                       overlap, step=1):
+    """
+    Zero-phase filter, chunk by chunk in time, and keep every step-th sample.
+
+    The forward pass carries its state between chunks and is exact. The
+    backward pass of each chunk starts overlap samples after its end, which
+    is long enough for the filter transient to die out. The signal edges are
+    padded as in scipy.signal.sosfiltfilt. Only the samples of the current
+    chunk are written, so target may be the same array as source.
+    """
+    from scipy.signal import sosfilt, sosfilt_zi, sosfiltfilt
+    x = source[channels]
+    y = target[channels]
+    nsamples = x.shape[-1]
+    chunksize = step * int(np.ceil(max(chunksize, padlen + 1) / step))
+    if nsamples <= chunksize + overlap:
+        y[...] = sosfiltfilt(sos, x, axis=-1, padlen=padlen)[:, ::step]
+        return
+    zi = sosfilt_zi(sos)[:, np.newaxis, :]
+    x_0 = np.asarray(x[:, :1], dtype=float)
+    x_n = np.asarray(x[:, -1:], dtype=float)
+    left = 2 * x_0 - x[:, padlen:0:-1]
+    right = 2 * x_n - x[:, -2:-(padlen + 2):-1]
+    _, state = sosfilt(sos, left, zi=zi * left[:, :1])
+    for start in range(0, nsamples, chunksize):
+        stop = min(start + chunksize, nsamples)
+        end = min(stop + overlap, nsamples)
+        head, next_state = sosfilt(sos, x[:, start:stop], zi=state)
+        tail = x[:, stop:end]
+        if end == nsamples:
+            tail = np.concatenate((tail, right), axis=-1)
+        tail, _ = sosfilt(sos, tail, zi=next_state)
+        forward = np.concatenate((head, tail), axis=-1)[:, ::-1]
+        backward, _ = sosfilt(sos, forward, zi=zi * forward[:, :1])
+        chunk = backward[:, ::-1][:, :stop - start:step]
+        y[:, start // step:start // step + chunk.shape[-1]] = chunk
+        state = next_state
+
+
+def _channel_std(source, blocks):
+    """Standard deviation of each channel, accumulated block by block."""
+    if len(blocks) == 1:
+        return np.std(source, axis=-1)
+    nsamples = source.shape[-1]
+    mean = sum(np.sum(source[:, block], axis=-1, dtype=float) for block in blocks) / nsamples
+    sumsq = sum(np.sum((source[:, block] - mean[:, np.newaxis])**2, axis=-1)
+                for block in blocks)
+    return np.sqrt(sumsq / nsamples)
+
+
+def _noisy_block(source, target, block, thresh, sd, overlap):
+    """Samples in block where the smoothed envelope of all channels is above
+    thresh standard deviations."""
+    from scipy import signal
+    start = max(block.start - overlap, 0)
+    stop = min(block.stop + overlap, source.shape[-1])
+    env = np.abs(signal.hilbert(source[:, start:stop]))
+
+    # Smooth
+    smooth = 0.01
+    b_smooth, a_smooth = signal.butter(4, smooth)
+    env = signal.filtfilt(b_smooth, a_smooth, env)
+    env = env[:, block.start - start:block.stop - start]
+
+    noisy = np.all(env >= thresh * sd[:, np.newaxis], axis=0)
+    return block.start + np.flatnonzero(noisy)
+
+
+def auto_denoise(anas, thresh=None, copy_signal=True, chunksize=None, overlap=None,
+                 parallel=True, nprocesses=None):
     """Clean neural data from EMG, chewing, and moving artifact noise
     Rectified signals are smoothed and thresholded to find and remove
     noisy portion of the signals.
+    With chunksize, the envelope is computed in chunks of time that overlap
+    by overlap samples, in parallel, which keeps memory bounded for long
+    (memory-mapped) signals at the cost of a small error in the envelope.
 
     Parameters
     ----------
@@ -18,6 +207,16 @@ def auto_denoise(anas, thresh=None, copy_signal=True):
              (optional) threshold in number of SD on high-pass data
     copy_signal : bool
                   copy signals or not
+    chunksize : int
+                (optional) number of samples in each chunk
+    overlap : int
+              (optional) number of samples added on each side of a chunk,
+              by default until the smoothing filter has settled
+    parallel : bool or string
+               False, True or 'threads', or 'processes' (in place on
+               np.memmap signals only)
+    nprocesses : int
+                 if parallel, number of workers (default number of cores)
 
     Returns
     -------
@@ -29,31 +228,33 @@ def auto_denoise(anas, thresh=None, copy_signal=True):
         thresh = thresh
     else:
         thresh = 2.5
+    nworkers = _number_of_workers(parallel, nprocesses)
 
-    if copy_anas:
+    if _in_place(anas, copy_signal):
+        anas_copy = anas
+    elif isinstance(anas, np.ndarray):
         anas_copy = copy(anas)
     else:
-        anas_copy = anas
-
-    env = signal.hilbert(anas_copy)
-    env = np.abs(env)
-
-    # Smooth
-    smooth = 0.01
-    b_smooth, a_smooth = signal.butter(4, smooth)
-    env = signal.filtfilt(b_smooth, a_smooth, env)
-
-    if len(anas.shape) == 1:
-        sd = np.std(anas)
+        anas_copy = np.array(anas)
+
+    source = anas_copy if isinstance(anas_copy, np.memmap) else np.asarray(anas_copy)
+    if len(source.shape) == 1:
+        source = source[np.newaxis]
+    nsamples = source.shape[-1]
+    if chunksize is None:
+        blocks = [slice(0, nsamples)]
     else:
-        sd = np.std(anas, axis=1)
-        noisy_idx = []
-        # Find time points in which all channels are noisy
-        for i in np.arange(len(anas[0])):
-            if np.all([env[ch, i] >= thresh*sd[ch] for ch in np.arange(env.shape[0])]):
-                noisy_idx.append(i)
-        anas_copy[:, noisy_idx] = 0
-
+        blocks = _time_blocks(nsamples, chunksize)
+    if overlap is None:
+        overlap = _settle_samples(signal.butter(4, 0.01, output='sos'))
+
+    sd = _channel_std(source, blocks)
+    # NOTE find all noisy samples before grounding any of them, since
+    # the chunks read the samples of their neighbours
+    noisy_idx = _map_blocks(_noisy_block, source, source, blocks, nworkers,
+                            parallel, thresh=thresh, sd=sd, overlap=overlap)
+    if len(noisy_idx) > 0:
+        source[:, np.concatenate(noisy_idx)] = 0
 
     return anas_copy
 
@@ -162,8 +363,20 @@ def ica_denoise(anas, channels=None, n_comp=10, correlation_thresh=0.1):
     return anas_sig, anas_noise, sources, mixing, corr
 
 
-def apply_CAR(anas, channels=None, car_type='mean', split_probe=None, copy_signal=True):
+def _car_block(source, target, block, groups, car_type):
+    reference = np.mean if car_type == 'mean' else np.median
+    avg_ref = []
+    for channels in groups:
+        ref = reference(target[channels, block], axis=0)
+        target[channels, block] -= ref
+        avg_ref.append(ref)
+    return np.array(avg_ref)
+
+
+def apply_CAR(anas, channels=None, car_type='mean', split_probe=None, copy_signal=True,
+              parallel=True, nprocesses=None, chunksize=CHUNKSIZE):
     """Removes noise by Common Average or Median Reference.
+    The signals are processed in chunks of time, in parallel.
 
     Parameters
     ----------
@@ -176,46 +389,52 @@ def apply_CAR(anas, channels=None, car_type='mean', split_probe=None, copy_signa
     split_probe : int
                   splits anas into different probes to apply
                   car/cmr to each probe separately
+    copy_signal : bool
+                  copy signals (as float32) or reference the floating
+                  point signals in place, for instance a np.memmap
+    parallel : bool or string
+               False, True or 'threads', or 'processes' (in place on
+               np.memmap signals only)
+    nprocesses : int
+                 if parallel, number of workers (default number of cores)
+    chunksize : int
+                number of samples in each chunk
 
     Returns
     -------
     anas_car : cleaned analog signals
-    avg_ref : reference removed from signals
+    avg_ref : reference removed from signals, one row per probe
+              if split_probe
     """
-    from copy import copy
+    if car_type not in ('mean', 'median'):
+        raise AttributeError("'type must be 'mean' or 'median'")
+    nworkers = _number_of_workers(parallel, nprocesses)
     if channels is None:
         channels = np.arange(anas.shape[0])
-    if copy_signal:
-        anas_car = copy(anas)
+    in_place = _in_place(anas, copy_signal)
+    if not in_place:
+        anas_car = np.array(anas, dtype=np.float32)
     else:
-        anas_car = anas
-    anas_car = np.array(anas_car, dtype=np.float32)
-
-    if car_type is 'mean':
-        print('Applying CAR')
-        if split_probe is not None:
-            avg_ref = np.mean(anas_car[:split_probe], axis=0)
-            anas_car[:split_probe] -= avg_ref
-            avg_ref = np.mean(anas_car[split_probe:], axis=0)
-            anas_car[split_probe:] -= avg_ref
-        else:
-            avg_ref = np.mean(anas_car[channels], axis=0)
-            anas_car[channels] -= avg_ref
-    elif car_type is 'median':
-        print('Applying CMR')
-        if split_probe is not None:
-            avg_ref_1 = np.median(anas_car[:split_probe], axis=0)
-            anas_car[:split_probe] -= avg_ref_1
-            avg_ref_2 = np.median(anas_car[split_probe:], axis=0)
-            anas_car[split_probe:] -= avg_ref_2
-            avg_ref = np.array([avg_ref_1, avg_ref_2])
-        else:
-            avg_ref = np.median(anas_car[channels], axis=0)
-            anas_car[channels] -= avg_ref
+        if not np.issubdtype(anas.dtype, np.floating):
+            raise ValueError('Referencing in place needs floating point signals')
+        anas_car = anas if isinstance(anas, np.memmap) else np.asarray(anas)
+
+    if split_probe is not None:
+        groups = [slice(None, split_probe), slice(split_probe, None)]
     else:
-        raise AttributeError("'type must be 'mean' or 'median'")
+        groups = [channels]
+    print('Applying CAR' if car_type == 'mean' else 'Applying CMR')
+    blocks = _time_blocks(anas_car.shape[1], chunksize)
+    avg_refs = _map_blocks(_car_block, anas_car, anas_car, blocks, nworkers,
+                           parallel, groups=groups, car_type=car_type)
+    if len(avg_refs) > 0:
+        avg_ref = np.concatenate(avg_refs, axis=1)
+    else:
+        avg_ref = np.zeros((len(groups), 0), dtype=anas_car.dtype)
+    if split_probe is None:
+        avg_ref = avg_ref[0]
 
-    return anas_car, avg_ref
+    return (anas if in_place else anas_car), avg_ref
 
 def extract_rising_edges(adc_signal, times, thresh=1.65):
     """Extract rising times from analog signal used as TTL.
@@ -247,9 +466,12 @@ def extract_rising_edges(adc_signal, times, thresh=1.65):
 
     return rising_times
 
-def filter_analog_signals(anas, freq, fs, filter_type='bandpass', filter_function='filtfilt', order=3, copy_signal=False):
+def filter_analog_signals(anas, freq, fs, filter_type='bandpass', filter_function='filtfilt', order=3, copy_signal=True,
+                          parallel=True, nprocesses=None, chunksize=CHUNKSIZE):
     """Filters analog signals with zero-phase Butterworth filter.
     The function raises an Exception if the required filter is not stable.
+    Blocks of channels are filtered in parallel, each in chunks of time that
+    overlap long enough for the filter to settle.
 
     Parameters
     ----------
@@ -265,35 +487,55 @@ def filter_analog_signals(anas, freq, fs, filter_type='bandpass', filter_functio
         'filtfilt' or 'lfilter'
     order : int
             filter order
-    parallel : bool
-               parallel or not
+    copy_signal : bool
+                  return filtered copies or filter the floating point
+                  signals in place, for instance a np.memmap
+    parallel : bool or string
+               False, True or 'threads', or 'processes' (in place on
+               np.memmap signals only)
     nprocesses : int
-                 if parallel, number of processes
+                 if parallel, number of workers (default number of cores)
+    chunksize : int
+                number of samples filtered at once in each channel
 
     Returns
     -------
     anas_filt : filtered signals
     """
-    from scipy.signal import butter, filtfilt, lfilter
+    from scipy.signal import butter
     fn = fs / 2.
     band = np.array(freq) / fn
 
-    if filter_function == 'filtfilt':
-        filterfun = filtfilt
-    elif filter_function == 'lfilter':
-        filterfun = lfilter
-    else:
+    if filter_function not in ('filtfilt', 'lfilter'):
         raise NotImplementedError('filter-function {} not recognized'.format(filter_function))
+    nworkers = _number_of_workers(parallel, nprocesses)
 
     b, a = butter(order, band, btype=filter_type)
 
     if np.all(np.abs(np.roots(a)) < 1) and np.all(np.abs(np.roots(a)) < 1):
         print('Filtering signals using', filter_function, 'with order', order, filter_type, 'with critical frequencies', freq ,'...')
-        if len(anas.shape) == 2:
-            anas_filt = filterfun(b, a, anas, axis=1)
-        elif len(anas.shape) == 1:
-            anas_filt = filterfun(b, a, anas)
-        return anas_filt
+        sos = butter(order, band, btype=filter_type, output='sos')
+        source = anas if isinstance(anas, np.memmap) else np.asarray(anas)
+        in_place = _in_place(anas, copy_signal)
+        if not in_place:
+            target = np.empty(source.shape, dtype=np.result_type(source.dtype, np.float64))
+        elif not np.issubdtype(source.dtype, np.floating):
+            raise ValueError('Filtering in place needs floating point signals')
+        else:
+            target = source
+        if len(source.shape) == 1:
+            source, target = source[np.newaxis], target[np.newaxis]
+        blocks = _channel_blocks(source.shape[0], nworkers)
+        if filter_function == 'filtfilt':
+            _map_blocks(_sosfiltfilt_block, source, target, blocks, nworkers, parallel,
+                        sos=sos, padlen=3 * max(len(a), len(b)),
+                        chunksize=chunksize, overlap=_settle_samples(sos))
+        else:
+            _map_blocks(_sosfilt_block, source, target, blocks, nworkers, parallel,
+                        sos=sos, chunksize=chunksize)
+        if not in_place:
+            return target[0] if len(anas.shape) == 1 else target
+        return anas
     else:
         raise ValueError('Filter is not stable')
 
@@ -307,7 +549,8 @@ def ground_bad_channels(anas, bad_channels, copy_signal=True):
     bad_channels : list
                    list of channels to be grounded
     copy_signal : bool
-                  copy signals or not
+                  copy signals or ground them in place, for instance
+                  in a np.memmap
 
     Returns
     -------
@@ -316,17 +559,13 @@ def ground_bad_channels(anas, bad_channels, copy_signal=True):
     print('Grounding channels: ', bad_channels, '...')
 
     from copy import copy
-    nsamples = anas.shape[1]
     if copy_signal:
         anas_zeros = copy(anas)
     else:
         anas_zeros = anas
-    if type(bad_channels) is not list:
-        bad_channels = [bad_channels]
-
-    for i, ana in enumerate(anas_zeros):
-        if i in bad_channels:
-            anas_zeros[i] = np.zeros(nsamples)
+    bad_channels = np.atleast_1d(bad_channels).astype(int)
+    bad_channels = bad_channels[bad_channels < anas_zeros.shape[0]]
+    anas_zeros[bad_channels] = 0
 
     return anas_zeros
 
@@ -493,10 +732,37 @@ def create_klusta_prm(pathname, prb_path, nchan=32, fs=30000,
     return full_filename
 
 
+def _trigger_windows(times, trigger, pre, post):
+    """First and last (exclusive) sample where trigger - pre < times < trigger + post,
+    for sorted times."""
+    units = times.units
+    if isinstance(trigger, pq.Quantity):
+        trigger = trigger.rescale(units).magnitude
+    else:
+        trigger = np.array([pq.Quantity(tr).rescale(units).magnitude for tr in trigger])
+    trigger = np.ravel(trigger)
+    times = np.asarray(times.magnitude)
+    pre = pre.rescale(units).magnitude
+    post = post.rescale(units).magnitude
+    starts = np.searchsorted(times, trigger - pre, side='right')
+    stops = np.searchsorted(times, trigger + post, side='left')
+    return starts, np.maximum(stops, starts)
+
+
+def _window_samples(starts, stops):
+    """Concatenated sample indices of all windows."""
+    lengths = stops - starts
+    offsets = np.repeat(np.cumsum(lengths) - lengths - starts, lengths)
+    return np.arange(lengths.sum()) - offsets
+
+
 def remove_stimulation_artifacts(anas, times, trigger, pre=3 * pq.ms, post=5 * pq.ms,
-                                 mode='zero', copy_signal=True):
+                                 mode='zero', copy_signal=True, chunksize=1000):
     """Removes stimulation artifact by either grounding the stimulation window or
     computing and removing the average artifact template.
+    The stimulation windows are found with a binary search in times, which
+    must be sorted, and processed chunksize triggers at a time, so
+    memory-mapped signals can be cleaned in place without being read in full.
 
     Parameters
     ----------
@@ -514,6 +780,8 @@ def remove_stimulation_artifacts(anas, times, trigger, pre=3 * pq.ms, post=5 * p
            'zero' or 'template'
     copy_signal : bool
                   copy signals or not
+    chunksize : int
+                number of triggers processed at once
 
     Returns
     -------
@@ -521,38 +789,47 @@ def remove_stimulation_artifacts(anas, times, trigger, pre=3 * pq.ms, post=5 * p
     avg_artifact : if 'template', average artifact removed
     """
     from copy import copy
-    if copy_signal:
+    if mode not in ('zero', 'template'):
+        raise ValueError("mode must be 'zero' or 'template'")
+    if _in_place(anas, copy_signal):
+        anas_rem = anas
+    elif isinstance(anas, np.ndarray):
         anas_rem = copy(anas)
     else:
-        anas_rem = anas
+        anas_rem = np.array(anas)
     print('Removing stimulation artifacts from ', len(trigger), ' triggers...')
 
-    if mode is 'template':
-        # Find shortest artifacte length
-        idxs = []
-        for i, tr in enumerate(trigger):
-            idxs.append(len(np.where((times > tr - pre) & (times < tr + post))[0]))
+    starts, stops = _trigger_windows(times, trigger, pre, post)
+    target = anas_rem if isinstance(anas_rem, np.memmap) else np.asarray(anas_rem)
+    source = anas if isinstance(anas, np.ndarray) else target
+    chunks = _time_blocks(len(starts), chunksize)
 
-        min_len = np.min(idxs)
-        templates = np.zeros((anas.shape[0], len(trigger), min_len))
+    if mode == 'template':
+        # Shortest artifact length
+        min_len = np.min(stops - starts)
+        offsets = np.arange(min_len)
 
         # Compute average artifact template
-        for i, tr in enumerate(trigger):
-            idx = np.where((times > tr - pre) & (times < tr + post))[0][:min_len]
-            templates[:, i, ] = np.squeeze(anas[:, idx])
-        avg_artifact = np.mean(templates, axis=1)
+        avg_artifact = np.zeros((source.shape[0], min_len))
+        for chunk in chunks:
+            idx = starts[chunk, np.newaxis] + offsets
+            avg_artifact += np.sum(source[:, idx], axis=1)
+        avg_artifact /= len(starts)
 
         # Remove average artifact template
-        for i, tr in enumerate(trigger):
-            idx = np.where((times > tr - pre) & (times < tr + post))[0][:min_len]
-            print(anas_rem[:, idx].shape)
-            anas_rem[:, idx] -= avg_artifact
-
-    elif mode is 'zero':
+        overlapping = np.any(np.diff(np.sort(starts)) < min_len)
+        for chunk in chunks:
+            idx = starts[chunk, np.newaxis] + offsets
+            if overlapping:
+                # NOTE remove the template once per trigger where windows overlap
+                np.subtract.at(target, (slice(None), idx), avg_artifact[:, np.newaxis])
+            else:
+                target[:, idx] -= avg_artifact[:, np.newaxis]
+
+    elif mode == 'zero':
         avg_artifact = []
-        for tr in trigger:
-            idx = np.where((times > tr - pre) & (times < tr + post))
-            anas_rem[:, idx] = 0
+        for chunk in chunks:
+            target[:, _window_samples(starts[chunk], stops[chunk])] = 0
 
     return anas_rem, avg_artifact
 
@@ -621,13 +898,21 @@ def extract_stimulation_waveform(stim, trig, times):
 
     return stim_clip, curr, phase
 
-def downsample_250(anas):
-    """Downsamples analog signals to 250 Hz using scipy decimate.
+def downsample_250(anas, parallel=True, nprocesses=None, chunksize=CHUNKSIZE):
+    """Downsamples analog signals to 250 Hz with the zero-phase
+    Chebyshev filter of scipy decimate. Blocks of channels are decimated
+    in parallel, each in chunks of time.
 
     Parameters
     ----------
-    anas : np.array
-           2d array of stimulation analog signals
+    anas : list
+           list of neo.AnalogSignals
+    parallel : bool or string
+               False or True/'threads'
+    nprocesses : int
+                 if parallel, number of threads (default number of cores)
+    chunksize : int
+                number of samples decimated at once in each channel
 
     Returns
     -------
@@ -635,20 +920,29 @@ def downsample_250(anas):
     """
     import neo
     import quantities as pq
-    import scipy.signal as ss
+    from scipy.signal import cheby1
+    if parallel == 'processes':
+        raise ValueError("downsample_250 runs in threads, not processes")
+    nworkers = _number_of_workers(parallel, nprocesses)
     out = []
     for an in anas:
         if an.sampling_rate > 250 *pq.Hz:
-            q = int(an.sampling_rate / 250 * pq.Hz)
-            signal = ss.decimate(an.magnitude.T, q=q, zero_phase=True)
+            q = int((an.sampling_rate / (250 * pq.Hz)).simplified)
+            sos = cheby1(8, 0.05, 0.8 / q, output='sos')
+            source = an.magnitude.T
+            signal = np.empty((source.shape[0], -(-source.shape[1] // q)),
+                              dtype=np.result_type(source.dtype, np.float64))
+            _map_blocks(_sosfiltfilt_block, source, signal,
+                        _channel_blocks(source.shape[0], nworkers), nworkers,
+                        parallel, sos=sos, padlen=_sos_padlen(sos),
+                        chunksize=chunksize, overlap=_settle_samples(sos), step=q)
             sampling_rate = an.sampling_rate / q
-            t_stop = len(signal) / sampling_rate
             ana = neo.AnalogSignal(signal.T * an.units, t_start=0 * pq.s,
                                    sampling_rate=sampling_rate,
                                    **an.annotations)
             out.append(ana)
         else:
-            out.append(ana)
+            out.append(an)
     return out
 
 def find_frequency_range(anas, fs, freq_range, nchunks=30, chunksize=1*pq.s):
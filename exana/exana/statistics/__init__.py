@@ -1,4 +1,5 @@
-from .tools import (coeff_var, bootstrap, correlogram, fano_factor,
-                    fano_factor_multiunit, permutation_resampling, stat_test)
+from .tools import (coeff_var, bootstrap, correlogram, correlograms,
+                    fano_factor, fano_factor_multiunit, permutation_resampling,
+                    stat_test)
 from .plot import (plot_autocorr, plot_isi_hist,
                    plot_spike_histogram)
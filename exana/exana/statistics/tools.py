@@ -257,7 +257,51 @@ def coeff_var(trials):
     return cvs
 
 
-def bootstrap(data, num_samples=10000, statistic=None, alpha=0.05):
+def _random_state(seed):
+    if seed is None:
+        return np.random
+    return np.random.RandomState(np.random.MT19937(seed))
+
+
+def _bootstrap_batch(data, statistic, size, seed):
+    rng = _random_state(seed)
+    idx = rng.randint(0, len(data), (size, len(data)))
+    return statistic(data[idx], axis=1)
+
+
+def _permutation_batch(combined, num_case, statistic, size, seed):
+    rng = _random_state(seed)
+    # NOTE a random permutation of each row
+    idx = np.argsort(rng.random_sample((size, len(combined))), axis=1)
+    xs = combined[idx]
+    return statistic(xs[:, :num_case], axis=1) - statistic(xs[:, num_case:], axis=1)
+
+
+def _resample(batch, num_samples, batch_size, processes, seed):
+    """Statistics of num_samples resamples drawn in batches of batch_size.
+
+    batch(size, seed) returns the statistic of size resamples. Without
+    seed and processes, all batches draw from the global numpy random
+    state, otherwise each batch has its own stream spawned from seed, so
+    that the result only depends on seed and batch_size.
+    """
+    sizes = [batch_size] * (num_samples // batch_size)
+    if num_samples % batch_size:
+        sizes.append(num_samples % batch_size)
+    parallel = processes is not None and processes > 1 and len(sizes) > 1
+    if seed is None and not parallel:
+        seeds = [None] * len(sizes)
+    else:
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if parallel:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            return np.concatenate(list(executor.map(batch, sizes, seeds)))
+    return np.concatenate([batch(size, seed) for size, seed in zip(sizes, seeds)])
+
+
+def bootstrap(data, num_samples=10000, statistic=None, alpha=0.05,
+              batch_size=None, processes=None, seed=None):
     """
     Returns bootstrap estimate of 100.0*(1-alpha) CI for statistic.
 
@@ -271,6 +315,16 @@ def bootstrap(data, num_samples=10000, statistic=None, alpha=0.05):
         The number of repetitions of random samples of your data.
     statistic : function(2darray, axis)
         The statistic you want to build the ci. Default is mean
+    batch_size : int
+        Number of samples drawn at once, by default so that each batch
+        holds about a million values of data.
+    processes : int
+        With processes > 1, batches are drawn in parallel. statistic must
+        then be picklable.
+    seed : int
+        Seed of the random samples. The result is the same for a given
+        seed and batch_size, independent of processes. Without seed, the
+        global numpy random state is used.
 
     Returns
     -------
@@ -336,16 +390,19 @@ def bootstrap(data, num_samples=10000, statistic=None, alpha=0.05):
     data = np.asarray(data)
     if np.ndim(data) != 1:
         raise ValueError('Data must be 1 dimensional.')
+    from functools import partial
     statistic = statistic or np.mean
     n = len(data)
-    idx = np.random.randint(0, n, (num_samples, n))
-    samples = data[idx]
-    stat = np.sort(statistic(samples, axis=1))
+    batch_size = batch_size or max(1, 2**20 // n)
+    stat = _resample(partial(_bootstrap_batch, data, statistic), num_samples,
+                     batch_size, processes, seed)
+    stat = np.sort(stat)
     return (stat[int((alpha / 2.0) * num_samples)],
             stat[int((1 - alpha / 2.0) * num_samples)])
 
 
-def permutation_resampling(case, control, num_samples=10000, statistic=None):
+def permutation_resampling(case, control, num_samples=10000, statistic=None,
+                           batch_size=None, processes=None, seed=None):
     """
     Simulation-based statistical calculation of p-value that statistic for case
     is different from statistic for control under the null hypothesis that the
@@ -375,6 +432,16 @@ def permutation_resampling(case, control, num_samples=10000, statistic=None):
         Number of permutations
     statistic : function(2darray, axis)
         The statistic function to compare case and control. Default is mean
+    batch_size : int
+        Number of permutations drawn at once, by default so that each batch
+        holds about a million values.
+    processes : int
+        With processes > 1, batches are drawn in parallel. statistic must
+        then be picklable.
+    seed : int
+        Seed of the permutations. The result is the same for a given
+        seed and batch_size, independent of processes. Without seed, the
+        global numpy random state is used.
 
     Returns
     -------
@@ -383,8 +450,8 @@ def permutation_resampling(case, control, num_samples=10000, statistic=None):
     observed_diff : float
         Absolute difference between statistic of `case` and statistic of
         `control`.
-    diffs : list
-        A list of length equal to `num_samples` with differences between
+    diffs : np.ndarray
+        An array of length equal to `num_samples` with differences between
         statistic of permutated case and statistic of permutated control.
 
     Examples
@@ -418,24 +485,22 @@ def permutation_resampling(case, control, num_samples=10000, statistic=None):
         plt.show()
 
     """
+    from functools import partial
     statistic = statistic or np.mean
 
     observed_diff = abs(statistic(case) - statistic(control))
     num_case = len(case)
 
     combined = np.concatenate([case, control])
-    diffs = []
-    for i in range(num_samples):
-        xs = np.random.permutation(combined)
-        diff = np.mean(xs[:num_case]) - np.mean(xs[num_case:])
-        diffs.append(diff)
+    batch_size = batch_size or max(1, 2**20 // len(combined))
+    diffs = _resample(partial(_permutation_batch, combined, num_case, statistic),
+                      num_samples, batch_size, processes, seed)
 
     pval = (np.sum(diffs > observed_diff) +
             np.sum(diffs < -observed_diff))/float(num_samples)
     return pval, observed_diff, diffs
 
 
-
 def stat_test(tdict, test_func=None, nan_rule='remove', stat_key='statistic'):
     '''
     A very simple function to performes statistic tests between multiple groups
@@ -627,3 +692,119 @@ def correlogram(t1, t2=None, bin_width=.001, limit=.02, auto=False,
         count = count[::-1]
 
     return count, bins
+
+
+def _correlogram_rows(times, codes, rows, nunits, bins, limit,
+                      max_pairs=2**22):
+    '''Counts of all pairs with a reference spike from the units in rows.
+    times are sorted and codes are the unit index of each spike.
+    '''
+    nbins = len(bins) - 1
+    row_of_unit = np.full(nunits, -1)
+    row_of_unit[rows] = np.arange(len(rows))
+    ref = np.flatnonzero(row_of_unit[codes] >= 0)
+    # window of each reference spike, as in correlogram
+    lo = np.searchsorted(times, times[ref] - limit)
+    hi = np.searchsorted(times, times[ref] + limit)
+    # NOTE split the reference spikes so that at most about max_pairs
+    # differences are held in memory at once
+    npairs = np.cumsum(hi - lo)
+    splits = []
+    if len(npairs):
+        splits = np.searchsorted(npairs, np.arange(max_pairs, npairs[-1], max_pairs))
+    count = np.zeros(len(rows) * nunits * nbins, dtype=int)
+    for block in np.split(np.arange(len(ref)), splits):
+        sizes = hi[block] - lo[block]
+        offsets = np.cumsum(sizes) - sizes
+        rep = np.repeat(block, sizes)
+        partner = np.arange(sizes.sum()) - np.repeat(offsets - lo[block], sizes)
+        # the spike itself is not counted, as in an autocorrelogram
+        keep = partner != ref[rep]
+        rep, partner = rep[keep], partner[keep]
+        diff = times[partner] - times[ref[rep]]
+        # the bins of np.histogram, the last edge is inclusive
+        index = np.searchsorted(bins, diff, side='right') - 1
+        index[diff == bins[-1]] = nbins - 1
+        valid = (index >= 0) & (index < nbins)
+        key = ((row_of_unit[codes[ref[rep[valid]]]] * nunits + codes[partner[valid]])
+               * nbins + index[valid])
+        count += np.bincount(key, minlength=len(count))
+    return count.reshape(len(rows), nunits, nbins)
+
+
+def correlograms(times, ids, bin_width=.001, limit=.02, processes=None):
+    """Return the crosscorrelograms of all pairs of units.
+
+    The spikes of all units are sorted once and the differences to the
+    spikes within `limit` of each spike are counted in one integer array,
+    instead of calling correlogram for every pair.
+
+    Parameters
+    ---------
+        times : np.array, or quantities.Quantity
+            Spike times of all units, in seconds.
+        ids : np.array
+            Unit of each spike.
+        bin_width : float, or quantities.Quantity
+            Width of each bar in histogram in seconds.
+        limit : float, or quantities.Quantity
+            Positive and negative extent of histogram, in seconds.
+        processes : int
+            With processes > 1, the reference units are split among
+            that many processes.
+
+    Returns
+    -------
+        (count, bins) : tuple
+            count has shape (n, n, len(bins) - 1), where count[i, j] is
+            the same as correlogram(t_i, t_j) for the units
+            np.unique(ids)[i] and np.unique(ids)[j], and count[i, i] the
+            same as correlogram(t_i, auto=True).
+
+    Examples
+    --------
+    >>> times = np.array([0., .1, .2, .3, .4, .1, .2, .3, .4, .5])
+    >>> ids = np.array([0, 0, 0, 0, 0, 1, 1, 1, 1, 1])
+    >>> count, bins = correlograms(times, ids, bin_width=.1, limit=1)
+    >>> count.shape
+    (2, 2, 20)
+    >>> counts, bins = correlogram(t1=times[:5], t2=times[5:],
+    ...                            bin_width=.1, limit=1)
+    >>> np.array_equal(count[0, 1], counts)
+    True
+    """
+    if isinstance(times, pq.Quantity):
+        times = times.rescale('s').magnitude
+    if isinstance(bin_width, pq.Quantity):
+        bin_width = bin_width.rescale('s').magnitude
+    if isinstance(limit, pq.Quantity):
+        limit = limit.rescale('s').magnitude
+    times = np.asarray(times, dtype=float)
+    assert len(times) == len(np.asarray(ids)), 'times and ids have different size'
+    units, codes = np.unique(ids, return_inverse=True)
+    nunits = len(units)
+    order = np.argsort(times, kind='mergesort')
+    times, codes = times[order], codes[order]
+
+    limit = float(limit)
+    bins = np.arange(-limit, limit + bin_width, bin_width)
+
+    groups = np.array_split(np.arange(nunits), min(processes or 1, max(nunits, 1)))
+    if processes is not None and processes > 1 and len(groups) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(_correlogram_rows, times, codes, rows,
+                                       nunits, bins, limit)
+                       for rows in groups]
+            count = np.concatenate([future.result() for future in futures])
+    else:
+        count = _correlogram_rows(times, codes, np.arange(nunits), nunits,
+                                  bins, limit)
+
+    # correlogram swaps the spike trains if t1 is the longer one and then
+    # reverses the counts, which is not exactly the same for spikes on the
+    # bin edges
+    nspikes = np.bincount(codes, minlength=nunits)
+    swap = nspikes[:, None] > nspikes[None, :]
+    count = np.where(swap[:, :, None], count.transpose(1, 0, 2)[:, :, ::-1], count)
+    return count, bins
@@ -5,4 +5,4 @@ from .tools import (epoch_overview, make_analog_trials, make_spiketrain_trials,
                     compute_spontan_rate, compute_osi, make_orientation_trials,
                     _convert_quantity_scalar_to_string, _convert_string_to_quantity_scalar,
                     compute_orientation_tuning)
-from .stimulus_associated_latency import salt, generate_salt_trials, baysian_latency
+from .stimulus_associated_latency import salt, salt_units, generate_salt_trials, baysian_latency
@@ -120,56 +120,33 @@ def salt(baseline_trials, test_trials, winsize=0.01*pq.s,
     t_start = baseline_trials[0].t_start.rescale('s')
     t_stop = baseline_trials[0].t_stop.rescale('s')
     winsize = winsize.rescale('s')
-    baseline_trials = [trial.rescale('s') for trial in baseline_trials]
-    test_trials = [trial.rescale('s') for trial in test_trials]
 
     windows = np.arange(t_start, t_stop + winsize, winsize)
     binsize = winsize / 20
     bins = np.arange(- binsize, winsize + binsize, binsize)
-    # Latency histogram - baseline
-    nbtrials = len(baseline_trials)  # number of trials and number of baseline (pre-stim) data points
-    nbins = len(bins)   # number of bins for latency histograms
+    nowin = - binsize.magnitude / 2   # latency if no spike in the window
+    # Latency histograms - baseline
+    baseline_latencies = _first_spike_latencies(baseline_trials, windows[:-1],
+                                                windows[1:])
+    nhlsi = _latency_histograms(baseline_latencies, bins, nowin)
+    # Pairwise modified JS-divergence (real metric!) within baseline
     nwins = len(windows)
-    hlsi = np.zeros((nbins - 1, nwins))   # preallocate latency histograms
-    nhlsi = np.zeros((nbins - 1, nwins))    # preallocate latency histograms
-    for i in range(nwins - 1):   # loop through baseline windows
-        min_spike_times = []
-        for j, trial in enumerate(baseline_trials):   # loop through trials
-            mask = (trial < windows[i + 1]) & (trial > windows[i])
-            spikes_in_win = trial[mask]
-            if len(spikes_in_win) > 0:
-                min_spike_times.append(spikes_in_win.min().magnitude - windows[i])   # latency from window
-            else:
-                min_spike_times.append(- binsize / 2)   # 0 if no spike in the window
-        hlsi[:, i], _ = np.histogram(min_spike_times, bins)   # latency histogram
-        nhlsi[:, i] = hlsi[:, i] / sum(hlsi[:, i])   # normalized latency histogram
+    kn = nwins   # number of all windows (nwins - 1 baseline win. + 1 test win.)
+    jsd = np.zeros((kn, kn)) * np.nan
+    upper = np.triu_indices(kn - 1, 1)
+    jsd[upper] = np.sqrt(_pairwise_jsdiv(nhlsi, nhlsi)[upper] * 2)
 
     test_t_stop = test_trials[0].t_stop.rescale('s')
     latencies = np.arange(0 * pq.s, test_t_stop + latency_step, latency_step)
+    test_latencies = _first_spike_latencies(test_trials, latencies,
+                                            latencies + winsize.magnitude)
+    test_nhlsi = _latency_histograms(test_latencies, bins, nowin)
+    # Test-to-baseline divergences for all latencies at once
+    test_jsd = np.sqrt(_pairwise_jsdiv(nhlsi, test_nhlsi) * 2)
     p_values = []
     I_values = []
-    nttrials = len(test_trials)   # number of trials
-    lsi_tt = np.zeros((nttrials,1))*np.nan   # preallocate latency matrix
-    for latency in latencies:
-        min_spike_times = []
-        for j, trial in enumerate(test_trials):   # loop through trials
-            mask = (trial < latency + winsize.magnitude) & (trial > latency)
-            spikes_in_win = trial[mask]
-            if len(spikes_in_win) > 0:
-                min_spike_times.append(spikes_in_win.min().magnitude - latency)   # latency from window
-            else:
-                min_spike_times.append(- binsize / 2)   # 0 if no spike in the window
-        hlsi[:, nwins - 1], _ = np.histogram(min_spike_times, bins)   # latency histogram
-        nhlsi[:, nwins - 1] = hlsi[:, nwins - 1] / sum(hlsi[:, nwins - 1])   # normalized latency histogram
-        # JS-divergence
-        kn = nwins   # number of all windows (nwins baseline win. + 1 test win.)
-        jsd = np.zeros((kn, kn)) * np.nan
-        for k1 in range(kn):
-            D1 = nhlsi[:, k1]  # 1st latency histogram
-            for k2 in range(k1+1, kn):
-                D2 = nhlsi[:, k2]   # 2nd latency histogram
-                jsd[k1, k2] = np.sqrt(JSdiv(D1, D2) * 2)  # pairwise modified JS-divergence (real metric!)
-
+    for i in range(len(latencies)):
+        jsd[:kn - 1, kn - 1] = test_jsd[:, i]
         # Calculate p-value and information difference
         p, I = makep(jsd, kn)
         p_values.append(p)
@@ -177,6 +154,125 @@ def salt(baseline_trials, test_trials, winsize=0.01*pq.s,
     return latencies * pq.s, p_values, I_values
 
 
+def _first_spike_latencies(trials, starts, stops):
+    """
+    Latency of the first spike in each trial strictly between each start and
+    stop, NaN where there is none. Returns an array with shape
+    (len(starts), len(trials)).
+
+    The trials are searched together: spike times and starts are replaced
+    by their rank among all of them, so (trial, rank) pairs can be encoded
+    as integers that are sorted across the concatenated trials.
+    """
+    spikes = [np.sort(trial.times.rescale('s').magnitude) for trial in trials]
+    trial_index = np.repeat(np.arange(len(spikes)), [len(s) for s in spikes])
+    spikes = np.concatenate(spikes) if len(spikes) > 0 else np.zeros(0)
+    starts = np.asarray(starts, dtype=float)
+    stops = np.asarray(stops, dtype=float)
+    nspikes = len(spikes)
+    latencies = np.zeros((len(starts), len(trials))) * np.nan
+    if nspikes == 0:
+        return latencies
+    _, ranks = np.unique(np.concatenate((spikes, starts)), return_inverse=True)
+    nranks = ranks.max() + 1
+    spike_keys = trial_index * nranks + ranks[:nspikes]
+    start_keys = (np.arange(len(trials)) * nranks +
+                  ranks[nspikes:, np.newaxis])
+    first = np.searchsorted(spike_keys, start_keys, side='right')
+    found = first < nspikes
+    first[~found] = 0
+    first_spikes = spikes[first]
+    found &= trial_index[first] == np.arange(len(trials))
+    found &= first_spikes < stops[:, np.newaxis]
+    latencies[found] = (first_spikes - starts[:, np.newaxis])[found]
+    return latencies
+
+
+def _latency_histograms(latencies, bins, nowin):
+    """Normalized histograms of the latencies of each window (rows of
+    latencies) with shape (len(latencies), len(bins) - 1), using nowin for
+    trials without spikes."""
+    latencies = np.where(np.isnan(latencies), nowin, latencies)
+    nbins = len(bins) - 1
+    # NOTE same bin edges as np.histogram, with the last bin closed
+    index = np.searchsorted(bins, latencies, side='right') - 1
+    index[latencies == bins[-1]] = nbins - 1
+    inside = (index >= 0) & (index < nbins)
+    windows = np.repeat(np.arange(len(latencies)), latencies.shape[1])
+    windows = windows.reshape(latencies.shape)
+    hlsi = np.bincount(windows[inside] * nbins + index[inside],
+                       minlength=len(latencies) * nbins)
+    hlsi = hlsi.reshape(len(latencies), nbins).astype(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return hlsi / hlsi.sum(axis=1)[:, np.newaxis]
+
+
+def _sequential_sum(x):
+    # NOTE sum in the order of the builtin sum used by KLdist, since the
+    # p value compares distances that are often equal
+    return np.cumsum(x, axis=-1)[..., -1]
+
+
+def _pairwise_kldist(P, M):
+    """KLdist between corresponding distributions along the last axis."""
+    support = P * M > 0   # restrict to the common support
+    P2 = np.where(support, P, 0)
+    M2 = np.where(support, M, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        P2 = P2 / _sequential_sum(P2)[..., np.newaxis]   # renormalize
+        M2 = M2 / _sequential_sum(M2)[..., np.newaxis]
+        terms = np.where(support, P2 * np.log(P2 / M2), 0)
+    return _sequential_sum(terms)
+
+
+def _pairwise_jsdiv(P, Q):
+    """JSdiv between every distribution in P and every distribution in Q,
+    given as rows. Returns an array with shape (len(P), len(Q))."""
+    P = P[:, np.newaxis, :]
+    Q = Q[np.newaxis, :, :]
+    M = (P + Q) / 2
+    return (_pairwise_kldist(P, M) + _pairwise_kldist(Q, M)) / 2
+
+
+def salt_units(trials, winsize=0.01*pq.s, latency_step=0.01*pq.s,
+               processes=None):
+    '''Runs salt for many units. With processes > 1, the units are tested
+    in parallel.
+
+    Parameters
+    ----------
+    trials : list of tuples
+        (baseline_trials, test_trials) of each unit, for instance from
+        generate_salt_trials
+    winsize : quantities.Quantity
+        Window size for baseline and test windows in seconds
+        (optional default, 0.01 s).
+    latency_step : quantities.Quantity
+        Step size for test latencies in seconds
+        (optional default, 0.01 s).
+    processes : int
+        number of processes
+
+    Returns
+    -------
+    out : list of tuples
+        (latencies, p_values, I_values) of each unit, see salt
+    '''
+    from functools import partial
+    test = partial(_salt_unit, winsize=winsize, latency_step=latency_step)
+    if processes is not None and processes > 1 and len(trials) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            return list(executor.map(test, trials))
+    return [test(unit_trials) for unit_trials in trials]
+
+
+def _salt_unit(unit_trials, winsize, latency_step):
+    baseline_trials, test_trials = unit_trials
+    return salt(baseline_trials, test_trials, winsize=winsize,
+                latency_step=latency_step)
+
+
 def makep(kld, kn):
     '''Calculates p value from distance matrix.'''
 
@@ -134,7 +134,26 @@ def make_orientation_trials(trials, unit=pq.deg):
                               key=lambda x: _convert_string_to_quantity_scalar(x[0]).magnitude))
 
 
-def make_spiketrain_trials(spike_train, epoch, t_start=None, t_stop=None):
+def _epoch_bounds(epoch, t_start, t_stop, dim='s'):
+    """Epoch times and trial starts and stops as magnitudes in dim."""
+    times = epoch.times.rescale(dim)
+    if t_start.ndim == 0:
+        t_starts = t_start * np.ones(len(epoch.times))
+    else:
+        t_starts = t_start
+        assert len(epoch.times) == len(t_starts), 'epoch.times and t_starts have different size'
+    if t_stop.ndim == 0:
+        t_stops = t_stop * np.ones(len(epoch.times))
+    else:
+        t_stops = t_stop
+        assert len(epoch.times) == len(t_stops), 'epoch.times and t_stops have different size'
+    t_starts = t_starts.rescale(dim).magnitude
+    t_stops = t_stops.rescale(dim).magnitude
+    return times.magnitude, t_starts, t_stops
+
+
+def make_spiketrain_trials(spike_train, epoch, t_start=None, t_stop=None,
+                           ragged=False):
     '''
     Makes trials based on an Epoch and given temporal bound
     Parameters
@@ -145,39 +164,34 @@ def make_spiketrain_trials(spike_train, epoch, t_start=None, t_stop=None):
         time before epochs, default is 0 s
     t_stop : quantities.Quantity
         time after epochs default is duration of epoch
+    ragged : bool
+        return the spike times of all trials in one array instead of a list
+        of neo.SpikeTrains
     Returns
     -------
     out : list of neo.SpikeTrains
+    if ragged = True
+    out : times, offsets
+        spike times relative to the epoch times of all trials, in s, and
+        where they start, trial j is times[offsets[j]:offsets[j + 1]]
     '''
     from neo.core import SpikeTrain
     if t_start is None:
         t_start = 0 * pq.s
-    if t_start.ndim == 0:
-        t_starts = t_start * np.ones(len(epoch.times))
-    else:
-        t_starts = t_start
-        assert len(epoch.times) == len(t_starts), 'epoch.times and t_starts have different size'
     if t_stop is None:
         t_stop = epoch.durations
-    if t_stop.ndim == 0:
-        t_stops = t_stop * np.ones(len(epoch.times))
-    else:
-        t_stops = t_stop
-        assert len(epoch.times) == len(t_stops), 'epoch.times and t_stops have different size'
 
     dim = 's'
 
     if isinstance(spike_train, neo.Unit):
-        sptr = []
-        for st in unit.spiketrains:
-            sptr.append(spike_train.rescale(dim).magnitude)
-        sptr = np.sort(sptr) * pq.s
+        sptr = [st.times.rescale(dim).magnitude for st in spike_train.spiketrains]
+        sptr = np.sort(np.concatenate(sptr)) * pq.s
     elif isinstance(spike_train, neo.SpikeTrain):
         sptr = spike_train.times.rescale(dim)
     elif isinstance(spike_train, pq.Quantity):
-        assert is_quantities(spike_train, 'vector')
+        is_quantities(spike_train, 'vector')
         sptr = spike_train.rescale(dim)
-    elif isinstance(spike_train, np.array):
+    elif isinstance(spike_train, np.ndarray):
         sptr = spike_train * pq.s
     else:
         raise TypeError('Expected (neo.Unit, neo.SpikeTrain, ' +
@@ -186,22 +200,36 @@ def make_spiketrain_trials(spike_train, epoch, t_start=None, t_stop=None):
     if not isinstance(epoch, neo.Epoch):
         raise TypeError('Expected "neo.Epoch" got "' + str(type(epoch)) + '"')
 
+    times, t_starts, t_stops = _epoch_bounds(epoch, t_start, t_stop, dim)
+    sptr = sptr.magnitude
+    if np.any(np.diff(sptr) < 0):
+        sptr = np.sort(sptr)
+    # spikes strictly between the trial bounds
+    starts = np.searchsorted(sptr, times + t_starts, side='right')
+    stops = np.searchsorted(sptr, times + t_stops, side='left')
+    stops = np.maximum(starts, stops)
+    counts = stops - starts
+    offsets = np.zeros(len(times) + 1, dtype=int)
+    offsets[1:] = np.cumsum(counts)
+    # NOTE one gather and subtraction for all trials, which are views of it
+    index = np.arange(offsets[-1]) - np.repeat(offsets[:-1] - starts, counts)
+    trial_times = (sptr[index] - np.repeat(times, counts)) * pq.s
+    if ragged:
+        return trial_times, offsets
+
     trials = []
-    for j, t in enumerate(epoch.times.rescale(dim)):
-        t_start = t_starts[j].rescale(dim)
-        t_stop = t_stops[j].rescale(dim)
-        spikes = []
-        for spike in sptr[(t+t_start < sptr) & (sptr < t+t_stop)]:
-            spikes.append(spike-t)
-        trials.append(SpikeTrain(times=spikes * pq.s,
-                                 t_start=t_start,
-                                 t_stop=t_stop))
+    for j in range(len(times)):
+        trials.append(SpikeTrain(times=trial_times[offsets[j]:offsets[j + 1]],
+                                 t_start=t_starts[j] * pq.s,
+                                 t_stop=t_stops[j] * pq.s,
+                                 copy=False))
     return trials
 
 
 def make_analog_trials(ana, epoch, t_start, t_stop):
     '''
-    Makes trials based on an Epoch and given temporal bound
+    Makes trials based on an Epoch and given temporal bound. The trials
+    are views of the signal of ana.
     Parameters
     ----------
     epoch : neo.Epoch
@@ -219,12 +247,19 @@ def make_analog_trials(ana, epoch, t_start, t_stop):
     dim = 's'
     t_start = t_start.rescale(dim)
     t_stop = t_stop.rescale(dim)
-    times = epoch.times.rescale(dim)
+    times = epoch.times.rescale(dim).magnitude
+    nsamp = int((abs(t_start - t_stop) * ana.sampling_rate).rescale('dimensionless'))-1
+    ana_times = ana.times.rescale(dim).magnitude
+    # samples with t + t_start <= ana.times <= t + t_stop
+    starts = np.searchsorted(ana_times, times + t_start.magnitude, side='left')
+    stops = np.searchsorted(ana_times, times + t_stop.magnitude, side='right')
+    stops = np.minimum(np.maximum(starts, stops), starts + max(nsamp, 0))
+    signal = ana.magnitude
     trials = []
-    nsamp = int(abs(t_start - t_stop) * ana.sampling_rate)-1
-    for j, t in enumerate(times):
-        sig = ana.magnitude[(t+t_start <= ana.times) & (ana.times <= t+t_stop), :]
-        trials.append(AnalogSignal(signal=sig[:nsamp, :]*ana.units,
+    for start, stop in zip(starts, stops):
+        trials.append(AnalogSignal(signal=signal[start:stop, :],
+                                   units=ana.units,
+                                   copy=False,
                                    sampling_rate=ana.sampling_rate,
                                    t_start=t_start,
                                    t_stop=t_stop))
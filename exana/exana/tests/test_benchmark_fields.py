@@ -0,0 +1,74 @@
+import pytest
+import numpy as np
+import quantities as pq
+import neo
+
+pytest.importorskip('pytest_benchmark')
+
+from exana.tests.test_tracking import _spatial_rate_map_reference, random_walk
+
+
+@pytest.fixture(scope='module')
+def session():
+    # one hour at 50 Hz and 200 units
+    x, y, t = random_walk(N=3600 * 50)
+    rng = np.random.RandomState(0)
+    sptrs = [neo.SpikeTrain(times=np.sort(rng.uniform(0, 3600, 5000)) * pq.s,
+                            t_stop=3600 * pq.s)
+             for _ in range(200)]
+    return x, y, t, sptrs
+
+
+def test_spatial_rate_map_loop_2_units(benchmark, session):
+    x, y, t, sptrs = session
+
+    def run():
+        for sptr in sptrs[:2]:
+            _spatial_rate_map_reference(x.magnitude, y.magnitude, t, sptr,
+                                        0.02, 1., 1.)
+    benchmark.pedantic(run, rounds=1)
+
+
+def test_spatial_rate_map_per_unit(benchmark, session):
+    from exana.tracking.fields import spatial_rate_map
+    x, y, t, sptrs = session
+
+    def run():
+        for sptr in sptrs:
+            spatial_rate_map(x, y, t, sptr, binsize=0.02 * pq.m, convolve=False)
+    benchmark.pedantic(run, rounds=3)
+
+
+def test_spatial_rate_maps(benchmark, session):
+    from exana.tracking.fields import spatial_rate_maps
+    x, y, t, sptrs = session
+    benchmark(spatial_rate_maps, x, y, t, sptrs, binsize=0.02 * pq.m,
+              convolve=False)
+
+
+@pytest.fixture(scope='module')
+def grid_maps():
+    from exana.tests.test_fields import grid_rate_maps
+    # 500 rate maps with 50 x 50 bins
+    return grid_rate_maps(n=500, nbins=50)
+
+
+def test_gridness_loop_10_maps(benchmark, grid_maps):
+    from exana.tests.test_fields import _gridness_reference
+
+    def run():
+        for rate_map in grid_maps[:10]:
+            _gridness_reference(rate_map, 1., 1., 0.1)
+    benchmark.pedantic(run, rounds=1)
+
+
+def test_gridness_scores(benchmark, grid_maps):
+    from exana.tracking.fields import gridness_scores
+    benchmark.pedantic(gridness_scores, args=(grid_maps, 1 * pq.m, 1 * pq.m),
+                       rounds=1)
+
+
+def test_gridness_scores_parallel(benchmark, grid_maps):
+    from exana.tracking.fields import gridness_scores
+    benchmark.pedantic(gridness_scores, args=(grid_maps, 1 * pq.m, 1 * pq.m),
+                       kwargs={'processes': 4}, rounds=1)
@@ -0,0 +1,29 @@
+import pytest
+import quantities as pq
+
+pytest.importorskip('pytest_benchmark')
+pytest.importorskip('elephant')
+
+from exana.tests.test_salt import make_salt_trials, _salt_reference
+
+
+@pytest.fixture(scope='module')
+def session():
+    # 20 units with 300 trials each
+    return [make_salt_trials(2 * pq.Hz, 8 * pq.Hz, N_trials=300, seed=seed)
+            for seed in range(20)]
+
+
+def test_salt_loop_one_unit(benchmark, session):
+    benchmark.pedantic(_salt_reference, args=session[0], rounds=1)
+
+
+def test_salt_units(benchmark, session):
+    from exana.stimulus import salt_units
+    benchmark.pedantic(salt_units, args=(session,), rounds=3)
+
+
+def test_salt_units_parallel(benchmark, session):
+    from exana.stimulus import salt_units
+    benchmark.pedantic(salt_units, args=(session,), kwargs={'processes': 4},
+                       rounds=3)
@@ -0,0 +1,153 @@
+import pytest
+import numpy as np
+import scipy.signal as ss
+
+pytest.importorskip('pytest_benchmark')
+
+from exana.misc import signal_tools
+
+FS = 30000.
+BAND = [300, 6000]
+
+
+@pytest.fixture(scope='module')
+def anas():
+    # 64 channels, 10 s at 30 kHz
+    rng = np.random.RandomState(0)
+    return rng.randn(64, int(10 * FS)).astype('float32')
+
+
+@pytest.fixture
+def memmap(tmpdir, anas):
+    filename = str(tmpdir.join('signals.dat'))
+    anas.T.tofile(filename)
+
+    def setup():
+        return (np.memmap(filename, dtype='float32', mode='r+',
+                          shape=anas.shape[::-1]).T,), {}
+    return setup
+
+
+def serial_filter(anas):
+    b, a = ss.butter(3, np.array(BAND) / (FS / 2.), btype='bandpass')
+    return ss.filtfilt(b, a, anas, axis=1)
+
+
+def serial_CAR(anas):
+    anas_car = np.array(np.copy(anas), dtype=np.float32)
+    avg_ref = np.median(anas_car, axis=0)
+    anas_car -= avg_ref
+    return anas_car, avg_ref
+
+
+def test_filter_serial(benchmark, anas):
+    benchmark(serial_filter, anas)
+
+
+def test_filter_chunked(benchmark, anas):
+    benchmark(signal_tools.filter_analog_signals, anas, BAND, FS)
+
+
+def test_filter_memmap_in_place(benchmark, memmap):
+    def run(anas):
+        signal_tools.filter_analog_signals(anas, BAND, FS, copy_signal=False)
+    benchmark.pedantic(run, setup=memmap, rounds=3)
+
+
+def test_filter_memmap_in_place_processes(benchmark, memmap):
+    def run(anas):
+        signal_tools.filter_analog_signals(anas, BAND, FS, copy_signal=False,
+                                           parallel='processes')
+    benchmark.pedantic(run, setup=memmap, rounds=3)
+
+
+def test_CAR_serial(benchmark, anas):
+    benchmark(serial_CAR, anas)
+
+
+def test_CAR_chunked(benchmark, anas):
+    benchmark(signal_tools.apply_CAR, anas, car_type='median')
+
+
+def test_CAR_memmap_in_place(benchmark, memmap):
+    def run(anas):
+        signal_tools.apply_CAR(anas, car_type='median', copy_signal=False)
+    benchmark.pedantic(run, setup=memmap, rounds=3)
+
+
+@pytest.fixture(scope='module')
+def optogenetics_session():
+    # 10000 triggers at 20 Hz, 8 channels at 10 kHz
+    import quantities as pq
+    rng = np.random.RandomState(0)
+    fs = 10000.
+    times = np.arange(int(510 * fs)) / fs * pq.s
+    anas = rng.randn(8, len(times)).astype('float32')
+    trigger = (5 + np.arange(10000) / 20.) * pq.s
+    return anas, times, trigger
+
+
+def loop_remove_stimulation_artifacts(anas, times, trigger, pre, post):
+    anas_rem = anas.copy()
+    for tr in trigger:
+        idx = np.where((times > tr - pre) & (times < tr + post))
+        anas_rem[:, idx] = 0
+    return anas_rem
+
+
+def test_remove_stimulation_artifacts_loop_100_triggers(benchmark, optogenetics_session):
+    import quantities as pq
+    anas, times, trigger = optogenetics_session
+    benchmark.pedantic(loop_remove_stimulation_artifacts,
+                       args=(anas, times, trigger[:100], 3 * pq.ms, 5 * pq.ms),
+                       rounds=1)
+
+
+@pytest.mark.parametrize('mode', ['zero', 'template'])
+def test_remove_stimulation_artifacts(benchmark, optogenetics_session, mode):
+    anas, times, trigger = optogenetics_session
+    benchmark(signal_tools.remove_stimulation_artifacts, anas, times, trigger,
+              mode=mode)
+
+
+def test_remove_stimulation_artifacts_memmap_in_place(benchmark, tmpdir,
+                                                      optogenetics_session):
+    anas, times, trigger = optogenetics_session
+    filename = str(tmpdir.join('optogenetics.dat'))
+    anas.T.tofile(filename)
+
+    def setup():
+        memmap = np.memmap(filename, dtype='float32', mode='r+',
+                           shape=anas.shape[::-1]).T
+        return (memmap, times, trigger), {'mode': 'template',
+                                          'copy_signal': False}
+    benchmark.pedantic(signal_tools.remove_stimulation_artifacts, setup=setup,
+                       rounds=3)
+
+
+def loop_auto_denoise(anas, thresh=2.5):
+    env = np.abs(ss.hilbert(anas))
+    b_smooth, a_smooth = ss.butter(4, 0.01)
+    env = ss.filtfilt(b_smooth, a_smooth, env)
+    sd = np.std(anas, axis=1)
+    noisy_idx = []
+    for i in np.arange(len(anas[0])):
+        if np.all([env[ch, i] >= thresh*sd[ch] for ch in np.arange(env.shape[0])]):
+            noisy_idx.append(i)
+    anas = anas.copy()
+    anas[:, noisy_idx] = 0
+    return anas
+
+
+def test_auto_denoise_loop(benchmark, anas):
+    benchmark.pedantic(loop_auto_denoise, args=(anas[:8, :100000],), rounds=1)
+
+
+def test_auto_denoise(benchmark, anas):
+    benchmark(signal_tools.auto_denoise, anas[:8, :100000])
+
+
+def test_auto_denoise_memmap_chunked(benchmark, memmap):
+    def run(anas):
+        signal_tools.auto_denoise(anas, copy_signal=False, chunksize=2**16)
+    benchmark.pedantic(run, setup=memmap, rounds=3)
@@ -0,0 +1,96 @@
+import pytest
+import numpy as np
+
+pytest.importorskip('pytest_benchmark')
+
+
+@pytest.fixture(scope='module')
+def units():
+    # 60 units at 5 Hz for 10 minutes
+    rng = np.random.RandomState(0)
+    sptrs = [np.sort(rng.uniform(0, 600, 3000)) for _ in range(60)]
+    ids = np.repeat(np.arange(len(sptrs)), [len(t) for t in sptrs])
+    return sptrs, np.concatenate(sptrs), ids
+
+
+def test_correlogram_all_pairs_loop(benchmark, units):
+    from exana.statistics.tools import correlogram
+    sptrs, _, _ = units
+
+    def run():
+        for i, t1 in enumerate(sptrs):
+            for j, t2 in enumerate(sptrs):
+                correlogram(t1, t2, auto=i == j)
+    benchmark.pedantic(run, rounds=1)
+
+
+def test_correlograms(benchmark, units):
+    from exana.statistics.tools import correlograms
+    _, times, ids = units
+    benchmark.pedantic(correlograms, args=(times, ids), rounds=3)
+
+
+def test_correlograms_parallel(benchmark, units):
+    from exana.statistics.tools import correlograms
+    _, times, ids = units
+    benchmark.pedantic(correlograms, args=(times, ids),
+                       kwargs={'processes': 4}, rounds=3)
+
+
+@pytest.fixture(scope='module')
+def population():
+    rng = np.random.RandomState(0)
+    return rng.lognormal(0, 1, 2000)
+
+
+@pytest.mark.parametrize('num_samples', [10**5, 10**6])
+def test_bootstrap(benchmark, population, num_samples):
+    import tracemalloc
+    from exana.statistics.tools import bootstrap
+
+    def run():
+        tracemalloc.start()
+        bootstrap(population, num_samples, seed=0)
+        benchmark.extra_info['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    benchmark.pedantic(run, rounds=1)
+
+
+def test_bootstrap_dense_10_5(benchmark, population):
+    # the original dense matrix of indices, 10**5 x 2000 values
+    import tracemalloc
+    from exana.tests.test_statistics import _bootstrap_reference
+
+    def run():
+        tracemalloc.start()
+        _bootstrap_reference(population, 10**5, np.mean, 0.05)
+        benchmark.extra_info['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    benchmark.pedantic(run, rounds=1)
+
+
+def test_bootstrap_parallel(benchmark, population):
+    from exana.statistics.tools import bootstrap
+    benchmark.pedantic(bootstrap, args=(population, 10**5),
+                       kwargs={'seed': 0, 'processes': 4}, rounds=1)
+
+
+@pytest.mark.parametrize('num_samples', [10**5, 10**6])
+def test_permutation_resampling(benchmark, population, num_samples):
+    import tracemalloc
+    from exana.statistics.tools import permutation_resampling
+
+    def run():
+        tracemalloc.start()
+        permutation_resampling(population[:100], population[100:200],
+                               num_samples, seed=0)
+        benchmark.extra_info['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    benchmark.pedantic(run, rounds=1)
+
+
+def test_permutation_resampling_loop_10_5(benchmark, population):
+    from exana.tests.test_statistics import _permutation_resampling_reference
+    benchmark.pedantic(_permutation_resampling_reference,
+                       args=(population[:100], population[100:200], 10**5),
+                       rounds=1)
@@ -0,0 +1,55 @@
+import pytest
+import numpy as np
+import quantities as pq
+import neo
+
+pytest.importorskip('pytest_benchmark')
+
+from exana.tests.test_stimulus import _make_spiketrain_trials_reference
+
+
+@pytest.fixture(scope='module')
+def session():
+    # 10000 trials of 0.5 s and one hour at 20 Hz
+    rng = np.random.RandomState(0)
+    times = np.arange(10000) * 0.36 * pq.s
+    epoch = neo.Epoch(times=times, durations=np.ones(len(times)) * 0.3 * pq.s)
+    sptr = neo.SpikeTrain(times=np.sort(rng.uniform(0, 3600, 72000)) * pq.s,
+                          t_stop=3600 * pq.s)
+    ana = neo.AnalogSignal(rng.randn(3600 * 1000, 4).astype('float32') * pq.mV,
+                           sampling_rate=1 * pq.kHz)
+    return sptr, epoch, ana
+
+
+def test_make_spiketrain_trials_loop_1000_trials(benchmark, session):
+    sptr, epoch, _ = session
+    benchmark.pedantic(_make_spiketrain_trials_reference,
+                       args=(sptr.times, epoch[:1000], 0 * pq.s, 0.3 * pq.s),
+                       rounds=1)
+
+
+def test_make_spiketrain_trials(benchmark, session):
+    from exana.stimulus.tools import make_spiketrain_trials
+    sptr, epoch, _ = session
+    benchmark(make_spiketrain_trials, sptr, epoch)
+
+
+def test_make_spiketrain_trials_ragged(benchmark, session):
+    from exana.stimulus.tools import make_spiketrain_trials
+    sptr, epoch, _ = session
+    benchmark(make_spiketrain_trials, sptr, epoch, ragged=True)
+
+
+def test_make_analog_trials_loop_100_trials(benchmark, session):
+    _, epoch, ana = session
+
+    def run():
+        for t in epoch.times[:100]:
+            ana.magnitude[(t <= ana.times) & (ana.times <= t + 0.3 * pq.s), :]
+    benchmark.pedantic(run, rounds=1)
+
+
+def test_make_analog_trials(benchmark, session):
+    from exana.stimulus.tools import make_analog_trials
+    _, epoch, ana = session
+    benchmark(make_analog_trials, ana, epoch, 0 * pq.s, 0.3 * pq.s)
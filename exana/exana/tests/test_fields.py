@@ -20,3 +20,69 @@ def test_spatial_rate_map_1d():
         return_bins=True,
         smoothing=0.02)
     assert np.array_equal(rate, [1., 0])
+
+
+def _gridness_reference(rate_map, box_xlen, box_ylen, step_size):
+    # the original search with one rotation per angle and mask
+    from scipy.ndimage import rotate
+    import numpy.ma as ma
+    from exana.misc.tools import fftcorrelate2d, masked_corrcoef2d
+    tmp_map = rate_map.copy()
+    tmp_map[~np.isfinite(tmp_map)] = 0
+    acorr = fftcorrelate2d(tmp_map, tmp_map, mode='full', normalize=True)
+    rows, cols = acorr.shape
+    b_x = np.linspace(-box_xlen/2., box_xlen/2., rows)
+    b_y = np.linspace(-box_ylen/2., box_ylen/2., cols)
+    B_x, B_y = np.meshgrid(b_x, b_y)
+    grids = []
+    for outer in np.arange(box_xlen/4, box_xlen/2, step_size):
+        m_acorr = ma.masked_array(acorr, mask=np.sqrt(B_x**2 + B_y**2) > outer)
+        for inner in np.arange(0, box_xlen/4, step_size):
+            m_acorr = \
+                ma.masked_array(m_acorr, mask=np.sqrt(B_x**2 + B_y**2) < inner)
+            corr = []
+            for angle in range(30, 180+30, 30):
+                rot_acorr = rotate(m_acorr, angle, reshape=False)
+                corr.append(masked_corrcoef2d(rot_acorr, m_acorr)[0, 1])
+            grids.append(np.min(corr[1::2]) - np.max(corr[::2]))
+    return max(grids)
+
+
+def grid_rate_maps(n=4, nbins=20, seed=0):
+    rng = np.random.RandomState(seed)
+    xx, yy = np.meshgrid(np.linspace(0, 1, nbins), np.linspace(0, 1, nbins))
+    rate_maps = []
+    for i in range(n):
+        spacing = rng.uniform(0.3, 0.5)
+        phase = rng.uniform(0, 2 * np.pi, 2)
+        rate = 0.
+        for angle in np.deg2rad([0, 60, 120]) + rng.uniform(0, np.pi / 3):
+            k = 4 * np.pi / (np.sqrt(3) * spacing)
+            rate = rate + np.cos(k * (np.cos(angle) * xx + np.sin(angle) * yy) + phase[i % 2])
+        rate_maps.append(rate + rng.uniform(0, 0.5 * i, rate.shape))
+    rate_maps[-1][0, :3] = np.nan
+    return np.array(rate_maps)
+
+
+def test_gridness_matches_reference():
+    from exana.tracking.fields import gridness
+    for rate_map in grid_rate_maps():
+        for step_size in [0.1, 0.05]:
+            expected = _gridness_reference(rate_map, 1., 1., step_size)
+            score, acorr = gridness(rate_map, 1 * pq.m, 1 * pq.m,
+                                    step_size=step_size * pq.m,
+                                    return_acorr=True)
+            assert np.isclose(score, expected, rtol=0, atol=1e-10)
+            assert acorr.shape == (39, 39)
+
+
+def test_gridness_scores():
+    from exana.tracking.fields import gridness, gridness_scores
+    rate_maps = grid_rate_maps()
+    expected = [gridness(rate_map, 1 * pq.m, 1 * pq.m) for rate_map in rate_maps]
+    assert expected[0] > 0.5
+    assert np.array_equal(gridness_scores(rate_maps, 1 * pq.m, 1 * pq.m),
+                          expected)
+    assert np.array_equal(gridness_scores(list(rate_maps), 1 * pq.m, 1 * pq.m,
+                                          processes=2),
+                          expected)
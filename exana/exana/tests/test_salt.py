@@ -90,6 +90,129 @@ def test_salt_exc():
     return baseline_trials, test_trials, spike_train, epoch
 
 
+def _salt_reference(baseline_trials, test_trials, winsize=0.01*pq.s,
+                    latency_step=0.01*pq.s):
+    # the original loops over windows, trials and histogram pairs
+    from exana.stimulus.stimulus_associated_latency import JSdiv, makep
+    t_start = baseline_trials[0].t_start.rescale('s')
+    t_stop = baseline_trials[0].t_stop.rescale('s')
+    winsize = winsize.rescale('s')
+    baseline_trials = [trial.rescale('s') for trial in baseline_trials]
+    test_trials = [trial.rescale('s') for trial in test_trials]
+
+    windows = np.arange(t_start, t_stop + winsize, winsize)
+    binsize = winsize / 20
+    bins = np.arange(- binsize, winsize + binsize, binsize)
+    # Latency histogram - baseline
+    nbtrials = len(baseline_trials)  # number of trials and number of baseline (pre-stim) data points
+    nbins = len(bins)   # number of bins for latency histograms
+    nwins = len(windows)
+    hlsi = np.zeros((nbins - 1, nwins))   # preallocate latency histograms
+    nhlsi = np.zeros((nbins - 1, nwins))    # preallocate latency histograms
+    for i in range(nwins - 1):   # loop through baseline windows
+        min_spike_times = []
+        for j, trial in enumerate(baseline_trials):   # loop through trials
+            mask = (trial < windows[i + 1]) & (trial > windows[i])
+            spikes_in_win = trial[mask]
+            if len(spikes_in_win) > 0:
+                min_spike_times.append(spikes_in_win.min().magnitude - windows[i])   # latency from window
+            else:
+                min_spike_times.append(- binsize / 2)   # 0 if no spike in the window
+        hlsi[:, i], _ = np.histogram(min_spike_times, bins)   # latency histogram
+        nhlsi[:, i] = hlsi[:, i] / sum(hlsi[:, i])   # normalized latency histogram
+
+    test_t_stop = test_trials[0].t_stop.rescale('s')
+    latencies = np.arange(0 * pq.s, test_t_stop + latency_step, latency_step)
+    p_values = []
+    I_values = []
+    nttrials = len(test_trials)   # number of trials
+    lsi_tt = np.zeros((nttrials,1))*np.nan   # preallocate latency matrix
+    for latency in latencies:
+        min_spike_times = []
+        for j, trial in enumerate(test_trials):   # loop through trials
+            mask = (trial < latency + winsize.magnitude) & (trial > latency)
+            spikes_in_win = trial[mask]
+            if len(spikes_in_win) > 0:
+                min_spike_times.append(spikes_in_win.min().magnitude - latency)   # latency from window
+            else:
+                min_spike_times.append(- binsize / 2)   # 0 if no spike in the window
+        hlsi[:, nwins - 1], _ = np.histogram(min_spike_times, bins)   # latency histogram
+        nhlsi[:, nwins - 1] = hlsi[:, nwins - 1] / sum(hlsi[:, nwins - 1])   # normalized latency histogram
+        # JS-divergence
+        kn = nwins   # number of all windows (nwins baseline win. + 1 test win.)
+        jsd = np.zeros((kn, kn)) * np.nan
+        for k1 in range(kn):
+            D1 = nhlsi[:, k1]  # 1st latency histogram
+            for k2 in range(k1+1, kn):
+                D2 = nhlsi[:, k2]   # 2nd latency histogram
+                jsd[k1, k2] = np.sqrt(JSdiv(D1, D2) * 2)  # pairwise modified JS-divergence (real metric!)
+
+        # Calculate p-value and information difference
+        p, I = makep(jsd, kn)
+        p_values.append(p)
+        I_values.append(I)
+    return latencies * pq.s, p_values, I_values
+
+
+def make_salt_trials(rate, stim_rate, N_trials=100, seed=12345):
+    from exana.stimulus import generate_salt_trials
+    from exana.misc import concatenate_spiketrains
+    from elephant.spike_train_generation import homogeneous_poisson_process as hpp
+    np.random.seed(seed)
+    stim_duration = 100 * pq.ms
+    stim_start = 1000 * pq.ms
+    stim_latency = 50 * pq.ms
+    trial_duration = 1500 * pq.ms
+    trains = []
+    stim_onsets = []
+    for n in range(N_trials):
+        offset = trial_duration * n
+        stim_onsets.append(stim_start + offset)
+        trains.extend([hpp(rate=rate, t_start=offset,
+                           t_stop=stim_start + stim_latency + offset),
+                       hpp(rate=stim_rate,
+                           t_start=stim_start + stim_latency + offset,
+                           t_stop=stim_start + stim_duration + offset),
+                       hpp(rate=rate, t_start=stim_start + stim_duration + offset,
+                           t_stop=trial_duration + offset)])
+    spike_train = concatenate_spiketrains(trains)
+    epoch = neo.Epoch(
+        times=np.array(stim_onsets) * pq.ms,
+        durations=np.array([stim_duration] * len(stim_onsets)) * pq.ms)
+    return generate_salt_trials(spike_train, epoch)
+
+
+@pytest.mark.parametrize('rate,stim_rate', [(2 * pq.Hz, 8 * pq.Hz),
+                                            (8 * pq.Hz, 0 * pq.Hz),
+                                            (30 * pq.Hz, 30 * pq.Hz)])
+@pytest.mark.parametrize('winsize,latency_step', [(0.01 * pq.s, 0.01 * pq.s),
+                                                  (0.02 * pq.s, 5 * pq.ms)])
+def test_salt_matches_reference(rate, stim_rate, winsize, latency_step):
+    from exana.stimulus import salt
+    baseline_trials, test_trials = make_salt_trials(rate, stim_rate, N_trials=30)
+    latencies, p_values, I_values = salt(baseline_trials, test_trials,
+                                         winsize=winsize,
+                                         latency_step=latency_step)
+    expected = _salt_reference(baseline_trials, test_trials, winsize=winsize,
+                               latency_step=latency_step)
+    assert np.array_equal(latencies, expected[0])
+    assert np.array_equal(p_values, expected[1])
+    assert np.array_equal(I_values, expected[2])
+
+
+def test_salt_units():
+    from exana.stimulus import salt, salt_units
+    trials = [make_salt_trials(2 * pq.Hz, 8 * pq.Hz, N_trials=20, seed=seed)
+              for seed in range(3)]
+    expected = [salt(*unit_trials) for unit_trials in trials]
+    for processes in [None, 2]:
+        results = salt_units(trials, processes=processes)
+        assert len(results) == len(trials)
+        for result, expected_result in zip(results, expected):
+            for values, expected_values in zip(result, expected_result):
+                assert np.array_equal(values, expected_values)
+
+
 if __name__ == '__main__':
     import matplotlib
     matplotlib.use('Qt5Agg')
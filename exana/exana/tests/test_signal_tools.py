@@ -0,0 +1,277 @@
+import pytest
+import numpy as np
+import quantities as pq
+import neo
+import scipy.signal as ss
+
+
+def make_signals(nchannels=6, nsamples=60000, dtype='float64'):
+    rng = np.random.RandomState(0)
+    return rng.randn(nchannels, nsamples).astype(dtype)
+
+
+def make_memmap(tmpdir, anas):
+    # klusta layout, samples x channels on disk
+    filename = str(tmpdir.join('signals.dat'))
+    anas.T.astype('float32').tofile(filename)
+    return np.memmap(filename, dtype='float32', mode='r+',
+                     shape=anas.shape[::-1]).T
+
+
+@pytest.mark.parametrize('parallel', [False, True])
+@pytest.mark.parametrize('filter_type,freq', [('bandpass', [300, 6000]),
+                                              ('lowpass', 300),
+                                              ('highpass', 10)])
+def test_filter_analog_signals_chunked(filter_type, freq, parallel):
+    from exana.misc.signal_tools import filter_analog_signals
+    anas = make_signals()
+    b, a = ss.butter(3, np.array(freq) / 15000., btype=filter_type)
+    sos = ss.butter(3, np.array(freq) / 15000., btype=filter_type, output='sos')
+    filtfilt = ss.sosfiltfilt(sos, anas, axis=1, padlen=3 * max(len(a), len(b)))
+    lfilter = ss.sosfilt(sos, anas, axis=1)
+    result = filter_analog_signals(anas, freq, 30000., filter_type=filter_type,
+                                   parallel=parallel, nprocesses=4,
+                                   chunksize=5000)
+    assert result is not anas
+    assert np.allclose(result, filtfilt, rtol=0, atol=1e-10)
+    result = filter_analog_signals(anas, freq, 30000., filter_type=filter_type,
+                                   filter_function='lfilter',
+                                   parallel=parallel, nprocesses=4,
+                                   chunksize=5000)
+    assert np.allclose(result, lfilter, rtol=0, atol=1e-10)
+
+
+def test_filter_analog_signals_matches_filtfilt():
+    from exana.misc.signal_tools import filter_analog_signals
+    anas = make_signals(nchannels=2)
+    b, a = ss.butter(3, np.array([300, 6000]) / 15000., btype='bandpass')
+    result = filter_analog_signals(anas, [300, 6000], 30000., chunksize=5000)
+    assert np.allclose(result, ss.filtfilt(b, a, anas, axis=1), rtol=0, atol=1e-6)
+    result = filter_analog_signals(anas[0], [300, 6000], 30000., chunksize=5000)
+    assert result.shape == anas[0].shape
+    assert np.allclose(result, ss.filtfilt(b, a, anas[0]), rtol=0, atol=1e-6)
+
+
+@pytest.mark.parametrize('parallel', [True, 'processes'])
+def test_filter_analog_signals_memmap_in_place(tmpdir, parallel):
+    from exana.misc.signal_tools import filter_analog_signals
+    anas = make_signals()
+    expected = filter_analog_signals(anas.astype('float32'), [300, 6000], 30000.)
+    memmap = make_memmap(tmpdir, anas)
+    result = filter_analog_signals(memmap, [300, 6000], 30000.,
+                                   copy_signal=False, parallel=parallel,
+                                   nprocesses=3, chunksize=5000)
+    assert result is memmap
+    memmap.flush()
+    on_disk = np.fromfile(str(tmpdir.join('signals.dat')), dtype='float32')
+    assert np.allclose(on_disk.reshape(anas.shape[::-1]).T, expected, atol=1e-5)
+
+    with pytest.raises(ValueError):
+        filter_analog_signals(anas.astype('int16'), [300, 6000], 30000.,
+                              copy_signal=False)
+    with pytest.raises(ValueError):
+        filter_analog_signals(anas, [300, 6000], 30000., copy_signal=False,
+                              parallel='processes', nprocesses=3)
+
+
+@pytest.mark.parametrize('car_type', ['mean', 'median'])
+def test_apply_CAR_chunked(tmpdir, car_type):
+    from exana.misc.signal_tools import apply_CAR
+    anas = make_signals()
+    reference = np.mean if car_type == 'mean' else np.median
+    float_anas = anas.astype('float32')
+    avg_ref = reference(float_anas[:4], axis=0)
+
+    result, ref = apply_CAR(anas, channels=np.arange(4), car_type=car_type,
+                            nprocesses=4, chunksize=7000)
+    assert result.dtype == np.float32
+    assert np.array_equal(ref, avg_ref)
+    assert np.array_equal(result[:4], float_anas[:4] - avg_ref)
+    assert np.array_equal(result[4:], float_anas[4:])
+
+    result, ref = apply_CAR(anas, car_type=car_type, split_probe=2,
+                            nprocesses=4, chunksize=7000)
+    assert ref.shape == (2, anas.shape[1])
+    assert np.array_equal(ref[1], reference(float_anas[2:], axis=0))
+
+    memmap = make_memmap(tmpdir, anas)
+    result, ref = apply_CAR(memmap, car_type=car_type, copy_signal=False,
+                            parallel='processes', nprocesses=3, chunksize=7000)
+    assert result is memmap
+    assert np.array_equal(ref, reference(float_anas, axis=0))
+    assert np.array_equal(memmap, float_anas - ref)
+
+
+def test_ground_bad_channels():
+    from exana.misc.signal_tools import ground_bad_channels
+    anas = make_signals()
+    result = ground_bad_channels(anas, [1, 3])
+    assert np.all(result[[1, 3]] == 0)
+    assert np.array_equal(result[[0, 2, 4, 5]], anas[[0, 2, 4, 5]])
+    assert np.all(anas[1] != 0)
+    result = ground_bad_channels(anas, 2, copy_signal=False)
+    assert result is anas
+    assert np.all(anas[2] == 0)
+
+
+def test_downsample_250():
+    from exana.misc.signal_tools import downsample_250
+    anas = make_signals(nchannels=3, nsamples=120000)
+    ana = neo.AnalogSignal(anas.T * pq.uV, sampling_rate=30 * pq.kHz)
+    low = neo.AnalogSignal(anas.T * pq.uV, sampling_rate=250 * pq.Hz)
+    result, same = downsample_250([ana, low], nprocesses=2, chunksize=10000)
+    assert same is low
+    assert result.sampling_rate == 250 * pq.Hz
+    assert result.units == pq.uV
+    expected = ss.decimate(anas, 120, zero_phase=True)
+    assert result.shape == expected.T.shape
+    assert np.allclose(result.magnitude, expected.T, rtol=0, atol=1e-10)
+
+
+def _auto_denoise_reference(anas, thresh=2.5):
+    # the original loop over time points
+    env = np.abs(ss.hilbert(anas))
+    b_smooth, a_smooth = ss.butter(4, 0.01)
+    env = ss.filtfilt(b_smooth, a_smooth, env)
+    sd = np.std(anas, axis=1)
+    noisy_idx = []
+    for i in np.arange(len(anas[0])):
+        if np.all([env[ch, i] >= thresh*sd[ch] for ch in np.arange(env.shape[0])]):
+            noisy_idx.append(i)
+    anas = anas.copy()
+    anas[:, noisy_idx] = 0
+    return anas
+
+
+def make_noisy_signals(nchannels=4, nsamples=40000):
+    anas = make_signals(nchannels, nsamples)
+    for start in [5000, 21000, 33000]:
+        anas[:, start:start + 1500] *= 8
+    return anas
+
+
+def test_auto_denoise():
+    from exana.misc.signal_tools import auto_denoise
+    anas = make_noisy_signals()
+    expected = _auto_denoise_reference(anas)
+    assert np.sum(np.all(expected == 0, axis=0)) > 3000
+    result = auto_denoise(anas)
+    assert result is not anas
+    assert np.array_equal(result, expected)
+    result = auto_denoise(anas, copy_signal=False)
+    assert result is anas
+    assert np.array_equal(anas, expected)
+
+
+@pytest.mark.parametrize('parallel', [False, True, 'processes'])
+def test_auto_denoise_chunked(tmpdir, parallel):
+    from exana.misc.signal_tools import auto_denoise
+    anas = make_noisy_signals()
+    expected = _auto_denoise_reference(anas.astype('float32'))
+    memmap = make_memmap(tmpdir, anas)
+    result = auto_denoise(memmap, copy_signal=False, chunksize=4000,
+                          parallel=parallel, nprocesses=3)
+    assert result is memmap
+    grounded = np.all(np.asarray(memmap) == 0, axis=0)
+    expected_grounded = np.all(expected == 0, axis=0)
+    # the chunked envelope may move the edges of a noisy period by a sample
+    assert np.sum(grounded != expected_grounded) <= 6
+    assert np.array_equal(np.asarray(memmap)[:, ~grounded & ~expected_grounded],
+                          expected[:, ~grounded & ~expected_grounded])
+
+
+def _remove_stimulation_artifacts_reference(anas, times, trigger, pre, post, mode):
+    # the original loop over triggers
+    anas_rem = anas.copy()
+    if mode == 'template':
+        idxs = []
+        for i, tr in enumerate(trigger):
+            idxs.append(len(np.where((times > tr - pre) & (times < tr + post))[0]))
+        min_len = np.min(idxs)
+        templates = np.zeros((anas.shape[0], len(trigger), min_len))
+        for i, tr in enumerate(trigger):
+            idx = np.where((times > tr - pre) & (times < tr + post))[0][:min_len]
+            templates[:, i, ] = np.squeeze(anas[:, idx])
+        avg_artifact = np.mean(templates, axis=1)
+        for i, tr in enumerate(trigger):
+            idx = np.where((times > tr - pre) & (times < tr + post))[0][:min_len]
+            anas_rem[:, idx] -= avg_artifact
+    else:
+        avg_artifact = []
+        for tr in trigger:
+            idx = np.where((times > tr - pre) & (times < tr + post))
+            anas_rem[:, idx] = 0
+    return anas_rem, avg_artifact
+
+
+@pytest.mark.parametrize('mode', ['zero', 'template'])
+@pytest.mark.parametrize('spacing', [20, 3])
+def test_remove_stimulation_artifacts(tmpdir, mode, spacing):
+    from exana.misc.signal_tools import remove_stimulation_artifacts
+    anas = make_signals(nsamples=30000)
+    times = np.arange(anas.shape[1]) / 10. * pq.ms
+    # closer than the artifact window for spacing 3 ms
+    trigger = (np.arange(10, 1000, spacing) + 0.03) * pq.ms
+    trigger = trigger.rescale('s')
+    expected, expected_artifact = _remove_stimulation_artifacts_reference(
+        anas, times, trigger, 3 * pq.ms, 5 * pq.ms, mode)
+    result, artifact = remove_stimulation_artifacts(
+        anas, times, trigger, mode=mode, chunksize=7)
+    assert result is not anas
+    assert np.allclose(result, expected, rtol=0, atol=1e-10)
+    assert np.allclose(artifact, expected_artifact, rtol=0, atol=1e-10)
+
+    memmap = make_memmap(tmpdir, anas)
+    result, artifact = remove_stimulation_artifacts(
+        memmap, times, list(trigger), mode=mode, copy_signal=False)
+    assert result is memmap
+    expected, _ = _remove_stimulation_artifacts_reference(
+        anas.astype('float32'), times, trigger, 3 * pq.ms, 5 * pq.ms, mode)
+    assert np.allclose(memmap, expected, rtol=0, atol=1e-4)
+
+
+class ReadOnlyArray:
+    """Array-like that cannot be modified in place, like the lazy channel
+    arrays of pyopenephys"""
+    def __init__(self, data):
+        self._data = data
+        self.shape = data.shape
+        self.dtype = data.dtype
+        self.ndim = data.ndim
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, index):
+        return self._data[index].copy()
+
+    def __array__(self, dtype=None):
+        return np.array(self._data, dtype=dtype)
+
+
+def _process(name, anas, **kwargs):
+    from exana.misc import signal_tools
+    times = np.arange(anas.shape[1]) / 10. * pq.ms
+    trigger = ((np.arange(10, 1000, 20) + 0.03) * pq.ms).rescale('s')
+    if name == 'filter_analog_signals':
+        return signal_tools.filter_analog_signals(anas, [300, 6000], 30000.,
+                                                  **kwargs)
+    if name == 'apply_CAR':
+        return signal_tools.apply_CAR(anas, **kwargs)[0]
+    if name == 'auto_denoise':
+        return signal_tools.auto_denoise(anas, **kwargs)
+    return signal_tools.remove_stimulation_artifacts(
+        anas, times, trigger, mode='template', **kwargs)[0]
+
+
+@pytest.mark.parametrize('name', ['filter_analog_signals', 'apply_CAR',
+                                  'auto_denoise', 'remove_stimulation_artifacts'])
+def test_in_place_on_array_like(name):
+    anas = make_noisy_signals(nsamples=30000)
+    expected = _process(name, anas.copy())
+    array_like = ReadOnlyArray(anas.copy())
+    # the result is returned rather than lost in a temporary copy
+    result = _process(name, array_like, copy_signal=False)
+    assert result is not array_like
+    assert np.allclose(result, expected, rtol=0, atol=1e-6)
+    assert np.array_equal(np.asarray(array_like), anas)
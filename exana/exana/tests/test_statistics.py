@@ -0,0 +1,119 @@
+import pytest
+import numpy as np
+import quantities as pq
+
+
+def make_units(n_units=6, seed=0):
+    rng = np.random.RandomState(seed)
+    times, ids = [], []
+    for i in range(n_units):
+        # different sizes, so that correlogram swaps some of the pairs
+        t = np.sort(rng.uniform(0, 20, rng.randint(50, 400)))
+        # spikes on a 1 ms grid hit the bin edges
+        t[::5] = np.round(t[::5], 3)
+        times.append(t)
+        ids.append(np.full(len(t), 10 * i))
+    times.append(times[0][:20] + 0.004)
+    ids.append(np.full(20, 10 * n_units))
+    return times, np.concatenate(times), np.concatenate(ids)
+
+
+@pytest.mark.parametrize('processes', [None, 3])
+def test_correlograms(processes):
+    from exana.statistics.tools import correlogram, correlograms
+    sptrs, times, ids = make_units()
+    rng = np.random.RandomState(1)
+    shuffle = rng.permutation(len(times))
+    count, bins = correlograms(times[shuffle], ids[shuffle], bin_width=.001,
+                               limit=.02, processes=processes)
+    assert count.shape == (len(sptrs), len(sptrs), len(bins) - 1)
+    for i, t1 in enumerate(sptrs):
+        for j, t2 in enumerate(sptrs):
+            expected, expected_bins = correlogram(t1, t2, bin_width=.001,
+                                                  limit=.02, auto=i == j)
+            assert np.array_equal(bins, expected_bins)
+            assert np.array_equal(count[i, j], expected)
+
+
+def test_correlograms_memory_blocks():
+    from exana.statistics.tools import (correlogram, _correlogram_rows,
+                                        correlograms)
+    sptrs, times, ids = make_units()
+    order = np.argsort(times, kind='mergesort')
+    codes = np.unique(ids, return_inverse=True)[1]
+    bins = np.arange(-.05, .05 + .002, .002)
+    rows = _correlogram_rows(times[order], codes[order], np.arange(2),
+                             len(sptrs), bins, .05, max_pairs=100)
+    assert np.array_equal(rows, _correlogram_rows(
+        times[order], codes[order], np.arange(2), len(sptrs), bins, .05))
+    expected, _ = correlogram(sptrs[0], sptrs[0], bin_width=.002, limit=.05,
+                              auto=True)
+    assert np.array_equal(rows[0, 0], expected)
+    count, _ = correlograms(times * pq.s, ids, bin_width=2 * pq.ms,
+                            limit=50 * pq.ms)
+    assert np.array_equal(count[0, 0], expected)
+
+
+def _bootstrap_reference(data, num_samples, statistic, alpha):
+    # the original implementation with one dense matrix of indices
+    n = len(data)
+    idx = np.random.randint(0, n, (num_samples, n))
+    stat = np.sort(statistic(data[idx], axis=1))
+    return (stat[int((alpha / 2.0) * num_samples)],
+            stat[int((1 - alpha / 2.0) * num_samples)])
+
+
+def test_bootstrap_batches():
+    from exana.statistics.tools import bootstrap
+    rng = np.random.RandomState(0)
+    x = np.concatenate([rng.normal(3, 1, 100), rng.normal(6, 2, 200)])
+    np.random.seed(12345)
+    expected = _bootstrap_reference(x, 5000, np.median, 0.05)
+    np.random.seed(12345)
+    assert bootstrap(x, 5000, np.median, batch_size=700) == expected
+
+    ci = bootstrap(x, 5000, np.median, batch_size=700, seed=1)
+    assert ci == bootstrap(x, 5000, np.median, batch_size=700, seed=1,
+                           processes=3)
+    assert ci != bootstrap(x, 5000, np.median, batch_size=700, seed=2)
+    assert np.allclose(ci, expected, atol=0.1)
+
+
+def _permutation_resampling_reference(case, control, num_samples):
+    # the original loop over permutations
+    observed_diff = abs(np.mean(case) - np.mean(control))
+    num_case = len(case)
+    combined = np.concatenate([case, control])
+    diffs = []
+    for i in range(num_samples):
+        xs = np.random.permutation(combined)
+        diffs.append(np.mean(xs[:num_case]) - np.mean(xs[num_case:]))
+    pval = (np.sum(diffs > observed_diff) +
+            np.sum(diffs < -observed_diff))/float(num_samples)
+    return pval, observed_diff, diffs
+
+
+def test_permutation_resampling_batches():
+    from exana.statistics.tools import permutation_resampling
+    case = [94, 38, 23, 197, 99, 16, 141]
+    control = [52, 10, 40, 104, 51, 27, 146, 30, 46]
+    np.random.seed(12345)
+    expected = _permutation_resampling_reference(case, control, 20000)
+    pval, observed_diff, diffs = permutation_resampling(
+        case, control, 20000, batch_size=3000, seed=1)
+    assert observed_diff == expected[1]
+    assert len(diffs) == 20000
+    assert abs(pval - expected[0]) < 0.02
+    assert np.allclose(np.sort(diffs)[[2000, 10000, 18000]],
+                       np.sort(expected[2])[[2000, 10000, 18000]], atol=3)
+    result = permutation_resampling(case, control, 20000, batch_size=3000,
+                                    seed=1, processes=3)
+    assert result[0] == pval
+    assert np.array_equal(result[2], diffs)
+
+    pval, observed_diff, diffs = permutation_resampling(
+        case, control, 2000, statistic=np.median, seed=1)
+    assert observed_diff == abs(np.median(case) - np.median(control))
+    # medians of 7 and 9 of the values, so both are values of the data
+    combined = case + control
+    assert np.all(np.isin(diffs, np.subtract.outer(combined, combined)))
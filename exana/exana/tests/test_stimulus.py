@@ -170,3 +170,79 @@ def test_rescale_orients():
         assert((t == st).all())
         assert(t.t_start == st.t_start)
         assert(t.t_stop == st.t_stop)
+
+
+def _make_spiketrain_trials_reference(sptr, epoch, t_start, t_stop):
+    # the original loop over epochs
+    from neo.core import SpikeTrain
+    trials = []
+    for j, t in enumerate(epoch.times.rescale('s')):
+        spikes = []
+        for spike in sptr[(t+t_start < sptr) & (sptr < t+t_stop)]:
+            spikes.append(spike-t)
+        trials.append(SpikeTrain(times=spikes * pq.s,
+                                 t_start=t_start,
+                                 t_stop=t_stop))
+    return trials
+
+
+def make_trial_epoch(n_trials=50, seed=0):
+    import neo
+    rng = np.random.RandomState(seed)
+    times = np.cumsum(rng.uniform(1, 2, n_trials)) * pq.s
+    return neo.Epoch(times=times, durations=np.ones(n_trials) * 0.5 * pq.s)
+
+
+def test_make_spiketrain_trials():
+    import neo
+    from exana.stimulus.tools import make_spiketrain_trials
+    rng = np.random.RandomState(1)
+    epoch = make_trial_epoch()
+    t_stop = epoch.times[-1] + 3 * pq.s
+    sptr = neo.SpikeTrain(times=np.sort(rng.uniform(0, t_stop.magnitude, 2000)) * pq.s,
+                          t_stop=t_stop)
+    expected = _make_spiketrain_trials_reference(sptr.times, epoch,
+                                                 -0.2 * pq.s, 0.5 * pq.s)
+    for spike_train in [sptr, sptr.times.rescale('ms'), sptr.magnitude]:
+        trials = make_spiketrain_trials(spike_train, epoch, t_start=-0.2 * pq.s)
+        assert len(trials) == len(expected)
+        for trial, exp in zip(trials, expected):
+            assert np.allclose(trial.times.rescale('s').magnitude,
+                               exp.times.magnitude, rtol=0, atol=1e-12)
+            assert trial.t_start == exp.t_start
+            assert trial.t_stop == exp.t_stop
+
+    times, offsets = make_spiketrain_trials(sptr, epoch, t_start=-0.2 * pq.s,
+                                            ragged=True)
+    assert times.units == pq.s
+    assert len(offsets) == len(expected) + 1
+    for j, exp in enumerate(expected):
+        assert np.array_equal(times[offsets[j]:offsets[j + 1]].magnitude,
+                              exp.times.magnitude)
+
+    unit = neo.Unit()
+    unit.spiketrains = [sptr[::2], sptr[1::2]]
+    trials = make_spiketrain_trials(unit, epoch, t_start=-0.2 * pq.s)
+    for trial, exp in zip(trials, expected):
+        assert np.array_equal(trial.magnitude, exp.magnitude)
+
+
+def test_make_analog_trials():
+    import neo
+    from exana.stimulus.tools import make_analog_trials
+    epoch = make_trial_epoch(n_trials=20)
+    rng = np.random.RandomState(2)
+    ana = neo.AnalogSignal(rng.randn(int(epoch.times[-1] * 1000) + 2000, 2) * pq.mV,
+                           sampling_rate=1 * pq.kHz)
+    t_start, t_stop = -100 * pq.ms, 0.3 * pq.s
+    nsamp = int(abs(t_start - t_stop) * ana.sampling_rate) - 1
+    trials = make_analog_trials(ana, epoch, t_start, t_stop)
+    assert len(trials) == len(epoch)
+    for trial, t in zip(trials, epoch.times):
+        mask = (t + t_start <= ana.times) & (ana.times <= t + t_stop)
+        expected = ana.magnitude[mask, :][:nsamp]
+        assert trial.shape == expected.shape
+        assert np.array_equal(trial.magnitude, expected)
+        assert trial.units == ana.units
+        assert trial.sampling_rate == ana.sampling_rate
+        assert np.shares_memory(trial.magnitude, ana.magnitude)
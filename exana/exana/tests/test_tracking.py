@@ -254,3 +254,63 @@ def test_nvisits_map():
     nvisits_map_expected = np.array([[2, 1],
                                      [1, 2]])
     assert np.array_equal(nvisits_map, nvisits_map_expected)
+
+
+def _spatial_rate_map_reference(x, y, t, sptr, binsize, box_xlen, box_ylen):
+    # the original loop over tracking samples, without smoothing and masking
+    import quantities as pq
+    t_ = np.array(t.tolist() + [t.max() + np.median(np.diff(t))]) * pq.s
+    spikes_in_bin, _ = np.histogram(sptr.times.rescale('s'), t_)
+    time_in_bin = np.diff(t_.magnitude)
+    xbins = np.arange(0, box_xlen + binsize, binsize)
+    ybins = np.arange(0, box_ylen + binsize, binsize)
+    ix = np.digitize(x, xbins, right=True)
+    iy = np.digitize(y, ybins, right=True)
+    spike_pos = np.zeros((xbins.size, ybins.size))
+    time_pos = np.zeros((xbins.size, ybins.size))
+    for n in range(len(x)):
+        spike_pos[ix[n], iy[n]] += spikes_in_bin[n]
+        time_pos[ix[n], iy[n]] += time_in_bin[n]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.divide(spike_pos[1:, 1:], time_pos[1:, 1:])
+    return rate.T, time_pos[1:, 1:].T
+
+
+def random_walk(N=5000, seed=0):
+    import quantities as pq
+    rng = np.random.RandomState(seed)
+    x = np.clip(0.5 + np.cumsum(rng.randn(N)) * 0.01, 0, 1) * pq.m
+    y = np.clip(0.5 + np.cumsum(rng.randn(N)) * 0.01, 0, 1) * pq.m
+    t = np.arange(N) / 50. * pq.s
+    return x, y, t
+
+
+def test_spatial_rate_maps():
+    import quantities as pq
+    import neo
+    from exana.tracking.fields import spatial_rate_maps, spatial_rate_map
+    x, y, t = random_walk()
+    rng = np.random.RandomState(1)
+    sptrs = [neo.SpikeTrain(times=np.sort(rng.uniform(0, 100, n)) * pq.s,
+                            t_stop=100 * pq.s)
+             for n in [0, 10, 500, 3000]]
+    # spike times in ms and exactly at the last time edge
+    sptrs.append(neo.SpikeTrain(times=[0, 5000, 99980, 100000] * pq.ms,
+                                t_stop=100 * pq.s))
+    rate_maps, xbins, ybins = spatial_rate_maps(
+        x, y, t, sptrs, binsize=0.05 * pq.m, mask_unvisited=True,
+        convolve=False, return_bins=True)
+    assert rate_maps.shape == (len(sptrs), 20, 20)
+    for sptr, rate_map in zip(sptrs, rate_maps):
+        expected, time_pos = _spatial_rate_map_reference(
+            x.magnitude, y.magnitude, t, sptr, 0.05, 1., 1.)
+        expected[time_pos == 0] = np.nan
+        assert np.allclose(rate_map, expected, equal_nan=True)
+        rate_map_single = spatial_rate_map(x, y, t, sptr, binsize=0.05 * pq.m,
+                                           convolve=False)
+        assert np.array_equal(rate_map, rate_map_single, equal_nan=True)
+
+    rate_maps = spatial_rate_maps(x, y, t, sptrs[1:3], binsize=0.05 * pq.m)
+    assert rate_maps.shape == (2, 20, 20)
+    assert spatial_rate_maps(x, y, t, [], binsize=0.05 * pq.m,
+                             convolve=False).shape == (0, 20, 20)
@@ -1,4 +1,4 @@
-from .fields import gridness, spatial_rate_map, occupancy_map
+from .fields import gridness, gridness_scores, spatial_rate_map, spatial_rate_maps, occupancy_map
 from .plot import (plot_path, plot_head_direction_rate, plot_ratemap, plot_occupancy)
 from .stats import (sparsity, selectivity, information_rate,
                     information_specificity, prob_dist)
@@ -2,6 +2,69 @@ import numpy as np
 import quantities as pq
 
 
+def _path_bins(x, y, t, binsize, box_xlen, box_ylen):
+    """Check the path and return times in s, the bin edges in m and the
+    flat index of the (xbins.size, ybins.size) bin at each position."""
+    from exana.misc.tools import is_quantities
+    if not all([len(var) == len(var2) for var in [x,y,t] for var2 in [x,y,t]]):
+        raise ValueError('x, y, t must have same number of elements')
+    if box_xlen < x.max() or box_ylen < y.max():
+        raise ValueError('box length must be larger or equal to max path length')
+    from decimal import Decimal as dec
+    decimals = 1e10
+    remainderx = dec(float(box_xlen)*decimals) % dec(float(binsize)*decimals)
+    remaindery = dec(float(box_ylen)*decimals) % dec(float(binsize)*decimals)
+    if remainderx != 0 or remaindery != 0:
+        raise ValueError('the remainder should be zero i.e. the ' +
+                                     'box length should be an exact multiple ' +
+                                     'of the binsize')
+    is_quantities([x, y, t], 'vector')
+    is_quantities(binsize, 'scalar')
+    t = t.rescale('s').magnitude
+    box_xlen = box_xlen.rescale('m').magnitude
+    box_ylen = box_ylen.rescale('m').magnitude
+    binsize = binsize.rescale('m').magnitude
+    x = x.rescale('m').magnitude
+    y = y.rescale('m').magnitude
+
+    xbins = np.arange(0, box_xlen + binsize, binsize)
+    ybins = np.arange(0, box_ylen + binsize, binsize)
+    ix = np.digitize(x, xbins, right=True)
+    iy = np.digitize(y, ybins, right=True)
+    return t, xbins, ybins, ix * ybins.size + iy
+
+
+def _time_edges(t):
+    """Tracking times with one extra interpolated timepoint, the edges of
+    the time bin of each position."""
+    return np.append(t, t.max() + np.median(np.diff(t)))
+
+
+def _spikes_in_bins(sptrs, t_, pos, nbins):
+    """
+    Count the spikes of each spike train in each spatial bin.
+    A spike is assigned to the position of its time bin in t_, as with
+    np.histogram, and all spike trains are counted with a single bincount.
+    """
+    times = [np.asarray(sptr.times.rescale('s').magnitude) for sptr in sptrs]
+    units = np.repeat(np.arange(len(times)), [len(st) for st in times])
+    times = np.concatenate(times) if len(times) > 0 else np.zeros(0)
+    idx = np.searchsorted(t_, times, side='right') - 1
+    # the last bin of np.histogram includes its right edge
+    idx[times == t_[-1]] = len(t_) - 2
+    inside = (idx >= 0) & (idx < len(t_) - 1)
+    counts = np.bincount(units[inside] * nbins + pos[idx[inside]],
+                         minlength=len(sptrs) * nbins)
+    return counts.reshape(len(sptrs), nbins).astype(float)
+
+
+def _smooth(rate, box_xlen, binsize, smoothing):
+    from astropy.convolution import Gaussian2DKernel, convolve_fft
+    csize = (box_xlen / binsize) * smoothing
+    kernel = Gaussian2DKernel(csize)
+    return convolve_fft(rate, kernel)  # TODO edge correction
+
+
 def spatial_rate_map(x, y, t, sptr, binsize=0.01*pq.m, box_xlen=1*pq.m,
                      box_ylen=1*pq.m, mask_unvisited=True, convolve=True,
                      return_bins=False, smoothing=0.02):
@@ -34,59 +97,95 @@ def spatial_rate_map(x, y, t, sptr, binsize=0.01*pq.m, box_xlen=1*pq.m,
     if return_bins = True
     out : rate map, xbins, ybins
     """
-    from exana.misc.tools import is_quantities
-    if not all([len(var) == len(var2) for var in [x,y,t] for var2 in [x,y,t]]):
-        raise ValueError('x, y, t must have same number of elements')
-    if box_xlen < x.max() or box_ylen < y.max():
-        raise ValueError('box length must be larger or equal to max path length')
-    from decimal import Decimal as dec
-    decimals = 1e10
-    remainderx = dec(float(box_xlen)*decimals) % dec(float(binsize)*decimals)
-    remaindery = dec(float(box_ylen)*decimals) % dec(float(binsize)*decimals)
-    if remainderx != 0 or remaindery != 0:
-        raise ValueError('the remainder should be zero i.e. the ' +
-                                     'box length should be an exact multiple ' +
-                                     'of the binsize')
-    is_quantities([x, y, t], 'vector')
-    is_quantities(binsize, 'scalar')
-    t = t.rescale('s')
+    out = spatial_rate_maps(x, y, t, [sptr], binsize=binsize,
+                            box_xlen=box_xlen, box_ylen=box_ylen,
+                            mask_unvisited=mask_unvisited, convolve=convolve,
+                            return_bins=return_bins, smoothing=smoothing)
+    if return_bins:
+        return out[0][0], out[1], out[2]
+    else:
+        return out[0]
+
+
+def spatial_rate_maps(x, y, t, sptrs, binsize=0.01*pq.m, box_xlen=1*pq.m,
+                      box_ylen=1*pq.m, mask_unvisited=True, convolve=True,
+                      return_bins=False, smoothing=0.02):
+    """Rate maps of many spike trains recorded along the same path, see
+    spatial_rate_map. The time spent in each bin is computed once and the
+    spikes of all spike trains are binned together.
+
+    Parameters
+    ----------
+    sptrs : list of neo.SpikeTrain
+    x : quantities.Quantity array in m
+        1d vector of x positions
+    y : quantities.Quantity array in m
+        1d vector of y positions
+    t : quantities.Quantity array in s
+        1d vector of times at x, y positions
+    binsize : float
+        spatial binsize
+    box_xlen : quantities scalar in m
+        side length of quadratic box
+    mask_unvisited: bool
+        mask bins which has not been visited by nans
+    convolve : bool
+        convolve the rate maps with a 2D Gaussian kernel
+
+    Returns
+    -------
+    out : rate maps, numpy.ndarray with shape (len(sptrs), ny, nx)
+    if return_bins = True
+    out : rate maps, xbins, ybins
+    """
+    t, xbins, ybins, pos = _path_bins(x, y, t, binsize, box_xlen, box_ylen)
     box_xlen = box_xlen.rescale('m').magnitude
-    box_ylen = box_ylen.rescale('m').magnitude
     binsize = binsize.rescale('m').magnitude
-    x = x.rescale('m').magnitude
-    y = y.rescale('m').magnitude
+    shape = (xbins.size, ybins.size)
+    nbins = xbins.size * ybins.size
 
-    # interpolate one extra timepoint
-    t_ = np.array(t.tolist() + [t.max() + np.median(np.diff(t))]) * pq.s
-    spikes_in_bin, _ = np.histogram(sptr.times, t_)
-    time_in_bin = np.diff(t_.magnitude)
-    xbins = np.arange(0, box_xlen + binsize, binsize)
-    ybins = np.arange(0, box_ylen + binsize, binsize)
-    ix = np.digitize(x, xbins, right=True)
-    iy = np.digitize(y, ybins, right=True)
-    spike_pos = np.zeros((xbins.size, ybins.size))
-    time_pos = np.zeros((xbins.size, ybins.size))
-    for n in range(len(x)):
-        spike_pos[ix[n], iy[n]] += spikes_in_bin[n]
-        time_pos[ix[n], iy[n]] += time_in_bin[n]
+    t_ = _time_edges(t)
+    time_in_bin = np.diff(t_)
+    time_pos = np.bincount(pos, weights=time_in_bin, minlength=nbins)
+    spike_pos = _spikes_in_bins(sptrs, t_, pos, nbins)
     # correct for shifting of map
-    spike_pos = spike_pos[1:, 1:]
-    time_pos = time_pos[1:, 1:]
+    spike_pos = spike_pos.reshape((len(sptrs),) + shape)[:, 1:, 1:]
+    time_pos = time_pos.reshape(shape)[1:, 1:]
     with np.errstate(divide='ignore', invalid='ignore'):
         rate = np.divide(spike_pos, time_pos)
     if convolve:
         rate[np.isnan(rate)] = 0.  # for convolution
-        from astropy.convolution import Gaussian2DKernel, convolve_fft
-        csize = (box_xlen / binsize) * smoothing
-        kernel = Gaussian2DKernel(csize)
-        rate = convolve_fft(rate, kernel)  # TODO edge correction
+        rate = np.array([_smooth(r, box_xlen, binsize, smoothing) for r in rate])
+        rate = rate.reshape(spike_pos.shape)
     if mask_unvisited:
         was_in_bin = np.asarray(time_pos, dtype=bool)
-        rate[np.invert(was_in_bin)] = np.nan
+        rate[:, np.invert(was_in_bin)] = np.nan
+    rate = rate.transpose(0, 2, 1)
     if return_bins:
-        return rate.T, xbins, ybins
+        return rate, xbins, ybins
     else:
-        return rate.T
+        return rate
+
+
+def _annulus_corrcoef(acorr, rotated, annuli):
+    """Correlation coefficients between acorr and each rotated map within
+    each annulus, computed from masked sums. Returns an array of shape
+    (len(annuli), len(rotated))."""
+    masks = annuli.reshape(len(annuli), -1).astype(float)
+    x = acorr.ravel() - acorr.mean()
+    y = rotated.reshape(len(rotated), -1)
+    y = y - y.mean(axis=1)[:, np.newaxis]
+    n = masks.sum(axis=1)[:, np.newaxis]
+    sx = masks.dot(x)[:, np.newaxis]
+    sxx = masks.dot(x**2)[:, np.newaxis]
+    sy = masks.dot(y.T)
+    syy = masks.dot((y**2).T)
+    sxy = masks.dot((x * y).T)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx**2 / n
+        var_y = syy - sy**2 / n
+        return cov / np.sqrt(var_x * var_y)
 
 
 def gridness(rate_map, box_xlen, box_ylen, return_acorr=False,
@@ -117,10 +216,8 @@ def gridness(rate_map, box_xlen, box_ylen, return_acorr=False,
     -------
     out : gridness, (autocorrelation map)
     '''
-    from scipy.ndimage.interpolation import rotate
-    import numpy.ma as ma
-    from exana.misc.tools import (is_quantities, fftcorrelate2d,
-                                            masked_corrcoef2d)
+    from scipy.ndimage import rotate
+    from exana.misc.tools import is_quantities, fftcorrelate2d
     is_quantities([box_xlen, box_ylen, step_size], 'scalar')
     box_xlen = box_xlen.rescale('m').magnitude
     box_ylen = box_ylen.rescale('m').magnitude
@@ -132,30 +229,57 @@ def gridness(rate_map, box_xlen, box_ylen, return_acorr=False,
     b_x = np.linspace(-box_xlen/2., box_xlen/2., rows)
     b_y = np.linspace(-box_ylen/2., box_ylen/2., cols)
     B_x, B_y = np.meshgrid(b_x, b_y)
-    grids = []
-    acorrs = []
+    radius = np.sqrt(B_x**2 + B_y**2)
     # TODO find size of middle gaussian and exclude
-    for outer in np.arange(box_xlen/4, box_xlen/2, step_size):
-        m_acorr = ma.masked_array(acorr, mask=np.sqrt(B_x**2 + B_y**2) > outer)
-        for inner in np.arange(0, box_xlen/4, step_size):
-            m_acorr = \
-                ma.masked_array(m_acorr, mask=np.sqrt(B_x**2 + B_y**2) < inner)
-            angles = range(30, 180+30, 30)
-            corr = []
-            # Rotate and compute correlation coefficient
-            for angle in angles:
-                rot_acorr = rotate(m_acorr, angle, reshape=False)
-                corr.append(masked_corrcoef2d(rot_acorr, m_acorr)[0, 1])
-            r60 = corr[1::2]
-            r30 = corr[::2]
-            grids.append(np.min(r60) - np.max(r30))
-            acorrs.append(m_acorr)
+    annuli = np.array([
+        (radius <= outer) & (radius >= inner)
+        for outer in np.arange(box_xlen/4, box_xlen/2, step_size)
+        for inner in np.arange(0, box_xlen/4, step_size)
+    ])
+    # Rotate once, the rotation does not depend on the masks
+    angles = range(30, 180+30, 30)
+    rotated = np.array([rotate(acorr, angle, reshape=False) for angle in angles])
+    corr = _annulus_corrcoef(acorr, rotated, annuli)
+    r60 = corr[:, 1::2]
+    r30 = corr[:, ::2]
+    grids = list(np.min(r60, axis=1) - np.max(r30, axis=1))
     if return_acorr:
         return max(grids), acorr,  # acorrs[grids.index(max(grids))]
     else:
         return max(grids)
 
 
+def gridness_scores(rate_maps, box_xlen, box_ylen, step_size=0.1*pq.m,
+                    processes=None):
+    '''Gridness of many rate maps, see gridness. With processes > 1, the
+    rate maps are scored in parallel.
+
+    Parameters
+    ----------
+    rate_maps : numpy.ndarray with shape (n, ny, nx) or list of rate maps
+    box_xlen : quantities scalar in m
+        side length of quadratic box
+    step_size : quantities scalar in m
+        step size in masking
+    processes : int
+        number of processes
+
+    Returns
+    -------
+    out : numpy.ndarray of gridness scores
+    '''
+    from functools import partial
+    score = partial(gridness, box_xlen=box_xlen, box_ylen=box_ylen,
+                    step_size=step_size)
+    if processes is not None and processes > 1 and len(rate_maps) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        chunksize = max(1, len(rate_maps) // (4 * processes))
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            return np.array(list(executor.map(score, rate_maps,
+                                              chunksize=chunksize)))
+    return np.array([score(rate_map) for rate_map in rate_maps])
+
+
 def occupancy_map(x, y, t,
                   binsize=0.01*pq.m,
                   box_xlen=1*pq.m,
@@ -192,47 +316,18 @@ def occupancy_map(x, y, t,
     out : occupancy_map, xbins, ybins
     '''
 
-    from exana.misc.tools import is_quantities
-    if not all([len(var) == len(var2) for var in [
-            x, y, t] for var2 in [x, y, t]]):
-        raise ValueError('x, y, t must have same number of elements')
-    if box_xlen < x.max() or box_ylen < y.max():
-        raise ValueError(
-            'box length must be larger or equal to max path length')
-    from decimal import Decimal as dec
-    decimals = 1e10
-    remainderx = dec(float(box_xlen)*decimals) % dec(float(binsize)*decimals)
-    remaindery = dec(float(box_ylen)*decimals) % dec(float(binsize)*decimals)
-    if remainderx != 0 or remaindery != 0:
-        raise ValueError('the remainder should be zero i.e. the ' +
-                         'box length should be an exact multiple ' +
-                         'of the binsize')
-    is_quantities([x, y, t], 'vector')
-    is_quantities(binsize, 'scalar')
-    t = t.rescale('s')
+    t, xbins, ybins, pos = _path_bins(x, y, t, binsize, box_xlen, box_ylen)
     box_xlen = box_xlen.rescale('m').magnitude
-    box_ylen = box_ylen.rescale('m').magnitude
     binsize = binsize.rescale('m').magnitude
-    x = x.rescale('m').magnitude
-    y = y.rescale('m').magnitude
 
-    # interpolate one extra timepoint
-    t_ = np.array(t.tolist() + [t.max() + np.median(np.diff(t))]) * pq.s
-    time_in_bin = np.diff(t_.magnitude)
-    xbins = np.arange(0, box_xlen + binsize, binsize)
-    ybins = np.arange(0, box_ylen + binsize, binsize)
-    ix = np.digitize(x, xbins, right=True)
-    iy = np.digitize(y, ybins, right=True)
-    time_pos = np.zeros((xbins.size, ybins.size))
-    for n in range(len(x)):
-        time_pos[ix[n], iy[n]] += time_in_bin[n]
+    time_in_bin = np.diff(_time_edges(t))
+    time_pos = np.bincount(pos, weights=time_in_bin,
+                           minlength=xbins.size * ybins.size)
+    time_pos = time_pos.reshape(xbins.size, ybins.size)
     # correct for shifting of map since digitize returns values at right edges
     time_pos = time_pos[1:, 1:]
     if convolve:
-        from astropy.convolution import Gaussian2DKernel, convolve_fft
-        csize = (box_xlen / binsize) * smoothing
-        kernel = Gaussian2DKernel(csize)
-        time_pos = convolve_fft(time_pos, kernel)  # TODO edge correction
+        time_pos = _smooth(time_pos, box_xlen, binsize, smoothing)
     if return_bins:
         return time_pos.T, xbins, ybins
     else:
@@ -270,41 +365,13 @@ def nvisits_map(x, y, t,
     out : nvisits_map, xbins, ybins
     '''
 
-    from exana.misc.tools import is_quantities
-    if not all([len(var) == len(var2) for var in [
-            x, y, t] for var2 in [x, y, t]]):
-        raise ValueError('x, y, t must have same number of elements')
-    if box_xlen < x.max() or box_ylen < y.max():
-        raise ValueError(
-            'box length must be larger or equal to max path length')
-    from decimal import Decimal as dec
-    decimals = 1e10
-    remainderx = dec(float(box_xlen)*decimals) % dec(float(binsize)*decimals)
-    remaindery = dec(float(box_ylen)*decimals) % dec(float(binsize)*decimals)
-    if remainderx != 0 or remaindery != 0:
-        raise ValueError('the remainder should be zero i.e. the ' +
-                         'box length should be an exact multiple ' +
-                         'of the binsize')
-    is_quantities([x, y, t], 'vector')
-    is_quantities(binsize, 'scalar')
-    t = t.rescale('s')
-    box_xlen = box_xlen.rescale('m').magnitude
-    box_ylen = box_ylen.rescale('m').magnitude
-    binsize = binsize.rescale('m').magnitude
-    x = x.rescale('m').magnitude
-    y = y.rescale('m').magnitude
+    _, xbins, ybins, pos = _path_bins(x, y, t, binsize, box_xlen, box_ylen)
 
-    xbins = np.arange(0, box_xlen + binsize, binsize)
-    ybins = np.arange(0, box_ylen + binsize, binsize)
-    ix = np.digitize(x, xbins, right=True)
-    iy = np.digitize(y, ybins, right=True)
-    nvisits_map = np.zeros((xbins.size, ybins.size))
-    for n in range(len(x)):
-        if n == 0:
-            nvisits_map[ix[n], iy[n]] = 1
-        else:
-            if ix[n-1] != ix[n] or iy[n-1] != iy[n]:
-                nvisits_map[ix[n], iy[n]] += 1
+    # a visit starts wherever the bin differs from the previous one
+    visits = np.ones(len(pos), dtype=bool)
+    visits[1:] = pos[1:] != pos[:-1]
+    nvisits_map = np.bincount(pos[visits], minlength=xbins.size * ybins.size)
+    nvisits_map = nvisits_map.reshape(xbins.size, ybins.size).astype(float)
     # correct for shifting of map since digitize returns values at right edges
     nvisits_map = nvisits_map[1:, 1:]
     if return_bins:
@@ -362,21 +429,16 @@ def spatial_rate_map_1d(x, t, sptr,
                          'of the binsize')
     is_quantities([x, t], 'vector')
     is_quantities(binsize, 'scalar')
-    t = t.rescale('s')
+    t = t.rescale('s').magnitude
     track_len = track_len.rescale('m').magnitude
     binsize = binsize.rescale('m').magnitude
     x = x.rescale('m').magnitude
-    # interpolate one extra timepoint
-    t_ = np.array(t.tolist() + [t.max() + np.median(np.diff(t))]) * pq.s
-    spikes_in_bin, _ = np.histogram(sptr.times, t_)
-    time_in_bin = np.diff(t_.magnitude)
+    t_ = _time_edges(t)
+    time_in_bin = np.diff(t_)
     xbins = np.arange(0, track_len + binsize, binsize)
     ix = np.digitize(x, xbins, right=True)
-    spike_pos = np.zeros(xbins.size)
-    time_pos = np.zeros(xbins.size)
-    for n in range(len(x)):
-        spike_pos[ix[n]] += spikes_in_bin[n]
-        time_pos[ix[n]] += time_in_bin[n]
+    spike_pos = _spikes_in_bins([sptr], t_, ix, xbins.size)[0]
+    time_pos = np.bincount(ix, weights=time_in_bin, minlength=xbins.size)
     # correct for shifting of map since digitize returns values at right edges
     spike_pos = spike_pos[1:]
     time_pos = time_pos[1:]
@@ -1,11 +1,21 @@
 from enum import Enum
 import yaml
 import os
+import copy
 
 from . import exdir_object as exob
 from .quantities_conversion import convert_quantities, convert_back_quantities
 
 
+def _as_loaded(meta_data):
+    """Mirror what yaml.safe_load would return after a safe_dump."""
+    if isinstance(meta_data, dict):
+        return {key: _as_loaded(value) for key, value in meta_data.items()}
+    if isinstance(meta_data, (list, tuple)):
+        return [_as_loaded(value) for value in meta_data]
+    return copy.deepcopy(meta_data)
+
+
 class Attribute(object):
     """Attribute class."""
 
@@ -79,6 +89,21 @@ class Attribute(object):
             meta_data = meta_data[i]
         return meta_data.values()
 
+    def update(self, value):
+        """
+        Set several attributes at once.
+
+        Unlike repeated item assignment, the file is only written once.
+        """
+        meta_data = self._open_or_create()
+
+        sub_meta_data = meta_data
+        for i in self.path:
+            sub_meta_data = sub_meta_data[i]
+        sub_meta_data.update(value)
+
+        self._set_data(meta_data)
+
     def _set_data(self, meta_data):
         if self.io_mode == exob.Object.OpenMode.READ_ONLY:
             raise IOError("Cannot write in read only ("r") mode")
@@ -90,15 +115,56 @@ class Attribute(object):
                 default_flow_style=False,
                 allow_unicode=True
             )
+        self._store_cache(meta_data)
 
     # TODO only needs filename, make into free function
     def _open_or_create(self):
+        meta_data = self._load_cache()
+        if meta_data is not None:
+            return meta_data
         meta_data = {}
         if self.filename.exists():  # NOTE str for Python 3.5 support
             with self.filename.open("r", encoding="utf-8") as meta_file:
                 meta_data = yaml.safe_load(meta_file)
+            self._store_cache(meta_data)
         return meta_data
 
+    def _file_signature(self):
+        try:
+            stat = os.stat(str(self.filename))
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load_cache(self):
+        """
+        Return a copy of the parsed file if the cache is still valid.
+
+        The cache lives on the parent object and is invalidated whenever
+        the modification time or size of the file changes on disk.
+        """
+        cache = getattr(self.parent, "_attribute_cache", None)
+        if cache is None:
+            return None
+        key = str(self.filename)
+        if key not in cache:
+            return None
+        signature, meta_data = cache[key]
+        if signature is None or signature != self._file_signature():
+            del cache[key]
+            return None
+        # NOTE callers modify the returned data, so never hand out the original
+        return copy.deepcopy(meta_data)
+
+    def _store_cache(self, meta_data):
+        cache = getattr(self.parent, "_attribute_cache", None)
+        if cache is None:
+            return
+        cache[str(self.filename)] = (
+            self._file_signature(),
+            _as_loaded(meta_data)
+        )
+
     def __iter__(self):
         for key in self.keys():
             yield key
@@ -0,0 +1,551 @@
+import numbers
+import shutil
+import pathlib
+import zlib
+import yaml
+import numpy as np
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+CHUNKS_FOLDER_NAME = "chunks"
+INDEX_FILENAME = "index.yaml"
+
+# aim for chunks of about 1 MiB when the chunk size is chosen automatically
+DEFAULT_CHUNK_BYTES = 2**20
+
+
+def _chunk_directory(dataset_directory):
+    return pathlib.Path(dataset_directory) / CHUNKS_FOLDER_NAME
+
+
+def is_chunked(dataset_directory):
+    return (_chunk_directory(dataset_directory) / INDEX_FILENAME).exists()
+
+
+def _dtype_to_descr(dtype):
+    descr = np.lib.format.dtype_to_descr(np.dtype(dtype))
+    if isinstance(descr, str):
+        return descr
+    return [list(field) for field in descr]
+
+
+def _descr_to_dtype(descr):
+    if isinstance(descr, str):
+        return np.dtype(descr)
+    # NOTE YAML turns the field tuples into lists
+    return np.dtype([tuple(_descr_to_dtype_field(field)) for field in descr])
+
+
+def _descr_to_dtype_field(field):
+    field = list(field)
+    if isinstance(field[1], list):
+        field[1] = _descr_to_dtype(field[1])
+    if len(field) > 2:
+        field[2] = tuple(field[2])
+    return field
+
+
+def _guess_chunk_length(shape, dtype):
+    row_bytes = int(np.prod(shape[1:], dtype=np.int64)) * np.dtype(dtype).itemsize
+    return max(1, DEFAULT_CHUNK_BYTES // max(1, row_bytes))
+
+
+def _normalize_chunks(chunks, shape, dtype):
+    """
+    Return the number of rows in each chunk.
+
+    Only chunking along the first axis is supported, so all other
+    dimensions of a chunk shape must match the dataset shape.
+    """
+    if chunks is True or chunks is None:
+        return _guess_chunk_length(shape, dtype)
+    if isinstance(chunks, numbers.Integral):
+        chunk_length = int(chunks)
+    else:
+        chunks = tuple(chunks)
+        if len(chunks) != len(shape):
+            raise ValueError(
+                "Chunk shape {} does not match dataset shape {}".format(
+                    chunks, shape
+                )
+            )
+        if tuple(chunks[1:]) != tuple(shape[1:]):
+            raise ValueError(
+                "Only chunking along the first axis is supported, "
+                "chunk shape {} must span all other dimensions of {}".format(
+                    chunks, shape
+                )
+            )
+        chunk_length = int(chunks[0])
+    if chunk_length < 1:
+        raise ValueError("Chunk length must be positive, got {}".format(chunk_length))
+    return chunk_length
+
+
+def _normalize_maxshape(maxshape, shape):
+    if maxshape is None:
+        return tuple(shape)
+    maxshape = tuple(None if size is None else int(size) for size in maxshape)
+    if len(maxshape) != len(shape):
+        raise ValueError(
+            "maxshape {} does not match dataset shape {}".format(maxshape, shape)
+        )
+    if maxshape[1:] != tuple(shape[1:]):
+        raise ValueError(
+            "Only the first axis can be resized, maxshape {} must match "
+            "the dataset shape {} in all other dimensions".format(maxshape, shape)
+        )
+    if maxshape[0] is not None and maxshape[0] < shape[0]:
+        raise ValueError(
+            "maxshape {} is smaller than the dataset shape {}".format(maxshape, shape)
+        )
+    return maxshape
+
+
+def _compress_gzip(data, level):
+    return zlib.compress(data, 4 if level is None else level)
+
+
+def _compress_lz4(data, level):
+    return lz4_frame.compress(data, compression_level=level or 0)
+
+
+COMPRESSORS = {
+    "gzip": (_compress_gzip, zlib.decompress),
+}
+if lz4_frame is not None:
+    COMPRESSORS["lz4"] = (_compress_lz4, lz4_frame.decompress)
+
+
+def _assert_valid_compression(compression):
+    if compression is None or compression in COMPRESSORS:
+        return
+    if compression == "lz4":
+        raise ImportError("Compression 'lz4' requires the lz4 package")
+    raise ValueError(
+        "Compression '{}' not recognized, compression must be one of {}".format(
+            compression, sorted(COMPRESSORS)
+        )
+    )
+
+
+def _shuffle(array):
+    """Group the bytes of all elements by significance, like the HDF5 shuffle filter."""
+    itemsize = array.dtype.itemsize
+    return np.ascontiguousarray(
+        array.reshape(-1).view(np.uint8).reshape(-1, itemsize).T
+    ).tobytes()
+
+
+def _unshuffle(data, dtype, shape):
+    itemsize = dtype.itemsize
+    shuffled = np.frombuffer(data, dtype=np.uint8).reshape(itemsize, -1)
+    return np.ascontiguousarray(shuffled.T).view(dtype).reshape(shape)
+
+
+def _is_basic_index(index):
+    return (
+        index is None or
+        index is Ellipsis or
+        isinstance(index, (slice, numbers.Integral))
+    )
+
+
+def create_chunked(dataset_directory, data, chunks=None, maxshape=None,
+                   fillvalue=None, compression=None, compression_opts=None,
+                   shuffle=False):
+    """
+    Store data as a directory of fixed-length chunks along the first axis.
+
+    The chunk directory holds an index file describing shape, dtype and
+    chunking, and one file per chunk. Chunks that have never been
+    written are not stored and read back as the fill value.
+
+    Uncompressed chunks are .npy files. With compression, each chunk is
+    stored as a compressed block of raw bytes, optionally byte-shuffled
+    first, which helps considerably for integer signals.
+    """
+    data = np.asarray(data)
+    if data.ndim < 1:
+        raise ValueError("Chunked datasets must have at least one dimension")
+    _assert_valid_compression(compression)
+    if shuffle and compression is None:
+        raise ValueError("shuffle requires compression to be set")
+
+    chunk_directory = _chunk_directory(dataset_directory)
+    chunk_directory.mkdir()
+    index = {
+        "shape": list(data.shape),
+        "maxshape": list(_normalize_maxshape(maxshape, data.shape)),
+        "dtype": _dtype_to_descr(data.dtype),
+        "chunk_length": _normalize_chunks(chunks, data.shape, data.dtype),
+        "fillvalue": 0 if fillvalue is None else np.asarray(fillvalue).item(),
+        "compression": compression,
+        "compression_opts": compression_opts,
+        "shuffle": bool(shuffle),
+    }
+    _write_index(chunk_directory, index)
+
+    array = ChunkedArray(dataset_directory, mmap_mode="r+")
+    if data.size > 0:
+        array[:] = data
+    return array
+
+
+def remove_chunked(dataset_directory):
+    shutil.rmtree(str(_chunk_directory(dataset_directory)))
+
+
+def _write_index(chunk_directory, index):
+    with (chunk_directory / INDEX_FILENAME).open("w", encoding="utf-8") as index_file:
+        yaml.safe_dump(
+            index,
+            index_file,
+            default_flow_style=False,
+            allow_unicode=True
+        )
+
+
+def _read_index(chunk_directory):
+    with (chunk_directory / INDEX_FILENAME).open("r", encoding="utf-8") as index_file:
+        return yaml.safe_load(index_file)
+
+
+class ChunkedArray(object):
+    """
+    Array-like view of a chunked dataset.
+
+    Supports numpy-style reading and writing with the first axis split
+    across chunk files. Only the chunks touched by an index are read.
+    """
+    def __init__(self, dataset_directory, mmap_mode="r"):
+        self.directory = _chunk_directory(dataset_directory)
+        self.mmap_mode = mmap_mode
+        index = _read_index(self.directory)
+        self._shape = tuple(index["shape"])
+        self.maxshape = tuple(index["maxshape"])
+        self.dtype = _descr_to_dtype(index["dtype"])
+        self.chunk_length = int(index["chunk_length"])
+        self.fillvalue = index["fillvalue"]
+        self.compression = index.get("compression")
+        self.compression_opts = index.get("compression_opts")
+        self.shuffle = index.get("shuffle", False)
+        if self.compression is not None:
+            _assert_valid_compression(self.compression)
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def size(self):
+        return int(np.prod(self._shape, dtype=np.int64))
+
+    @property
+    def ndim(self):
+        return len(self._shape)
+
+    @property
+    def chunks(self):
+        return (self.chunk_length,) + self._shape[1:]
+
+    @property
+    def num_chunks(self):
+        return -(-self._shape[0] // self.chunk_length)
+
+    def __len__(self):
+        return self._shape[0]
+
+    def __array__(self, dtype=None):
+        result = self[:]
+        if dtype is not None:
+            result = result.astype(dtype)
+        return result
+
+    def _chunk_filename(self, chunk_index):
+        if self.compression is not None:
+            return self.directory / "{}.{}".format(chunk_index, self.compression)
+        return self.directory / "{}.npy".format(chunk_index)
+
+    def _empty_chunk(self):
+        return np.full(self.chunks, self.fillvalue, dtype=self.dtype)
+
+    def _read_chunk(self, chunk_index):
+        filename = self._chunk_filename(chunk_index)
+        if not filename.exists():
+            return self._empty_chunk()
+        if self.compression is not None:
+            return self._decompress_chunk(filename)
+        return np.load(str(filename), mmap_mode=self.mmap_mode)
+
+    def _decompress_chunk(self, filename):
+        _, decompress = COMPRESSORS[self.compression]
+        with filename.open("rb") as chunk_file:
+            data = decompress(chunk_file.read())
+        if self.shuffle:
+            return _unshuffle(data, self.dtype, self.chunks)
+        return np.frombuffer(data, dtype=self.dtype).reshape(self.chunks).copy()
+
+    def _writable_chunk(self, chunk_index):
+        """
+        Return the chunk as a writable array, creating it if needed.
+
+        Changes must be passed to _flush_chunk to reach the disk.
+        """
+        filename = self._chunk_filename(chunk_index)
+        if self.compression is not None:
+            if filename.exists():
+                return self._decompress_chunk(filename)
+            return self._empty_chunk()
+        if filename.exists():
+            return np.load(str(filename), mmap_mode="r+")
+        chunk = np.lib.format.open_memmap(
+            str(filename), mode="w+", dtype=self.dtype, shape=self.chunks
+        )
+        if self.fillvalue:
+            chunk[...] = self.fillvalue
+        return chunk
+
+    def _flush_chunk(self, chunk_index, chunk):
+        if self.compression is None:
+            if isinstance(chunk, np.memmap):
+                chunk.flush()
+            return
+        compress, _ = COMPRESSORS[self.compression]
+        chunk = np.ascontiguousarray(chunk, dtype=self.dtype)
+        if self.shuffle:
+            data = _shuffle(chunk)
+        else:
+            data = chunk.tobytes()
+        with self._chunk_filename(chunk_index).open("wb") as chunk_file:
+            chunk_file.write(compress(data, self.compression_opts))
+
+    @property
+    def storage_size(self):
+        """Number of bytes used by the chunk files on disk."""
+        return sum(
+            self._chunk_filename(chunk_index).stat().st_size
+            for chunk_index in range(self.num_chunks)
+            if self._chunk_filename(chunk_index).exists()
+        )
+
+    def _split_index(self, args):
+        """
+        Split an index into the part for the first axis and the rest.
+
+        Returns None for the first part if the index cannot be split,
+        in which case all chunks must be read.
+        """
+        if not isinstance(args, tuple):
+            args = (args,)
+        if len(args) == 0:
+            return slice(None), ()
+        first, rest = args[0], args[1:]
+        if first is Ellipsis:
+            if len(args) == 1:
+                return slice(None), ()
+            if all(index is not Ellipsis for index in rest) and len(rest) == self.ndim:
+                # NOTE the ellipsis covers no axes, so rest starts at axis 0
+                return self._split_index(rest)
+            return None, args
+        if first is None:
+            return None, args
+        if isinstance(first, (slice, numbers.Integral)):
+            return first, rest
+        first = np.asarray(first)
+        if first.dtype == bool:
+            if first.shape != (self._shape[0],):
+                return None, args
+            first = np.nonzero(first)[0]
+        if not np.issubdtype(first.dtype, np.integer) or first.ndim != 1:
+            return None, args
+        if not all(_is_basic_index(index) for index in rest):
+            return None, args
+        return first, rest
+
+    def _selections(self, first):
+        """
+        Yield (chunk index, rows in chunk, rows in result) for a first-axis index.
+        """
+        length = self._shape[0]
+        chunk_length = self.chunk_length
+        if isinstance(first, slice):
+            start, stop, step = first.indices(length)
+            count = len(range(start, stop, step))
+            if count == 0:
+                return
+            if step > 0:
+                last = start + (count - 1) * step
+                for chunk_index in range(start // chunk_length, last // chunk_length + 1):
+                    chunk_start = chunk_index * chunk_length
+                    chunk_stop = chunk_start + chunk_length
+                    k_min = max(0, -(-(chunk_start - start) // step))
+                    k_max = min(count, -(-(chunk_stop - start) // step))
+                    if k_min >= k_max:
+                        continue
+                    local_start = start + k_min * step - chunk_start
+                    local_stop = start + (k_max - 1) * step - chunk_start + 1
+                    yield (
+                        chunk_index,
+                        slice(local_start, local_stop, step),
+                        slice(k_min, k_max)
+                    )
+                return
+            first = np.arange(start, stop, step)
+
+        rows = np.asarray(first, dtype=np.int64)
+        if rows.size > 0:
+            if rows.max() >= length or rows.min() < -length:
+                raise IndexError(
+                    "Index out of range for axis 0 with size {}".format(length)
+                )
+        rows = np.where(rows < 0, rows + length, rows)
+        chunk_indices = rows // chunk_length
+        for chunk_index in np.unique(chunk_indices):
+            selected = np.nonzero(chunk_indices == chunk_index)[0]
+            yield (
+                int(chunk_index),
+                rows[selected] - chunk_index * chunk_length,
+                selected
+            )
+
+    def _first_as_rows(self, first):
+        """Convert an integer on the first axis into a length-one slice."""
+        length = self._shape[0]
+        index = int(first)
+        if index < -length or index >= length:
+            raise IndexError(
+                "Index {} is out of range for axis 0 with size {}".format(index, length)
+            )
+        if index < 0:
+            index += length
+        return slice(index, index + 1)
+
+    def _result_shape(self, args):
+        # NOTE indexing a broadcast scalar gives the shape without allocating
+        return np.broadcast_to(np.empty((), dtype=bool), self._shape)[args].shape
+
+    def __getitem__(self, args):
+        first, rest = self._split_index(args)
+        if first is None:
+            return self._read_all()[args]
+
+        scalar_first = isinstance(first, numbers.Integral)
+        if scalar_first:
+            first = self._first_as_rows(first)
+        rest_index = (slice(None),) + rest
+
+        pieces = []
+        out_index = []
+        for chunk_index, local, out in self._selections(first):
+            chunk = self._read_chunk(chunk_index)
+            pieces.append(np.asarray(chunk[(local,) + rest]))
+            out_index.append(out)
+
+        if len(pieces) == 0:
+            empty_shape = (0,) + self._shape[1:]
+            result = np.empty(empty_shape, dtype=self.dtype)[rest_index]
+        elif len(pieces) == 1:
+            result = pieces[0]
+        else:
+            num_rows = sum(len(piece) for piece in pieces)
+            result = np.empty((num_rows,) + pieces[0].shape[1:], dtype=self.dtype)
+            for piece, out in zip(pieces, out_index):
+                result[out] = piece
+        if scalar_first:
+            result = result[0]
+        return result
+
+    def __setitem__(self, args, value):
+        if self.mmap_mode == "r":
+            raise IOError('Cannot write data to file in read only ("r") mode')
+
+        first, rest = self._split_index(args)
+        if first is None:
+            data = self._read_all()
+            data[args] = value
+            self[:] = data
+            return
+
+        value = np.asarray(value, dtype=self.dtype)
+        if isinstance(first, numbers.Integral):
+            first = self._first_as_rows(first)
+            value = np.broadcast_to(value, self._result_shape((0,) + rest))
+            value = value[np.newaxis]
+        else:
+            value = np.broadcast_to(value, self._result_shape((first,) + rest))
+
+        for chunk_index, local, out in self._selections(first):
+            chunk = self._writable_chunk(chunk_index)
+            chunk[(local,) + rest] = value[out]
+            self._flush_chunk(chunk_index, chunk)
+
+    def _read_all(self):
+        return self[:]
+
+    def resize(self, size, axis=None):
+        """
+        Resize the dataset along the first axis.
+
+        Grown regions read back as the fill value; chunks beyond the new
+        size are removed from disk.
+        """
+        if self.mmap_mode == "r":
+            raise IOError('Cannot resize dataset in read only ("r") mode')
+
+        if axis is not None:
+            if axis != 0:
+                raise TypeError("Only the first axis of a chunked dataset can be resized")
+            shape = (int(size),) + self._shape[1:]
+        else:
+            if isinstance(size, numbers.Integral):
+                size = (size,)
+            shape = tuple(int(s) for s in size)
+
+        if len(shape) != self.ndim:
+            raise TypeError(
+                "New shape {} has a different rank than {}".format(shape, self._shape)
+            )
+        if shape[1:] != self._shape[1:]:
+            raise TypeError("Only the first axis of a chunked dataset can be resized")
+        if shape[0] < 0:
+            raise ValueError("Cannot resize to a negative size")
+        if self.maxshape[0] is not None and shape[0] > self.maxshape[0]:
+            raise ValueError(
+                "New shape {} exceeds maxshape {}".format(shape, self.maxshape)
+            )
+
+        old_length = self._shape[0]
+        new_length = shape[0]
+        if new_length < old_length:
+            self._truncate(new_length)
+
+        self._shape = shape
+        index = _read_index(self.directory)
+        index["shape"] = list(shape)
+        _write_index(self.directory, index)
+
+    def _truncate(self, new_length):
+        num_chunks = self.num_chunks
+        kept_chunks = -(-new_length // self.chunk_length)
+        for chunk_index in range(kept_chunks, num_chunks):
+            filename = self._chunk_filename(chunk_index)
+            if filename.exists():
+                filename.unlink()
+        tail = new_length % self.chunk_length
+        if tail > 0 and self._chunk_filename(kept_chunks - 1).exists():
+            chunk = self._writable_chunk(kept_chunks - 1)
+            chunk[tail:] = self.fillvalue
+            self._flush_chunk(kept_chunks - 1, chunk)
+
+    def append(self, data):
+        """Append data along the first axis."""
+        data = np.asarray(data, dtype=self.dtype)
+        if data.shape[1:] != self._shape[1:]:
+            data = data.reshape((-1,) + self._shape[1:])
+        old_length = self._shape[0]
+        self.resize(old_length + data.shape[0], axis=0)
+        self[old_length:] = data
@@ -1,15 +1,36 @@
 import os
+import shutil
 import quantities as pq
 import numpy as np
 
 from . import quantities_conversion as pqc
 from . import exdir_object as exob
+from . import chunked
 
 def _dataset_filename(dataset_directory):
     return dataset_directory / "data.npy"
 
-def _create_dataset_directory(dataset_directory, data):
+def _create_dataset_directory(dataset_directory, data, chunks=None,
+                              maxshape=None, fillvalue=None, compression=None,
+                              compression_opts=None, shuffle=False):
     exob._create_object_directory(dataset_directory, exob.DATASET_TYPENAME)
+    if chunks or maxshape is not None or compression is not None or shuffle:
+        try:
+            chunked.create_chunked(
+                dataset_directory,
+                data,
+                chunks=chunks,
+                maxshape=maxshape,
+                fillvalue=fillvalue,
+                compression=compression,
+                compression_opts=compression_opts,
+                shuffle=shuffle
+            )
+        except Exception:
+            # NOTE do not leave a half-created dataset behind on invalid options
+            shutil.rmtree(str(dataset_directory))
+            raise
+        return
     filename = str(_dataset_filename(dataset_directory))
     np.save(filename, data)
 
@@ -64,14 +85,13 @@ class Dataset(exob.Object):
             io_mode=io_mode,
             validate_name=validate_name
         )
-        self._data = None
+        self._data_memmap = None
         if self.io_mode == self.OpenMode.READ_ONLY:
             self._mmap_mode = "r"
         else:
             self._mmap_mode = "r+"
 
         self.data_filename = str(_dataset_filename(self.directory))
-        self._reload()
 
     def __getitem__(self, args):
 
@@ -96,16 +116,108 @@ class Dataset(exob.Object):
 
         self._data[args] = value
 
+    @property
+    def _data(self):
+        # NOTE opened on first use so that walking a tree does not read every file
+        if self._data_memmap is None:
+            self._reload()
+        return self._data_memmap
+
     def _reload(self):
-        self._data = np.load(self.data_filename, mmap_mode=self._mmap_mode)
+        if chunked.is_chunked(self.directory):
+            self._data_memmap = chunked.ChunkedArray(self.directory, mmap_mode=self._mmap_mode)
+        else:
+            self._data_memmap = np.load(self.data_filename, mmap_mode=self._mmap_mode)
 
     def _reset(self, value):
         attrs, data = _extract_quantity(value)
-        np.save(self.data_filename, data)
+        if self.chunks is not None:
+            chunk_length = self._data.chunk_length
+            maxshape = self._data.maxshape
+            fillvalue = self._data.fillvalue
+            compression = self._data.compression
+            compression_opts = self._data.compression_opts
+            shuffle = self._data.shuffle
+            if maxshape[0] is not None and data.shape[0] > maxshape[0]:
+                maxshape = None
+            if maxshape is not None and tuple(maxshape[1:]) != data.shape[1:]:
+                maxshape = None
+            chunked.remove_chunked(self.directory)
+            chunked.create_chunked(
+                self.directory,
+                data,
+                chunks=chunk_length,
+                maxshape=maxshape,
+                fillvalue=fillvalue,
+                compression=compression,
+                compression_opts=compression_opts,
+                shuffle=shuffle
+            )
+        else:
+            np.save(self.data_filename, data)
         self._reload()
         self.attrs = attrs
         return
 
+    def resize(self, size, axis=None):
+        """
+        Resize the dataset, like h5py.Dataset.resize.
+
+        Only chunked datasets can be resized, and only along the first axis.
+        """
+        if self.chunks is None:
+            raise TypeError("Only chunked datasets can be resized")
+        if self.io_mode == self.OpenMode.READ_ONLY:
+            raise IOError('Cannot write data to file in read only ("r") mode')
+        self._data.resize(size, axis=axis)
+
+    def append(self, data):
+        """
+        Append data along the first axis of a chunked dataset.
+
+        Only the chunks touched by the new data are written.
+        """
+        if self.chunks is None:
+            raise TypeError("Only chunked datasets can be appended to")
+        if self.io_mode == self.OpenMode.READ_ONLY:
+            raise IOError('Cannot write data to file in read only ("r") mode')
+        if isinstance(data, pq.Quantity):
+            if "unit" in self.attrs:
+                data = data.rescale(self.attrs["unit"])
+            data = data.magnitude
+        self._data.append(data)
+
+    @property
+    def chunks(self):
+        """Chunk shape, or None if the dataset is stored contiguously."""
+        if isinstance(self._data, chunked.ChunkedArray):
+            return self._data.chunks
+        return None
+
+    @property
+    def compression(self):
+        if isinstance(self._data, chunked.ChunkedArray):
+            return self._data.compression
+        return None
+
+    @property
+    def compression_opts(self):
+        if isinstance(self._data, chunked.ChunkedArray):
+            return self._data.compression_opts
+        return None
+
+    @property
+    def shuffle(self):
+        if isinstance(self._data, chunked.ChunkedArray):
+            return self._data.shuffle
+        return False
+
+    @property
+    def maxshape(self):
+        if isinstance(self._data, chunked.ChunkedArray):
+            return self._data.maxshape
+        return self.shape
+
     def set_data(self, data):
         raise DeprecationWarning(
             "set_data is deprecated. Use `dataset.value = data` instead."
@@ -122,15 +234,16 @@ class Dataset(exob.Object):
 
     @property
     def shape(self):
-        return self[:].shape
+        # NOTE read from the memmap to avoid loading data and attributes
+        return self._data.shape
 
     @property
     def size(self):
-        return self[:].size
+        return self._data.size
 
     @property
     def dtype(self):
-        return self[:].dtype
+        return self._data.dtype
 
     @property
     def value(self):
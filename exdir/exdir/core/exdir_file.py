@@ -3,6 +3,7 @@ import shutil
 import pathlib
 
 from . import exdir_object as exob
+from . import tree_index
 from .group import Group
 from .. import utils
 
@@ -81,6 +82,33 @@ class File(Group):
         # yeah right, as if we would create a real file format
         pass
 
+    def index(self, persist=False, processes=None):
+        """
+        Scan the whole file once and return a TreeIndex.
+
+        The index maps object names to type, shape, dtype and attributes,
+        so queries like ``f.index().find(electrode_group_id=0)`` need no
+        further disk access.
+
+        With persist=True, the index is stored in a sidecar file in the
+        root directory. Later calls only re-read objects whose files
+        changed since then. With processes > 1, top-level objects are
+        scanned in parallel.
+        """
+        previous = None
+        if persist:
+            previous = tree_index.load_index(self.directory)
+        entries = tree_index.scan(
+            self.directory,
+            previous=previous,
+            processes=processes
+        )
+        if persist and entries != previous:
+            if self.io_mode == self.OpenMode.READ_ONLY:
+                raise IOError("Cannot write index in read only ("r") mode")
+            tree_index.save_index(self.directory, entries)
+        return tree_index.TreeIndex(entries)
+
     def create_group(self, name):
         path = utils.path.remove_root(name)
 
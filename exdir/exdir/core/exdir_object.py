@@ -62,24 +62,61 @@ def is_exdir_object(directory):
     return directory.is_dir()
 
 
-def is_nonraw_object_directory(directory):
-    meta_filename = directory / META_FILENAME
-    if not meta_filename.exists():
-        return False
+# NOTE maps meta filename to (file signature, object type) so that each
+# exdir.yaml is only parsed once as long as it is unchanged on disk
+_object_type_cache = {}
+
+
+def _file_signature(filename):
+    stat = os.stat(str(filename))
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _parse_object_type(meta_filename):
     with meta_filename.open("r", encoding="utf-8") as meta_file:
         meta_data = yaml.safe_load(meta_file)
 
-        if not isinstance(meta_data, dict):
-            return False
+    if not isinstance(meta_data, dict):
+        return None
+    if EXDIR_METANAME not in meta_data:
+        return None
+    if not isinstance(meta_data[EXDIR_METANAME], dict):
+        return None
+    if TYPE_METANAME not in meta_data[EXDIR_METANAME]:
+        return None
+    typename = meta_data[EXDIR_METANAME][TYPE_METANAME]
+    valid_types = [DATASET_TYPENAME, FILE_TYPENAME, GROUP_TYPENAME]
+    if typename not in valid_types:
+        return None
+    return typename
 
-        if EXDIR_METANAME not in meta_data:
-            return False
-        if TYPE_METANAME not in meta_data[EXDIR_METANAME]:
-            return False
-        valid_types = [DATASET_TYPENAME, FILE_TYPENAME, GROUP_TYPENAME]
-        if meta_data[EXDIR_METANAME][TYPE_METANAME] not in valid_types:
-            return False
-    return True
+
+def object_type(directory):
+    """
+    Return the exdir type name of a directory, or None if it is not a
+    (non-raw) exdir object.
+
+    Results are cached and invalidated when exdir.yaml changes on disk.
+    """
+    meta_filename = directory / META_FILENAME
+    key = str(meta_filename)
+    try:
+        signature = _file_signature(meta_filename)
+    except (FileNotFoundError, NotADirectoryError):
+        _object_type_cache.pop(key, None)
+        return None
+
+    cached = _object_type_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    typename = _parse_object_type(meta_filename)
+    _object_type_cache[key] = (signature, typename)
+    return typename
+
+
+def is_nonraw_object_directory(directory):
+    return object_type(directory) is not None
 
 
 def is_raw_object_directory(directory):
@@ -93,29 +130,10 @@ def root_directory(path):
     returns: path to exdir.File or None if not found.
     """
     path = pathlib.Path(path)
-    found = False
-    while not found:
+    while object_type(path) != FILE_TYPENAME:
         if path.parent == path:  # parent is self
             return None
-        valid = is_nonraw_object_directory(path)
-        if not valid:
-            path = path.parent
-            continue
-
-        meta_filename = path / META_FILENAME
-        with meta_filename.open("r", encoding="utf-8") as meta_file:
-            meta_data = yaml.load(meta_file)
-        if EXDIR_METANAME not in meta_data:
-            path = path.parent
-            continue
-        exdir_meta = meta_data[EXDIR_METANAME]
-        if TYPE_METANAME not in exdir_meta:
-            path = path.parent
-            continue
-        if FILE_TYPENAME != exdir_meta[TYPE_METANAME]:
-            path = path.parent
-            continue
-        found = True
+        path = path.parent
     return path
 
 
@@ -162,6 +180,7 @@ class Object():
         self.relative_path = self.parent_path / self.object_name
         self.name = "/" + str(self.relative_path)
         self.io_mode = io_mode
+        self._attribute_cache = {}
 
         validate_name = validate_name or filename_validation.thorough
 
@@ -60,7 +60,21 @@ class Group(Object):
         )
 
     def create_dataset(self, name, shape=None, dtype=None,
-                       data=None, fillvalue=None):
+                       data=None, fillvalue=None, chunks=None, maxshape=None,
+                       compression=None, compression_opts=None, shuffle=False):
+        """
+        Create a dataset.
+
+        Setting chunks (True, a chunk length or a chunk shape) or maxshape
+        stores the data in chunks along the first axis, which allows the
+        dataset to be resized and appended to. Use None in maxshape for an
+        unlimited first axis.
+
+        Setting compression ("gzip", or "lz4" if installed) compresses each
+        chunk, with compression_opts as the compression level. shuffle
+        reorders the bytes before compression, which usually improves the
+        ratio for integer data. Reads only decompress the chunks they touch.
+        """
         exob._assert_valid_name(name, self)
 
         if self.io_mode == self.OpenMode.READ_ONLY:
@@ -80,7 +94,13 @@ class Group(Object):
         attrs, result = ds._convert_data(data, shape, dtype, fillvalue)
         ds._create_dataset_directory(
             self.directory / name,
-            result
+            result,
+            chunks=chunks,
+            maxshape=maxshape,
+            fillvalue=fillvalue,
+            compression=compression,
+            compression_opts=compression_opts,
+            shuffle=shuffle
         )
         dataset = self[name]
         dataset.attrs = attrs
@@ -133,14 +153,20 @@ class Group(Object):
         return self.create_group(name)
 
     def require_dataset(self, name, shape=None, dtype=None, exact=False,
-                        data=None, fillvalue=None):
+                        data=None, fillvalue=None, chunks=None, maxshape=None,
+                        compression=None, compression_opts=None, shuffle=False):
         if name not in self:
             return self.create_dataset(
                 name,
                 shape=shape,
                 dtype=dtype,
                 data=data,
-                fillvalue=fillvalue
+                fillvalue=fillvalue,
+                chunks=chunks,
+                maxshape=maxshape,
+                compression=compression,
+                compression_opts=compression_opts,
+                shuffle=shuffle
             )
 
         current_object = self[name]
@@ -198,8 +224,9 @@ class Group(Object):
             raise KeyError("No such object: '" + str(name) + "'")
 
         directory = self.directory / path
+        typename = exob.object_type(directory)
 
-        if exob.is_raw_object_directory(directory):  # TODO create one function that handles all Raw creation
+        if typename is None:  # TODO create one function that handles all Raw creation
             return raw.Raw(
                 root_directory=self.root_directory,
                 parent_path=self.relative_path,
@@ -207,16 +234,7 @@ class Group(Object):
                 io_mode=self.io_mode # TODO validate name?
             )
 
-        if not exob.is_nonraw_object_directory(directory):
-            raise IOError(
-                "Directory '" + directory +
-                "' is not a valid exdir object."
-            )
-
-        meta_filename = directory / exob.META_FILENAME
-        with meta_filename.open("r", encoding="utf-8") as meta_file:
-            meta_data = yaml.safe_load(meta_file)
-        if meta_data[exob.EXDIR_METANAME][exob.TYPE_METANAME] == exob.DATASET_TYPENAME:
+        if typename == exob.DATASET_TYPENAME:
             return ds.Dataset(
                 root_directory=self.root_directory,
                 parent_path=self.relative_path,
@@ -224,7 +242,7 @@ class Group(Object):
                 io_mode=self.io_mode,
                 validate_name=self.validate_name
             )
-        elif meta_data[exob.EXDIR_METANAME][exob.TYPE_METANAME] == exob.GROUP_TYPENAME:
+        elif typename == exob.GROUP_TYPENAME:
             return Group(
                 root_directory=self.root_directory,
                 parent_path=self.relative_path,
@@ -233,10 +251,7 @@ class Group(Object):
                 validate_name=self.validate_name
             )
         else:
-            print(
-                "Object", name, "has data type",
-                meta_data[exob.EXDIR_METANAME][exob.TYPE_METANAME]
-            )
+            print("Object", name, "has data type", typename)
             raise NotImplementedError("Cannot open objects of this type")
 
     def __setitem__(self, name, value):
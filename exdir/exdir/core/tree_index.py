@@ -0,0 +1,247 @@
+import os
+import copy
+import json
+import pathlib
+from collections import abc
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+import numpy as np
+
+from . import exdir_object as exob
+from . import chunked
+from .quantities_conversion import convert_back_quantities
+
+INDEX_FILENAME = ".exdir_index.json"
+INDEX_VERSION = 1
+RAW_TYPENAME = "raw"
+
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _load_yaml(path):
+    with open(path, "r", encoding="utf-8") as yaml_file:
+        return yaml.load(yaml_file, Loader=_Loader)
+
+
+def _read_npy_header(filename):
+    """Return shape and dtype of a .npy file without reading its data."""
+    with open(filename, "rb") as npy_file:
+        version = np.lib.format.read_magic(npy_file)
+        if version == (1, 0):
+            shape, _, dtype = np.lib.format.read_array_header_1_0(npy_file)
+        else:
+            shape, _, dtype = np.lib.format.read_array_header_2_0(npy_file)
+    return list(shape), dtype
+
+
+def _data_signature_filename(directory):
+    chunk_index = os.path.join(directory, chunked.CHUNKS_FOLDER_NAME, chunked.INDEX_FILENAME)
+    if os.path.exists(chunk_index):
+        return chunk_index
+    return os.path.join(directory, "data.npy")
+
+
+def _dataset_shape_dtype(directory):
+    if chunked.is_chunked(directory):
+        array = chunked.ChunkedArray(directory)
+        return list(array.shape), chunked._dtype_to_descr(array.dtype)
+    shape, dtype = _read_npy_header(os.path.join(directory, "data.npy"))
+    return shape, chunked._dtype_to_descr(dtype)
+
+
+def _scan_entry(directory, previous):
+    """
+    Describe one object directory.
+
+    Reuses the previous entry if none of its files changed on disk.
+    """
+    meta_filename = os.path.join(directory, exob.META_FILENAME)
+    attributes_filename = os.path.join(directory, exob.ATTRIBUTES_FILENAME)
+    signatures = [
+        _signature(meta_filename),
+        _signature(attributes_filename),
+        _signature(_data_signature_filename(directory))
+    ]
+    if previous is not None and previous["signatures"] == signatures:
+        return previous
+
+    typename = exob.object_type(pathlib.Path(directory)) or RAW_TYPENAME
+    entry = {
+        "type": typename,
+        "shape": None,
+        "dtype": None,
+        "attrs": {},
+        "signatures": signatures
+    }
+    if typename == RAW_TYPENAME:
+        return entry
+    if signatures[1] is not None:
+        entry["attrs"] = _load_yaml(attributes_filename) or {}
+    if typename == exob.DATASET_TYPENAME:
+        entry["shape"], entry["dtype"] = _dataset_shape_dtype(directory)
+    return entry
+
+
+def _scan_tree(directory, name, previous):
+    """Walk directory and all exdir objects below it with os.scandir."""
+    entries = {}
+    pending = [(directory, name)]
+    while pending:
+        directory, name = pending.pop()
+        entry = _scan_entry(directory, previous.get(name))
+        entries[name] = entry
+        if entry["type"] in (RAW_TYPENAME, exob.DATASET_TYPENAME):
+            continue
+        with os.scandir(directory) as iterator:
+            for child in iterator:
+                if child.is_dir():
+                    pending.append((child.path, _child_name(name, child.name)))
+    return entries
+
+
+def _child_name(name, child):
+    if name == "/":
+        return "/" + child
+    return name + "/" + child
+
+
+def scan(root_directory, previous=None, processes=None):
+    """
+    Build a flat index of all objects below an exdir root directory.
+
+    Each object is reached with a single os.scandir walk and described by
+    its type, dataset shape and dtype, and attributes. Entries from a
+    previous scan are reused for objects whose files are unchanged.
+    With processes > 1, the top-level objects are scanned in parallel.
+    """
+    root_directory = str(root_directory)
+    previous = previous or {}
+    root_entry = _scan_entry(root_directory, previous.get("/"))
+    entries = {"/": root_entry}
+
+    with os.scandir(root_directory) as iterator:
+        children = [
+            (child.path, _child_name("/", child.name))
+            for child in iterator if child.is_dir()
+        ]
+
+    def previous_below(name):
+        prefix = name + "/"
+        return {
+            key: value for key, value in previous.items()
+            if key == name or key.startswith(prefix)
+        }
+
+    if processes is not None and processes > 1 and len(children) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [
+                executor.submit(_scan_tree, path, name, previous_below(name))
+                for path, name in children
+            ]
+            for future in futures:
+                entries.update(future.result())
+    else:
+        for path, name in children:
+            entries.update(_scan_tree(path, name, previous))
+
+    return entries
+
+
+def index_filename(root_directory):
+    return pathlib.Path(root_directory) / INDEX_FILENAME
+
+
+def load_index(root_directory):
+    """Load a persisted index, or return None if there is none or it is outdated."""
+    filename = index_filename(root_directory)
+    if not filename.exists():
+        return None
+    with filename.open("r", encoding="utf-8") as index_file:
+        data = json.load(index_file)
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+        return None
+    return data["entries"]
+
+
+def _persistable(entry):
+    """
+    Return the entry as stored in the sidecar file.
+
+    Attributes that do not survive a JSON round trip unchanged (integer keys,
+    dates, ...) are left out and the entry is marked as outdated, so they
+    are read from attributes.yaml again on the next refresh.
+    """
+    try:
+        if json.loads(json.dumps(entry["attrs"])) == entry["attrs"]:
+            return entry
+    except (TypeError, ValueError):
+        pass
+    entry = dict(entry)
+    entry["attrs"] = {}
+    entry["signatures"] = None
+    return entry
+
+
+def save_index(root_directory, entries):
+    # NOTE JSON rather than YAML, since the index can hold many thousand
+    # entries and even libyaml takes seconds to parse those
+    filename = index_filename(root_directory)
+    temporary_filename = filename.with_name(filename.name + ".tmp")
+    entries = {name: _persistable(entry) for name, entry in entries.items()}
+    with temporary_filename.open("w", encoding="utf-8") as index_file:
+        json.dump({"version": INDEX_VERSION, "entries": entries}, index_file)
+    # NOTE replace atomically so readers never see a partial index
+    os.replace(str(temporary_filename), str(filename))
+
+
+class TreeIndex(abc.Mapping):
+    """
+    Read-only mapping from object name (for instance "/group/dataset")
+    to a dictionary with the keys type, shape, dtype and attrs.
+
+    find compares against the attributes as stored in attributes.yaml,
+    so quantities must be given as dictionaries with value and unit there.
+    """
+    def __init__(self, entries):
+        self._entries = entries
+
+    def __getitem__(self, name):
+        entry = self._entries[name]
+        return {
+            "type": entry["type"],
+            "shape": None if entry["shape"] is None else tuple(entry["shape"]),
+            "dtype": None if entry["dtype"] is None else chunked._descr_to_dtype(entry["dtype"]),
+            "attrs": convert_back_quantities(copy.deepcopy(entry["attrs"]))
+        }
+
+    def __iter__(self):
+        return iter(sorted(self._entries))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def find(self, typename=None, **attrs):
+        """
+        Return the names of all objects with the given type and attribute values.
+
+        >>> index.find(typename="group", electrode_group_id=0)  # doctest: +SKIP
+        """
+        result = []
+        for name in sorted(self._entries):
+            entry = self._entries[name]
+            if typename is not None and entry["type"] != typename:
+                continue
+            entry_attrs = entry["attrs"]
+            if all(key in entry_attrs and entry_attrs[key] == value
+                   for key, value in attrs.items()):
+                result.append(name)
+        return result
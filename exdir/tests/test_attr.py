@@ -290,6 +290,54 @@ def test_attrs(setup_teardown_file):
     assert dict(f.attrs["test"]) == {"name": "temp", "value": 19}
 
 
+def test_update(setup_teardown_file):
+    f = setup_teardown_file[3]
+
+    f.attrs["a"] = 1
+    f.attrs.update({"b": 2.0, "c": 3.0 * pq.s})
+    assert f.attrs["a"] == 1
+    assert f.attrs["b"] == 2.0
+    assert f.attrs["c"] == 3.0 * pq.s
+
+    f.attrs["d"] = {"e": 4}
+    f.attrs["d"].update({"f": 5})
+    assert f.attrs["d"].to_dict() == {"e": 4, "f": 5}
+
+
+def test_cache_returns_copies(setup_teardown_file):
+    f = setup_teardown_file[3]
+
+    f.attrs["list"] = (1, 2, 3)
+    assert f.attrs["list"] == [1, 2, 3]
+
+    f.attrs["list"].append(4)
+    f.attrs.to_dict()["list"].append(5)
+    assert f.attrs["list"] == [1, 2, 3]
+
+
+def test_cache_invalidated_by_external_write(setup_teardown_file):
+    f = setup_teardown_file[3]
+
+    f.attrs["a"] = 1
+    assert f.attrs["a"] == 1
+
+    with f.attributes_filename.open("w", encoding="utf-8") as meta_file:
+        meta_file.write("a: 2\nb: 3\n")
+
+    assert f.attrs["a"] == 2
+    assert f.attrs["b"] == 3
+
+
+def test_cache_shared_between_attribute_objects(setup_teardown_file):
+    f = setup_teardown_file[3]
+
+    first = f.attrs
+    second = f.attrs
+    first["a"] = 1
+    second["b"] = 2
+    assert f.attrs.to_dict() == {"a": 1, "b": 2}
+
+
 
 
 # TODO uncomment and use these tests if we allows for all attribute information
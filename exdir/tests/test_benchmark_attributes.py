@@ -19,6 +19,26 @@ def test_benchmark_attribute_many_h5py(benchmark, h5py_tmpfile):
     benchmark(add_many_attributes, foo)
 
 
+def update_many_attributes(obj):
+    obj.attrs.update({"hello" + str(i): "world" for i in range(30)})
+
+
+def test_benchmark_attribute_update_many_exdir(benchmark, exdir_tmpfile):
+    foo = exdir_tmpfile.create_group("foo")
+    benchmark(update_many_attributes, foo)
+
+
+def read_many_attributes(obj):
+    for i in range(30):
+        obj.attrs["hello" + str(i)]
+
+
+def test_benchmark_attribute_read_many_exdir(benchmark, exdir_tmpfile):
+    foo = exdir_tmpfile.create_group("foo")
+    add_many_attributes(foo)
+    benchmark(read_many_attributes, foo)
+
+
 def add_few_attributes(obj):
     for i in range(5):
         obj.attrs["hello" + str(i)] = "world"
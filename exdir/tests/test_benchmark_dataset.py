@@ -66,3 +66,90 @@ def test_dataset_medium_exdir(benchmark, tmpdir):
 
 def test_dataset_large_exdir(benchmark, tmpdir):
     benchmark.pedantic(add_large_dataset, setup=create_setup_exdir(tmpdir))
+
+
+def read_metadata(dataset):
+    return dataset.shape, dataset.size, dataset.dtype
+
+
+def create_unit_dataset(tmpdir, shape):
+    f = exdir.File(str(tmpdir.join("test.exdir")))
+    data = np.zeros(shape, dtype=np.int16)
+    dataset = f.create_dataset("foo", data=data)
+    dataset.attrs["unit"] = "uV"
+    return dataset
+
+
+def test_dataset_shape_small_exdir(benchmark, tmpdir):
+    dataset = create_unit_dataset(tmpdir, (10, 100))
+    assert benchmark(read_metadata, dataset)[0] == (10, 100)
+
+
+def test_dataset_shape_large_exdir(benchmark, tmpdir):
+    dataset = create_unit_dataset(tmpdir, (64, 1000000))
+    assert benchmark(read_metadata, dataset)[0] == (64, 1000000)
+
+
+def append_blocks(obj):
+    dataset = obj.create_dataset(
+        "foo", shape=(0, 32), dtype=np.int16, maxshape=(None, 32)
+    )
+    block = np.zeros((30000, 32), dtype=np.int16)
+    for i in range(20):
+        dataset.append(block)
+    obj.close()
+
+
+def test_dataset_append_exdir(benchmark, tmpdir):
+    benchmark.pedantic(append_blocks, setup=create_setup_exdir(tmpdir))
+
+
+def synthetic_recording(num_samples=300000, num_channels=32):
+    # band-limited noise with a slow drift, stored as int16 like raw ephys data
+    random_state = np.random.RandomState(0)
+    steps = random_state.randint(-30, 31, size=(num_samples, num_channels))
+    return np.cumsum(steps, axis=0).astype(np.int16)
+
+
+@pytest.fixture(scope="module")
+def recording():
+    return synthetic_recording()
+
+
+def create_recording_dataset(tmpdir, recording, **kwargs):
+    f = exdir.File(str(tmpdir.join("test.exdir")))
+    return f.create_dataset("foo", data=recording, **kwargs)
+
+
+def storage_size(dataset):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, dirs, names in os.walk(str(dataset.directory))
+        for name in names if name.endswith((".npy", ".gzip", ".lz4"))
+    )
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"chunks": 30000},
+    {"chunks": 30000, "compression": "gzip", "compression_opts": 1},
+    {"chunks": 30000, "compression": "gzip", "compression_opts": 1, "shuffle": True},
+], ids=["npy", "chunked", "gzip", "gzip-shuffle"])
+def test_dataset_read_compressed_exdir(benchmark, tmpdir, recording, options):
+    dataset = create_recording_dataset(tmpdir, recording, **options)
+    benchmark.extra_info["storage_size"] = storage_size(dataset)
+    benchmark.extra_info["compression_ratio"] = (
+        recording.nbytes / benchmark.extra_info["storage_size"]
+    )
+    result = benchmark(lambda: np.array(dataset[:]))
+    assert np.array_equal(result, recording)
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"chunks": 30000, "compression": "gzip", "compression_opts": 1, "shuffle": True},
+], ids=["npy", "gzip-shuffle"])
+def test_dataset_read_compressed_slice_exdir(benchmark, tmpdir, recording, options):
+    dataset = create_recording_dataset(tmpdir, recording, **options)
+    result = benchmark(lambda: np.array(dataset[100000:130000, 5]))
+    assert np.array_equal(result, recording[100000:130000, 5])
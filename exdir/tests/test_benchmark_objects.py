@@ -67,3 +67,44 @@ def test_large_tree_h5py(benchmark, h5py_tmpfile):
 #
 #     create_large_tree(exdir_tmpfile)
 #     benchmark(exdir_tmpfile.visit, counter)
+
+
+def create_wide_tree(obj):
+    # 100 channel groups with 99 timeseries groups each, about 10k objects
+    for i in range(100):
+        group = obj.create_group("channel_group_{}".format(i))
+        for j in range(99):
+            group.create_group("LFP_timeseries_{}".format(j))
+
+
+def walk_objects(obj):
+    count = 0
+    for name in obj:
+        child = obj[name]
+        count += 1
+        if isinstance(child, exdir.core.Group):
+            count += walk_objects(child)
+    return count
+
+
+@pytest.fixture(scope="module")
+def wide_tree(tmpdir_factory):
+    testpath = tmpdir_factory.mktemp("wide_tree").join("test.exdir")
+    f = exdir.File(str(testpath), mode="w")
+    create_wide_tree(f)
+    return f
+
+
+def test_walk_wide_tree_exdir(benchmark, wide_tree):
+    assert benchmark(walk_objects, wide_tree) == 10000
+
+
+def test_index_wide_tree_exdir(benchmark, wide_tree):
+    index = benchmark(wide_tree.index)
+    assert len(index) == 10001
+
+
+def test_index_wide_tree_persisted_exdir(benchmark, wide_tree):
+    wide_tree.index(persist=True)
+    index = benchmark(wide_tree.index, persist=True)
+    assert len(index) == 10001
@@ -0,0 +1,257 @@
+import pytest
+import numpy as np
+import quantities as pq
+
+from exdir.core import File, Dataset
+from exdir.core import chunked
+
+
+def test_create_chunked(setup_teardown_file):
+    f = setup_teardown_file[3]
+    data = np.arange(300, dtype=np.int16).reshape(100, 3)
+
+    dset = f.create_dataset("foo", data=data, chunks=(7, 3))
+
+    assert dset.chunks == (7, 3)
+    assert dset.maxshape == (100, 3)
+    assert dset.shape == (100, 3)
+    assert dset.dtype == np.int16
+    assert np.array_equal(dset[:], data)
+    assert chunked.is_chunked(dset.directory)
+    assert not (dset.directory / "data.npy").exists()
+    assert len(list((dset.directory / "chunks").glob("*.npy"))) == 15
+
+
+def test_contiguous_has_no_chunks(setup_teardown_file):
+    f = setup_teardown_file[3]
+    dset = f.create_dataset("foo", data=np.arange(10))
+
+    assert dset.chunks is None
+    assert dset.maxshape == (10,)
+    with pytest.raises(TypeError):
+        dset.resize((20,))
+    with pytest.raises(TypeError):
+        dset.append(np.arange(10))
+
+
+def test_invalid_chunks(setup_teardown_file):
+    f = setup_teardown_file[3]
+    data = np.zeros((10, 4))
+
+    with pytest.raises(ValueError):
+        f.create_dataset("foo", data=data, chunks=(5, 2))
+    with pytest.raises(ValueError):
+        f.create_dataset("bar", data=data, maxshape=(None, 8))
+    with pytest.raises(ValueError):
+        f.create_dataset("baz", data=data, maxshape=(5, 4))
+
+
+@pytest.mark.parametrize("index", [
+    slice(None),
+    slice(3, 50, 4),
+    slice(None, None, -3),
+    slice(80, 20, -7),
+    slice(40, 10),
+    5,
+    -1,
+    [1, 50, 99, 2],
+    np.arange(100) % 3 == 0,
+    (slice(2, 40), 1),
+    (slice(5, 20), slice(0, 2)),
+    ([4, 8, 15], 2),
+    (3, 2),
+    (Ellipsis, 2),
+    Ellipsis,
+    (),
+    (None, 1),
+])
+def test_read_index(setup_teardown_file, index):
+    f = setup_teardown_file[3]
+    data = np.arange(300, dtype=np.float64).reshape(100, 3)
+    dset = f.create_dataset("foo", data=data, chunks=7)
+
+    assert np.array_equal(dset[index], data[index])
+
+
+@pytest.mark.parametrize("index, value", [
+    (slice(10, 30, 3), -1),
+    (4, [1, 2, 3]),
+    ((slice(None), 2), 9),
+    (([0, 99], 1), 7),
+    (slice(None, None, -5), np.arange(60).reshape(20, 3)),
+    (np.arange(100) % 2 == 0, 3),
+])
+def test_write_index(setup_teardown_file, index, value):
+    f = setup_teardown_file[3]
+    data = np.arange(300, dtype=np.float64).reshape(100, 3)
+    dset = f.create_dataset("foo", data=data, chunks=7)
+
+    dset[index] = value
+    data[index] = value
+
+    assert np.array_equal(f["foo"][:], data)
+
+
+def test_append(setup_teardown_file):
+    f = setup_teardown_file[3]
+    dset = f.create_dataset(
+        "foo", shape=(0, 4), dtype=np.int16, maxshape=(None, 4), chunks=(10, 4)
+    )
+
+    blocks = [np.full((7, 4), i, dtype=np.int16) for i in range(6)]
+    for block in blocks:
+        dset.append(block)
+
+    assert dset.shape == (42, 4)
+    assert np.array_equal(f["foo"][:], np.concatenate(blocks))
+
+
+def test_append_quantities(setup_teardown_file):
+    f = setup_teardown_file[3]
+    dset = f.create_dataset("foo", data=np.arange(3) * pq.mV, maxshape=(None,))
+
+    dset.append(np.arange(3) * pq.V)
+
+    assert np.array_equal(dset[:], [0, 1, 2, 0, 1000, 2000] * pq.mV)
+
+
+def test_resize(setup_teardown_file):
+    f = setup_teardown_file[3]
+    data = np.arange(20, dtype=np.int32)
+    dset = f.create_dataset("foo", data=data, chunks=6, maxshape=(30,), fillvalue=-1)
+
+    dset.resize(8, axis=0)
+    assert np.array_equal(dset[:], data[:8])
+    assert len(list((dset.directory / "chunks").glob("*.npy"))) == 2
+
+    dset.resize((15,))
+    assert np.array_equal(dset[:], np.concatenate([data[:8], np.full(7, -1)]))
+
+    with pytest.raises(ValueError):
+        dset.resize((31,))
+    with pytest.raises(TypeError):
+        dset.resize(10, axis=1)
+
+    reopened = f["foo"]
+    assert reopened.shape == (15,)
+    assert reopened.maxshape == (30,)
+
+
+def test_resize_read_only(setup_teardown_folder):
+    testfile = setup_teardown_folder[1]
+    f = File(testfile, mode="w")
+    f.create_dataset("foo", data=np.arange(10), maxshape=(None,))
+    f.close()
+
+    f = File(testfile, mode="r")
+    with pytest.raises(IOError):
+        f["foo"].resize((20,))
+    with pytest.raises(IOError):
+        f["foo"][0] = 1
+
+
+def test_reset_keeps_chunking(setup_teardown_file):
+    f = setup_teardown_file[3]
+    dset = f.create_dataset("foo", data=np.arange(10), chunks=4, maxshape=(None,))
+
+    dset.value = np.arange(25)
+
+    assert dset.chunks == (4,)
+    assert dset.maxshape == (None,)
+    assert np.array_equal(dset[:], np.arange(25))
+
+
+def test_compound_dtype(setup_teardown_file):
+    f = setup_teardown_file[3]
+    dtype = np.dtype([("a", np.int32), ("b", np.float64, (2,))])
+    data = np.zeros(10, dtype=dtype)
+    data["a"] = np.arange(10)
+
+    dset = f.create_dataset("foo", data=data, chunks=3)
+
+    assert f["foo"].dtype == dtype
+    assert np.array_equal(f["foo"][:], data)
+
+
+def _synthetic_signal(num_samples=10000, num_channels=8):
+    random_state = np.random.RandomState(42)
+    noise = random_state.randint(-20, 20, size=(num_samples, num_channels))
+    return np.cumsum(noise, axis=0).astype(np.int16)
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_compression(setup_teardown_file, shuffle):
+    f = setup_teardown_file[3]
+    data = _synthetic_signal()
+
+    dset = f.create_dataset(
+        "foo", data=data, chunks=1000, compression="gzip", shuffle=shuffle
+    )
+
+    reopened = f["foo"]
+    assert reopened.compression == "gzip"
+    assert reopened.shuffle == shuffle
+    assert reopened.dtype == np.int16
+    assert np.array_equal(reopened[:], data)
+    assert np.array_equal(reopened[1500:2500:3, 2], data[1500:2500:3, 2])
+    assert dset._data.storage_size < data.nbytes
+
+
+def test_compression_reads_touched_chunks(setup_teardown_file, monkeypatch):
+    f = setup_teardown_file[3]
+    data = _synthetic_signal()
+    f.create_dataset("foo", data=data, chunks=1000, compression="gzip")
+    dset = f["foo"]
+
+    decompressed = []
+    original = chunked.ChunkedArray._decompress_chunk
+
+    def counting_decompress(self, filename):
+        decompressed.append(filename.name)
+        return original(self, filename)
+
+    monkeypatch.setattr(chunked.ChunkedArray, "_decompress_chunk", counting_decompress)
+
+    assert np.array_equal(dset[1900:2100], data[1900:2100])
+    assert sorted(decompressed) == ["1.gzip", "2.gzip"]
+
+
+def test_compression_write_and_append(setup_teardown_file):
+    f = setup_teardown_file[3]
+    data = _synthetic_signal()
+    dset = f.create_dataset(
+        "foo", data=data[:3000], chunks=700, maxshape=(None, 8),
+        compression="gzip", compression_opts=1, shuffle=True
+    )
+
+    dset.append(data[3000:])
+    dset[100:200] = 0
+    data[100:200] = 0
+
+    assert dset.shape == data.shape
+    assert np.array_equal(f["foo"][:], data)
+
+    dset.resize(2500, axis=0)
+    dset.resize(3000, axis=0)
+    data[2500:3000] = 0
+    assert np.array_equal(f["foo"][:], data[:3000])
+
+
+def test_invalid_compression(setup_teardown_file):
+    f = setup_teardown_file[3]
+
+    with pytest.raises(ValueError):
+        f.create_dataset("foo", data=np.arange(10), compression="foo")
+    with pytest.raises(ValueError):
+        f.create_dataset("foo", data=np.arange(10), shuffle=True)
+    assert "foo" not in f
+
+
+def test_lz4_compression(setup_teardown_file):
+    pytest.importorskip("lz4")
+    f = setup_teardown_file[3]
+    data = _synthetic_signal()
+
+    f.create_dataset("foo", data=data, compression="lz4", shuffle=True)
+
+    assert np.array_equal(f["foo"][:], data)
@@ -123,6 +123,20 @@ def test_create_quantities_data(setup_teardown_file):
     assert outdata.dtype == testdata.dtype
 
 
+def test_quantities_shape_dtype(setup_teardown_file):
+    """Shape, size and dtype come from the stored array, not the quantity."""
+    f = setup_teardown_file[3]
+    grp = f.create_group("test")
+
+    testdata = np.zeros((4, 5)) * pq.mV
+    dset = grp.create_dataset('data', data=testdata)
+
+    assert dset.shape == (4, 5)
+    assert dset.size == 20
+    assert dset.dtype == testdata.dtype
+    assert not isinstance(dset.shape, pq.Quantity)
+
+
 def test_create_extended_data(setup_teardown_file):
     """Create an extended dataset from existing data."""
     f = setup_teardown_file[3]
@@ -250,6 +250,40 @@ def test_is_nonraw_object_directory(setup_teardown_folder):
     assert result is True
 
 
+def test_object_type_cache(setup_teardown_file, monkeypatch):
+    f = setup_teardown_file[3]
+    f.create_group("group")
+    f.create_dataset("dataset", data=np.arange(3))
+    f.create_raw("raw")
+
+    parsed = []
+    original = exob._parse_object_type
+
+    def counting_parse(meta_filename):
+        parsed.append(meta_filename)
+        return original(meta_filename)
+
+    monkeypatch.setattr(exob, "_parse_object_type", counting_parse)
+    exob._object_type_cache.clear()
+
+    for i in range(3):
+        assert isinstance(f["group"], exdir.core.Group)
+        assert isinstance(f["dataset"], exdir.core.Dataset)
+        assert isinstance(f["raw"], exdir.core.Raw)
+    assert len(parsed) == 2
+
+    meta_filename = f["group"].meta_filename
+    meta_filename.unlink()
+    assert isinstance(f["group"], exdir.core.Raw)
+
+    exob._create_object_directory(f.directory / "new", exob.DATASET_TYPENAME)
+    (f.directory / "new" / exob.META_FILENAME).unlink()
+    assert exob.object_type(f.directory / "new") is None
+    with (f.directory / "new" / exob.META_FILENAME).open("w", encoding="utf-8") as meta_file:
+        yaml.safe_dump({exob.EXDIR_METANAME: {exob.TYPE_METANAME: exob.GROUP_TYPENAME}}, meta_file)
+    assert exob.object_type(f.directory / "new") == exob.GROUP_TYPENAME
+
+
 def test_root_directory(setup_teardown_file):
     f = setup_teardown_file[3]
     grp = f.create_group("foo")
@@ -0,0 +1,111 @@
+import os
+import pytest
+import numpy as np
+import quantities as pq
+
+from exdir.core import File
+from exdir.core import tree_index
+
+
+def create_channel_groups(f):
+    ephys = f.require_group("processing").require_group("electrophysiology")
+    for i in range(3):
+        channel_group = ephys.create_group("channel_group_{}".format(i))
+        channel_group.attrs["electrode_group_id"] = i
+        lfp = channel_group.create_group("LFP")
+        for j in range(2):
+            timeseries = lfp.create_group("LFP_timeseries_{}".format(j))
+            timeseries.attrs["electrode_group_id"] = i
+            data = timeseries.create_dataset(
+                "data", data=np.zeros((10, 4), dtype=np.int16) * pq.uV
+            )
+    f.require_group("processing").create_raw("raw")
+    f.create_dataset("chunked", data=np.arange(10.0), chunks=3)
+
+
+def test_index(setup_teardown_file):
+    f = setup_teardown_file[3]
+    create_channel_groups(f)
+
+    index = f.index()
+
+    assert index["/"]["type"] == "file"
+    assert index["/processing/raw"]["type"] == "raw"
+    data = index["/processing/electrophysiology/channel_group_1/LFP/LFP_timeseries_0/data"]
+    assert data["type"] == "dataset"
+    assert data["shape"] == (10, 4)
+    assert data["dtype"] == np.dtype(np.float64)
+    assert data["attrs"]["unit"] == "uV"
+    assert index["/chunked"]["shape"] == (10,)
+    assert len(index) == 1 + 2 + 3 * (1 + 1 + 2 * 2) + 1 + 1
+
+    assert index.find(typename="group", electrode_group_id=1) == [
+        "/processing/electrophysiology/channel_group_1",
+        "/processing/electrophysiology/channel_group_1/LFP/LFP_timeseries_0",
+        "/processing/electrophysiology/channel_group_1/LFP/LFP_timeseries_1",
+    ]
+    assert not tree_index.index_filename(f.directory).exists()
+
+
+def test_index_parallel(setup_teardown_file):
+    f = setup_teardown_file[3]
+    create_channel_groups(f)
+
+    assert dict(f.index(processes=2)) == dict(f.index())
+
+
+def test_index_persist(setup_teardown_file, monkeypatch):
+    f = setup_teardown_file[3]
+    create_channel_groups(f)
+
+    first = f.index(persist=True)
+    assert tree_index.index_filename(f.directory).exists()
+
+    scanned = []
+    original = tree_index._load_yaml
+
+    def counting_load(path):
+        scanned.append(os.path.basename(os.path.dirname(path)))
+        return original(path)
+
+    monkeypatch.setattr(tree_index, "_load_yaml", counting_load)
+
+    second = f.index(persist=True)
+    assert dict(second) == dict(first)
+    assert scanned == []
+
+    scanned.clear()
+    group = f["processing/electrophysiology/channel_group_2"]
+    group.attrs["electrode_group_id"] = 5
+    f.create_group("new")
+
+    third = f.index(persist=True)
+    assert scanned == ["channel_group_2"]
+    assert third["/processing/electrophysiology/channel_group_2"]["attrs"] == {
+        "electrode_group_id": 5
+    }
+    assert third["/new"]["type"] == "group"
+
+
+def test_index_read_only(setup_teardown_folder):
+    testfile = setup_teardown_folder[1]
+    f = File(testfile, mode="w")
+    f.create_group("foo")
+
+    f = File(testfile, mode="r")
+    assert f.index()["/foo"]["type"] == "group"
+    with pytest.raises(IOError):
+        f.index(persist=True)
+
+
+def test_index_persist_non_json_attributes(setup_teardown_file):
+    f = setup_teardown_file[3]
+    group = f.create_group("foo")
+    group.attrs[1] = "integer key"
+    group.attrs["bar"] = 2
+
+    f.index(persist=True)
+    index = f.index(persist=True)
+
+    assert index["/foo"]["attrs"] == {1: "integer key", "bar": 2}
+    assert index.find(bar=2) == ["/foo"]
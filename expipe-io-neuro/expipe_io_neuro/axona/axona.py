@@ -3,6 +3,8 @@ import exdir
 import shutil
 import glob
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 import quantities as pq
 import numpy as np
 
@@ -74,141 +76,161 @@ def make_channel_groups(exdir_path, axona_file):
     return channel_groups
 
 
+def _write_analog_signals(channel_group, axona_channel_group, analog_signals,
+                          start_time, stop_time):
+    for lfp_index, analog_signal in enumerate(analog_signals, start=1):
+        lfp = channel_group.require_group("LFP")
+
+        lfp_timeseries = lfp.require_group("LFP_timeseries_{}".format(lfp_index))
+        # TODO analog signals have only one channel
+        lfp_timeseries.attrs["num_samples"] = len(analog_signal.signal)
+        lfp_timeseries.attrs["start_time"] = start_time
+        lfp_timeseries.attrs["stop_time"] = stop_time
+        lfp_timeseries.attrs["sample_rate"] = analog_signal.sample_rate
+        lfp_timeseries.attrs["electrode_identity"] = analog_signal.channel_id
+        lfp_timeseries.attrs["electrode_idx"] = analog_signal.channel_id - axona_channel_group.channel_group_id * 4
+        lfp_timeseries.attrs['electrode_group_id'] = axona_channel_group.channel_group_id
+        data = lfp_timeseries.require_dataset("data", data=analog_signal.signal)
+        data.attrs["num_samples"] = len(analog_signal.signal)
+        # NOTE: In exdirio (python-neo) sample rate is required on dset #TODO
+        data.attrs["sample_rate"] = analog_signal.sample_rate
+
+
+def _write_clusters(channel_group, spike_train, cut, start_time, stop_time):
+    units = np.unique(cut.indices)
+    cluster = channel_group.require_group("Clustering")
+    cluster.attrs["start_time"] = start_time
+    cluster.attrs["stop_time"] = stop_time
+    # TODO: Add _ peak_over_rms as described in NWB
+    cluster.attrs["peak_over_rms"] = None
+    times = cluster.require_dataset("times", data=spike_train.times)
+    times.attrs["num_samples"] = len(spike_train.times)
+    clnums = cluster.require_dataset("cluster_nums", data=units)
+    clnums.attrs["num_samples"] = len(units)
+    nums = cluster.require_dataset("nums", data=cut.indices-1)  # -1 for python convention
+    nums.attrs["num_samples"] = len(cut.indices)
+
+
+def _write_units(exdir_path, channel_group, spike_train, cut, start_time,
+                 stop_time, cluster_group=None, set_noise=False):
+    cluster_group = cluster_group or {}
+    unit_times = channel_group.require_group("UnitTimes")
+    unit_times.attrs["start_time"] = start_time
+    unit_times.attrs["stop_time"] = stop_time
+    cluster_group_units = cluster_group.get(cut.channel_group_id) or {}
+    unit_ids = [i for i in np.unique(cut.indices) if i > 0]
+    unit_ids = np.array(unit_ids)
+    if cluster_group_units:
+        if not all(key in unit_ids - 1 # -1 for python convention
+                   for key in cluster_group_units):
+            raise ValueError(
+                'cluster_group must reffer to existing cuts.' +
+                '{} did not match {} in channel_group {}. '.format(
+                    [key for key in cluster_group_units
+                     if key not in unit_ids - 1],
+                     unit_ids - 1,
+                     cut.channel_group_id) +
+                'From "' + exdir_path + '".')
+        if set_noise:
+            for cluster_id in unit_ids - 1: # -1 for python convention
+                if not cluster_id in cluster_group_units:
+                    cluster_group_units[cluster_id] = 'noise'
+    for index in unit_ids:
+        unit = unit_times.require_group("{}".format(index - 1))  # -1 for python convention
+        indices = np.where(cut.indices == index)[0]
+        times = spike_train.times[indices]
+        unit.require_dataset("times", data=times)
+        unit.attrs['num_samples'] = len(times)
+        sorting = cluster_group_units.get(int(index - 1)) # -1 for python convention
+        if sorting:
+            assert sorting.lower() in ['noise', 'good', 'unsorted']
+        unit.attrs["cluster_group"] = sorting or "good"
+        unit.attrs["cluster_id"] = int(index - 1)  # -1 for python convention
+        # TODO: Add unit_description (e.g. cell type) and source as in NWB
+        unit.attrs["source"] = None
+        unit.attrs["unit_description"] = None
+
+
+def _write_spike_train(channel_group, axona_channel_group, spike_train,
+                       start_time, stop_time):
+    event_waveform = channel_group.require_group("EventWaveform")
+    waveform_timeseries = event_waveform.require_group('waveform_timeseries')
+    channel_identities = np.array([ch.index for ch in axona_channel_group.channels])
+    waveform_timeseries.attrs["num_samples"] = spike_train.spike_count
+    waveform_timeseries.attrs["sample_length"] = spike_train.samples_per_spike
+    waveform_timeseries.attrs["num_channels"] = len(channel_identities)
+    waveform_timeseries.attrs["electrode_identities"] = channel_identities
+    waveform_timeseries.attrs["electrode_idx"] = channel_identities - channel_identities[0]
+    waveform_timeseries.attrs['electrode_group_id'] = axona_channel_group.channel_group_id
+    waveform_timeseries.attrs["start_time"] = start_time
+    waveform_timeseries.attrs["stop_time"] = stop_time
+    waveform_timeseries.attrs['sample_rate'] = spike_train.sample_rate
+    waveforms = spike_train.waveforms
+    if not isinstance(waveforms, pq.Quantity):
+        waveforms = waveforms * pq.uV # TODO fix pyxona
+    data = waveform_timeseries.require_dataset("data", data=waveforms)
+    data.attrs["num_samples"] = spike_train.spike_count
+    data.attrs["sample_length"] = spike_train.samples_per_spike
+    data.attrs["num_channels"] = len(channel_identities)
+    data.attrs['sample_rate'] = spike_train.sample_rate
+    times = waveform_timeseries.require_dataset("timestamps",
+                                                data=spike_train.times)
+    times.attrs["num_samples"] = spike_train.spike_count
+
+
+def _analog_signals_by_channel_group(axona_file):
+    analog_signals = {}
+    for analog_signal in axona_file.analog_signals:
+        channel_group_id = axona_file.channel_group(analog_signal.channel_id).channel_group_id
+        analog_signals.setdefault(channel_group_id, []).append(analog_signal)
+    return analog_signals
+
+
 def generate_analog_signals(exdir_path, axona_file):
     channel_groups = make_channel_groups(exdir_path, axona_file)
-    for channel_group_segment in channel_groups.values():
-        channel_group = channel_group_segment['channel_group']
-        axona_channel_group = channel_group_segment['axona_channel_group']
-        start_time = channel_group_segment['start_time']
-        stop_time = channel_group_segment['stop_time']
-        lfp_index = 0
-        for analog_signal in axona_file.analog_signals:
-            if axona_channel_group == axona_file.channel_group(analog_signal.channel_id):
-                lfp_index += 1
-
-                lfp = channel_group.require_group("LFP")
-
-                lfp_timeseries = lfp.require_group("LFP_timeseries_{}".format(lfp_index))
-                spike_train = axona_channel_group.spike_train
-                channel_identities = np.array([ch.index for ch in
-                                               axona_channel_group.channels])
-                # TODO analog signals have only one channel
-                lfp_timeseries.attrs["num_samples"] = len(analog_signal.signal)
-                lfp_timeseries.attrs["start_time"] = start_time
-                lfp_timeseries.attrs["stop_time"] = stop_time
-                lfp_timeseries.attrs["sample_rate"] = analog_signal.sample_rate
-                lfp_timeseries.attrs["electrode_identity"] = analog_signal.channel_id
-                lfp_timeseries.attrs["electrode_idx"] = analog_signal.channel_id - axona_channel_group.channel_group_id * 4
-                lfp_timeseries.attrs['electrode_group_id'] = axona_channel_group.channel_group_id
-                data = lfp_timeseries.require_dataset("data", data=analog_signal.signal)
-                data.attrs["num_samples"] = len(analog_signal.signal)
-                # NOTE: In exdirio (python-neo) sample rate is required on dset #TODO
-                data.attrs["sample_rate"] = analog_signal.sample_rate
+    analog_signals = _analog_signals_by_channel_group(axona_file)
+    for channel_group_id, channel_group_segment in channel_groups.items():
+        _write_analog_signals(channel_group_segment['channel_group'],
+                              channel_group_segment['axona_channel_group'],
+                              analog_signals.get(channel_group_id, []),
+                              channel_group_segment['start_time'],
+                              channel_group_segment['stop_time'])
 
 
 def generate_clusters(exdir_path, axona_file):
     channel_groups = make_channel_groups(exdir_path, axona_file)
     for channel_group_segment in channel_groups.values():
-        channel_group = channel_group_segment['channel_group']
         axona_channel_group = channel_group_segment['axona_channel_group']
-        spike_train = axona_channel_group.spike_train
-        start_time = channel_group_segment['start_time']
-        stop_time = channel_group_segment['stop_time']
         for cut in axona_file.cuts:
             if(axona_channel_group.channel_group_id == cut.channel_group_id):
-                units = np.unique(cut.indices)
-                cluster = channel_group.require_group("Clustering")
-                cluster.attrs["start_time"] = start_time
-                cluster.attrs["stop_time"] = stop_time
-                # TODO: Add _ peak_over_rms as described in NWB
-                cluster.attrs["peak_over_rms"] = None
-                times = cluster.require_dataset("times", data=spike_train.times)
-                times.attrs["num_samples"] = len(spike_train.times)
-                clnums = cluster.require_dataset("cluster_nums", data=units)
-                clnums.attrs["num_samples"] = len(units)
-                nums = cluster.require_dataset("nums", data=cut.indices-1)  # -1 for python convention
-                nums.attrs["num_samples"] = len(cut.indices)
+                _write_clusters(channel_group_segment['channel_group'],
+                                axona_channel_group.spike_train, cut,
+                                channel_group_segment['start_time'],
+                                channel_group_segment['stop_time'])
 
 
 def generate_units(exdir_path, axona_file, cluster_group=None, set_noise=False):
     channel_groups = make_channel_groups(exdir_path, axona_file)
     for channel_group_segment in channel_groups.values():
-        channel_group = channel_group_segment['channel_group']
         axona_channel_group = channel_group_segment['axona_channel_group']
-        spike_train = axona_channel_group.spike_train
-        start_time = channel_group_segment['start_time']
-        stop_time = channel_group_segment['stop_time']
-        cluster_group = cluster_group or {}
         for cut in axona_file.cuts:
             if(axona_channel_group.channel_group_id == cut.channel_group_id):
-                unit_times = channel_group.require_group("UnitTimes")
-                unit_times.attrs["start_time"] = start_time
-                unit_times.attrs["stop_time"] = stop_time
-                cluster_group_units = cluster_group.get(cut.channel_group_id) or {}
-                unit_ids = [i for i in np.unique(cut.indices) if i > 0]
-                unit_ids = np.array(unit_ids)
-                if cluster_group_units:
-                    if not all(key in unit_ids - 1 # -1 for python convention
-                               for key in cluster_group_units):
-                        raise ValueError(
-                            'cluster_group must reffer to existing cuts.' +
-                            '{} did not match {} in channel_group {}. '.format(
-                                [key for key in cluster_group_units
-                                 if key not in unit_ids - 1],
-                                 unit_ids - 1,
-                                 cut.channel_group_id) +
-                            'From "' + exdir_path + '".')
-                    if set_noise:
-                        for cluster_id in unit_ids - 1: # -1 for python convention
-                            if not cluster_id in cluster_group_units:
-                                cluster_group_units[cluster_id] = 'noise'
-                for index in unit_ids:
-                    unit = unit_times.require_group("{}".format(index - 1))  # -1 for python convention
-                    indices = np.where(cut.indices == index)[0]
-                    times = spike_train.times[indices]
-                    unit.require_dataset("times", data=times)
-                    unit.attrs['num_samples'] = len(times)
-                    sorting = cluster_group_units.get(int(index - 1)) # -1 for python convention
-                    if sorting:
-                        assert sorting.lower() in ['noise', 'good', 'unsorted']
-                    unit.attrs["cluster_group"] = sorting or "good"
-                    unit.attrs["cluster_id"] = int(index - 1)  # -1 for python convention
-                    # TODO: Add unit_description (e.g. cell type) and source as in NWB
-                    unit.attrs["source"] = None
-                    unit.attrs["unit_description"] = None
+                _write_units(exdir_path, channel_group_segment['channel_group'],
+                             axona_channel_group.spike_train, cut,
+                             channel_group_segment['start_time'],
+                             channel_group_segment['stop_time'],
+                             cluster_group=cluster_group, set_noise=set_noise)
 
 
 def generate_spike_trains(exdir_path, axona_file):
     channel_groups = make_channel_groups(exdir_path, axona_file)
     for channel_group_segment in channel_groups.values():
-        channel_group = channel_group_segment['channel_group']
         axona_channel_group = channel_group_segment['axona_channel_group']
-        start_time = channel_group_segment['start_time']
-        stop_time = channel_group_segment['stop_time']
-
-        event_waveform = channel_group.require_group("EventWaveform")
-        waveform_timeseries = event_waveform.require_group('waveform_timeseries')
-        spike_train = axona_channel_group.spike_train
-        channel_identities = np.array([ch.index for ch in axona_channel_group.channels])
-        waveform_timeseries.attrs["num_samples"] = spike_train.spike_count
-        waveform_timeseries.attrs["sample_length"] = spike_train.samples_per_spike
-        waveform_timeseries.attrs["num_channels"] = len(channel_identities)
-        waveform_timeseries.attrs["electrode_identities"] = channel_identities
-        waveform_timeseries.attrs["electrode_idx"] = channel_identities - channel_identities[0]
-        waveform_timeseries.attrs['electrode_group_id'] = axona_channel_group.channel_group_id
-        waveform_timeseries.attrs["start_time"] = start_time
-        waveform_timeseries.attrs["stop_time"] = stop_time
-        waveform_timeseries.attrs['sample_rate'] = spike_train.sample_rate
-        if not isinstance(spike_train.waveforms, pq.Quantity):
-            spike_train.waveforms = spike_train.waveforms * pq.uV # TODO fix pyxona
-        data = waveform_timeseries.require_dataset("data", data=spike_train.waveforms)
-        data.attrs["num_samples"] = spike_train.spike_count
-        data.attrs["sample_length"] = spike_train.samples_per_spike
-        data.attrs["num_channels"] = len(channel_identities)
-        data.attrs['sample_rate'] = spike_train.sample_rate
-        times = waveform_timeseries.require_dataset("timestamps",
-                                                    data=spike_train.times)
-        times.attrs["num_samples"] = spike_train.spike_count
+        _write_spike_train(channel_group_segment['channel_group'],
+                           axona_channel_group,
+                           axona_channel_group.spike_train,
+                           channel_group_segment['start_time'],
+                           channel_group_segment['stop_time'])
 
 
 def generate_tracking(exdir_path, axona_file):
@@ -253,6 +275,117 @@ def generate_inp(exdir_path, axona_file):
     vals.attrs['num_samples'] = len(vals[:])
 
 
+
+def _convert_channel_group(exdir_path, task, cluster_group=None, set_noise=False):
+    """
+    Write LFP, spike train, units and clusters of one channel group.
+
+    The tetrode file is read once. Returns the time spent in each stage.
+    """
+    timings = {}
+    exdir_file = exdir.File(exdir_path)
+    channel_group = exdir_file["processing"]["electrophysiology"][task['name']]
+    axona_channel_group = task['axona_channel_group']
+    start_time = task['start_time']
+    stop_time = task['stop_time']
+
+    t0 = time.time()
+    _write_analog_signals(channel_group, axona_channel_group,
+                          task['analog_signals'], start_time, stop_time)
+    t1 = time.time()
+    spike_train = axona_channel_group.spike_train
+    t2 = time.time()
+    _write_spike_train(channel_group, axona_channel_group, spike_train,
+                       start_time, stop_time)
+    t3 = time.time()
+    for cut in task['cuts']:
+        _write_units(exdir_path, channel_group, spike_train, cut, start_time,
+                     stop_time, cluster_group=cluster_group, set_noise=set_noise)
+    t4 = time.time()
+    for cut in task['cuts']:
+        _write_clusters(channel_group, spike_train, cut, start_time, stop_time)
+    t5 = time.time()
+
+    timings['analog_signals'] = t1 - t0
+    timings['read_spike_trains'] = t2 - t1
+    timings['spike_trains'] = t3 - t2
+    timings['units'] = t4 - t3
+    timings['clusters'] = t5 - t4
+    return timings
+
+
+def convert_session(axona_file, exdir_path, processes=None, cluster_group=None,
+                    set_noise=False, cuts=True, inp=False):
+    """
+    Convert a whole Axona session to exdir, reading each raw file once.
+
+    This does the same as convert, generate_tracking, generate_analog_signals,
+    generate_spike_trains, generate_units, generate_clusters and generate_inp
+    together. The session is planned up front: channel groups are created
+    once and the .eeg/.egf and .cut files are read once and split per
+    channel group. With processes > 1, the channel groups are then written
+    concurrently in a process pool.
+
+    Returns a dictionary with the time in seconds spent in each stage.
+    Channel group stages are summed over all channel groups, while
+    'channel_groups' is the wall time of writing all of them.
+    """
+    timings = {}
+
+    t0 = time.time()
+    convert(axona_file, exdir_path)
+    timings['copy'] = time.time() - t0
+
+    t0 = time.time()
+    generate_tracking(exdir_path, axona_file)
+    timings['tracking'] = time.time() - t0
+
+    t0 = time.time()
+    channel_groups = make_channel_groups(exdir_path, axona_file)
+    analog_signals = _analog_signals_by_channel_group(axona_file)
+    session_cuts = axona_file.cuts if cuts else []
+    tasks = []
+    for channel_group_id, channel_group_segment in sorted(channel_groups.items()):
+        tasks.append({
+            'name': "channel_group_{}".format(channel_group_id),
+            'axona_channel_group': channel_group_segment['axona_channel_group'],
+            'analog_signals': analog_signals.get(channel_group_id, []),
+            'cuts': [cut for cut in session_cuts
+                     if cut.channel_group_id == channel_group_id],
+            'start_time': channel_group_segment['start_time'],
+            'stop_time': channel_group_segment['stop_time']
+        })
+    timings['plan'] = time.time() - t0
+
+    t0 = time.time()
+    if processes is not None and processes > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [
+                executor.submit(_convert_channel_group, exdir_path, task,
+                                cluster_group, set_noise)
+                for task in tasks
+            ]
+            results = [future.result() for future in futures]
+    else:
+        results = [
+            _convert_channel_group(exdir_path, task, cluster_group, set_noise)
+            for task in tasks
+        ]
+    for result in results:
+        for stage, duration in result.items():
+            timings[stage] = timings.get(stage, 0.) + duration
+    timings['channel_groups'] = time.time() - t0
+
+    if inp:
+        t0 = time.time()
+        generate_inp(exdir_path, axona_file)
+        timings['inp'] = time.time() - t0
+
+    print('Converted "' + axona_file.session + '" in ' +
+          ', '.join('{}: {:.2f} s'.format(stage, duration)
+                    for stage, duration in timings.items()))
+    return timings
+
 # class AxonaFilerecord(Filerecord):
 #     def __init__(self, action, filerecord_id=None):
 #         super().__init__(action, filerecord_id)
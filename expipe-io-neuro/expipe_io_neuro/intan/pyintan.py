@@ -114,6 +114,491 @@ class Stimulation:
             self.stim_param.shape, self.stim_param
         )
 
+
+RHS_MAGIC_NUMBER = int('d69127ac', 16)
+RHS_SAMPLES_PER_DATA_BLOCK = 128
+
+AMPLIFIER_GAIN = 0.195  # microvolts per bit
+AMPLIFIER_OFFSET = 32768
+DC_AMPLIFIER_GAIN = -0.01923  # volts per bit
+DC_AMPLIFIER_OFFSET = 512
+BOARD_ANALOG_GAIN = 312.5e-6  # volts per bit
+BOARD_ANALOG_OFFSET = 32768
+
+
+def _read_rhs_header(f):
+    """
+    Read the header of an Intan Technologies RHS2000 data file.
+
+    Leaves f positioned at the start of the first data block.
+    """
+    # Check 'magic number' at beginning of file to make sure this is an Intan
+    # Technologies RHS2000 data file.
+    magic_number = np.fromfile(f, np.dtype('u4'), 1)
+    if magic_number != RHS_MAGIC_NUMBER:
+        raise IOError('Unrecognized file type.')
+
+    # Read version number.
+    data_file_main_version_number = np.fromfile(f, 'i2', 1)[0]
+    data_file_secondary_version_number = np.fromfile(f, 'i2', 1)[0]
+
+    # Read information of sampling rate and amplifier frequency settings.
+    sample_rate = np.fromfile(f, 'f4', 1)[0]
+    dsp_enabled = np.fromfile(f, 'i2', 1)[0]
+    actual_dsp_cutoff_frequency = np.fromfile(f, 'f4', 1)[0]
+    actual_lower_bandwidth = np.fromfile(f, 'f4', 1)[0]
+    actual_lower_settle_bandwidth = np.fromfile(f, 'f4', 1)[0]
+    actual_upper_bandwidth = np.fromfile(f, 'f4', 1)[0]
+
+    desired_dsp_cutoff_frequency = np.fromfile(f, 'f4', 1)[0]
+    desired_lower_bandwidth = np.fromfile(f, 'f4', 1)[0]
+    desired_lower_settle_bandwidth = np.fromfile(f, 'f4', 1)[0]
+    desired_upper_bandwidth = np.fromfile(f, 'f4', 1)[0]
+
+    # This tells us if a software 50/60 Hz notch filter was enabled during the data acquistion
+    notch_filter_mode = np.fromfile(f, 'i2', 1)[0]
+    notch_filter_frequency = 0
+    if notch_filter_mode == 1:
+        notch_filter_frequency = 50
+    elif notch_filter_mode == 2:
+        notch_filter_frequency = 60
+
+    desired_impedance_test_frequency = np.fromfile(f, 'f4', 1)[0]
+    actual_impedance_test_frequency = np.fromfile(f, 'f4', 1)[0]
+
+    amp_settle_mode = np.fromfile(f, 'i2', 1)[0]
+    charge_recovery_mode = np.fromfile(f, 'i2', 1)[0]
+
+    stim_step_size = np.fromfile(f, 'f4', 1)[0]
+    charge_recovery_current_limit = np.fromfile(f, 'f4', 1)[0]
+    charge_recovery_target_voltage = np.fromfile(f, 'f4', 1)[0]
+
+    # Place notes in data structure
+    notes = {'note1': _fread_QString(f),
+             'note2': _fread_QString(f),
+             'note3': _fread_QString(f)}
+
+    # See if dc amplifier was saved
+    dc_amp_data_saved = np.fromfile(f, 'i2', 1)[0]
+
+    # Load eval board mode
+    eval_board_mode = np.fromfile(f, 'i2', 1)[0]
+
+    reference_channel = _fread_QString(f)
+
+    # Place frequency-related information in data structure.
+    frequency_parameters = {
+    'amplifier_sample_rate': sample_rate * pq.Hz,
+    'board_adc_sample_rate': sample_rate * pq.Hz,
+    'board_dig_in_sample_rate': sample_rate * pq.Hz,
+    'desired_dsp_cutoff_frequency': desired_dsp_cutoff_frequency,
+    'actual_dsp_cutoff_frequency': actual_dsp_cutoff_frequency,
+    'dsp_enabled': dsp_enabled,
+    'desired_lower_bandwidth': desired_lower_bandwidth,
+    'desired_lower_settle_bandwidth': desired_lower_settle_bandwidth,
+    'actual_lower_bandwidth': actual_lower_bandwidth,
+    'actual_lower_settle_bandwidth': actual_lower_settle_bandwidth,
+    'desired_upper_bandwidth': desired_upper_bandwidth,
+    'actual_upper_bandwidth': actual_upper_bandwidth,
+    'notch_filter_frequency': notch_filter_frequency,
+    'desired_impedance_test_frequency': desired_impedance_test_frequency,
+    'actual_impedance_test_frequency': actual_impedance_test_frequency}
+
+    stim_parameters = {
+    'stim_step_size': stim_step_size,
+    'charge_recovery_current_limit': charge_recovery_current_limit,
+    'charge_recovery_target_voltage': charge_recovery_target_voltage,
+    'amp_settle_mode': amp_settle_mode,
+    'charge_recovery_mode': charge_recovery_mode}
+
+    spike_triggers = []
+
+    # Create structure arrays for each type of data channel.
+    amplifier_channels = []
+    board_adc_channels = []
+    board_dac_channels = []
+    board_dig_in_channels = []
+    board_dig_out_channels = []
+
+    # Read signal summary from data file header.
+    number_of_signal_groups = np.fromfile(f, 'i2', 1)[0]
+
+    for signal_group in range(number_of_signal_groups):
+        signal_group_name = _fread_QString(f)
+        signal_group_prefix = _fread_QString(f)
+        signal_group_enabled = np.fromfile(f, 'i2', 1)[0]
+        signal_group_num_channels = np.fromfile(f, 'i2', 1)[0]
+        signal_group_num_amp_channels = np.fromfile(f, 'i2', 1)[0]
+
+        if signal_group_num_channels > 0 and signal_group_enabled > 0:
+            new_channel = {}
+            new_trigger_channel = {}
+
+            new_channel['port_name'] = signal_group_name
+            new_channel['port_prefix'] = signal_group_prefix
+            new_channel['port_number'] = signal_group
+            for signal_channel in range(signal_group_num_channels):
+                new_channel['native_channel_name'] = _fread_QString(f)
+                new_channel['custom_channel_name'] = _fread_QString(f)
+                new_channel['native_order'] = np.fromfile(f, 'i2', 1)[0]
+                new_channel['custom_order'] = np.fromfile(f, 'i2', 1)[0]
+                signal_type = np.fromfile(f, 'i2', 1)[0]
+                channel_enabled = np.fromfile(f, 'i2', 1)[0]
+                new_channel['chip_channel'] = np.fromfile(f, 'i2', 1)[0]
+                skip = np.fromfile(f, 'i2', 1)[0] # ignore command_stream
+                new_channel['board_stream'] = np.fromfile(f, 'i2', 1)[0]
+                new_trigger_channel['voltage_trigger_mode'] = np.fromfile(f, 'i2', 1)[0]
+                new_trigger_channel['voltage_threshold'] = np.fromfile(f, 'i2', 1)[0]
+                new_trigger_channel['digital_trigger_channel'] = np.fromfile(f, 'i2', 1)[0]
+                new_trigger_channel['digital_edge_polarity'] = np.fromfile(f, 'i2', 1)[0]
+                new_channel['electrode_impedance_magnitude'] = np.fromfile(f, 'f4', 1)[0]
+                new_channel['electrode_impedance_phase'] = np.fromfile(f, 'f4', 1)[0]
+
+                if channel_enabled:
+                    if signal_type == 0:
+                        amplifier_channels.append(new_channel.copy())
+                        spike_triggers.append(new_trigger_channel.copy())
+                    elif signal_type == 1:
+                        # aux inputs not used in RHS2000 system
+                        pass
+                    elif signal_type == 2:
+                        # supply voltage not used in RHS2000 system
+                        pass
+                    elif signal_type == 3:
+                        board_adc_channels.append(new_channel.copy())
+                    elif signal_type == 4:
+                        board_dac_channels.append(new_channel.copy())
+                    elif signal_type == 5:
+                        board_dig_in_channels.append(new_channel.copy())
+                    elif signal_type == 6:
+                        board_dig_out_channels.append(new_channel.copy())
+                    else:
+                        raise Exception('Unknown channel type')
+
+    return {
+        'version': (data_file_main_version_number,
+                    data_file_secondary_version_number),
+        'sample_rate': sample_rate,
+        'frequency_parameters': frequency_parameters,
+        'stim_parameters': stim_parameters,
+        'notes': notes,
+        'dc_amp_data_saved': dc_amp_data_saved != 0,
+        'eval_board_mode': eval_board_mode,
+        'reference_channel': reference_channel,
+        'amplifier_channels': amplifier_channels,
+        'spike_triggers': spike_triggers,
+        'board_adc_channels': board_adc_channels,
+        'board_dac_channels': board_dac_channels,
+        'board_dig_in_channels': board_dig_in_channels,
+        'board_dig_out_channels': board_dig_out_channels
+    }
+
+
+def rhs_block_dtype(num_amplifier_channels, num_board_adc_channels=0,
+                    num_board_dac_channels=0, board_dig_in=False,
+                    board_dig_out=False, dc_amp_data_saved=False):
+    """
+    Structured dtype describing one data block of an RHS2000 data file.
+
+    Amplifier, stimulation and board analog fields have the shape
+    (channels, samples), digital fields hold one 16-bit word per sample.
+    """
+    n = RHS_SAMPLES_PER_DATA_BLOCK
+    fields = [('timestamps', '<i4', (n,))]
+    if num_amplifier_channels > 0:
+        fields.append(('amplifier', '<u2', (num_amplifier_channels, n)))
+        if dc_amp_data_saved:
+            fields.append(('dc_amplifier', '<u2', (num_amplifier_channels, n)))
+        fields.append(('stimulation', '<u2', (num_amplifier_channels, n)))
+    if num_board_adc_channels > 0:
+        fields.append(('board_adc', '<u2', (num_board_adc_channels, n)))
+    if num_board_dac_channels > 0:
+        fields.append(('board_dac', '<u2', (num_board_dac_channels, n)))
+    if board_dig_in:
+        fields.append(('board_dig_in', '<u2', (n,)))
+    if board_dig_out:
+        fields.append(('board_dig_out', '<u2', (n,)))
+    return np.dtype(fields)
+
+
+def decode_stimulation(raw, stim_step_size):
+    """
+    Split raw stimulation words into the stimulation current (in microamps)
+    and the amplifier settle, charge recovery and compliance limit flags.
+    """
+    raw = np.asarray(raw, dtype='u2')
+    compliance_limit = (raw & 2 ** 15) != 0
+    charge_recovery = (raw & 2 ** 14) != 0
+    amp_settle = (raw & 2 ** 13) != 0
+    negative = (raw & 2 ** 8) != 0
+    magnitude = (raw & ~np.uint16(2 ** 15 | 2 ** 14 | 2 ** 13 | 2 ** 8)).astype(float)
+    magnitude[negative] *= -1
+    current = stim_step_size * magnitude / float(1e-6)  # units = microamps
+    return current, amp_settle, charge_recovery, compliance_limit
+
+
+class RHSStream:
+    """
+    Lazy view of one stream in the memory-mapped data blocks of an RHS file.
+
+    Multichannel streams have the shape (channels, samples), the others
+    (samples,). Indexing reads only the blocks that cover the requested
+    samples and returns the raw integers, time_slice returns a window in
+    physical units.
+    """
+    def __init__(self, blocks, field, sample_rate, gain=1., offset=0,
+                 units=pq.dimensionless):
+        self._blocks = blocks
+        self._field = field
+        self.sample_rate = sample_rate
+        self.gain = gain
+        self.offset = offset
+        self.units = units
+        field_dtype = blocks.dtype[field]
+        self.dtype = field_dtype.base
+        num_samples = len(blocks) * RHS_SAMPLES_PER_DATA_BLOCK
+        if len(field_dtype.shape) == 2:
+            self.shape = (field_dtype.shape[0], num_samples)
+        else:
+            self.shape = (num_samples,)
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __array__(self, dtype=None):
+        result = self[...]
+        if dtype is not None:
+            result = result.astype(dtype)
+        return result
+
+    def _read(self, channel, start, stop):
+        n = RHS_SAMPLES_PER_DATA_BLOCK
+        first_block = start // n
+        last_block = -(-stop // n)
+        blocks = self._blocks[self._field][first_block:last_block]
+        if channel is not None:
+            blocks = blocks[:, channel]
+        if blocks.ndim == 3:
+            # (blocks, channels, samples) -> (channels, blocks * samples)
+            data = np.moveaxis(blocks, 0, 1).reshape(blocks.shape[1], -1)
+        else:
+            data = blocks.reshape(-1)
+        offset = first_block * n
+        return data[..., start - offset:stop - offset]
+
+    def __getitem__(self, key):
+        if key is Ellipsis:
+            key = ()
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > 0 and key[0] is Ellipsis:
+            key = (slice(None),) * (self.ndim - len(key) + 1) + key[1:]
+        if len(key) > self.ndim:
+            raise IndexError('Too many indices for stream of shape {}'.format(self.shape))
+        key = key + (slice(None),) * (self.ndim - len(key))
+        if self.ndim == 2:
+            channel, samples = key
+        else:
+            channel, samples = None, key[0]
+
+        num_samples = self.shape[-1]
+        if isinstance(samples, slice):
+            start, stop, step = samples.indices(num_samples)
+            if step > 0:
+                return self._read(channel, start, max(start, stop))[..., ::step]
+            samples = np.arange(start, stop, step)
+        elif np.isscalar(samples):
+            index = int(samples)
+            if index < 0:
+                index += num_samples
+            if not 0 <= index < num_samples:
+                raise IndexError('Sample index {} out of range'.format(samples))
+            return self._read(channel, index, index + 1)[..., 0]
+        samples = np.asarray(samples)
+        samples = np.where(samples < 0, samples + num_samples, samples)
+        if samples.size == 0:
+            return self._read(channel, 0, 0)[..., samples]
+        low = int(samples.min())
+        return self._read(channel, low, int(samples.max()) + 1)[..., samples - low]
+
+    def to_physical(self, raw):
+        """Convert raw samples from this stream to physical units."""
+        return (np.asarray(raw, dtype=float) - self.offset) * self.gain * self.units
+
+    def time_slice(self, t_start, t_stop, channel=slice(None)):
+        """
+        Return the samples between t_start and t_stop in physical units.
+
+        Times are measured from the first sample in the file, in seconds
+        unless given as quantities.
+        """
+        start = _time_to_sample(t_start, self.sample_rate)
+        stop = _time_to_sample(t_stop, self.sample_rate)
+        if self.ndim == 2:
+            raw = self[channel, start:stop]
+        else:
+            raw = self[start:stop]
+        return self.to_physical(raw)
+
+
+class RHSStimulationStream(RHSStream):
+    """
+    Lazy view of the stimulation words in an RHS file. to_physical returns
+    the stimulation current; use decode_stimulation to get the flags.
+    """
+    def __init__(self, blocks, sample_rate, stim_step_size):
+        super(RHSStimulationStream, self).__init__(blocks, 'stimulation',
+                                                   sample_rate, units=pq.uA)
+        self.stim_step_size = stim_step_size
+
+    def to_physical(self, raw):
+        current = decode_stimulation(raw, self.stim_step_size)[0]
+        return current * self.units
+
+
+def _time_to_sample(t, sample_rate):
+    if isinstance(t, pq.Quantity):
+        t = t.rescale(pq.s).magnitude
+    return int(round(float(t) * sample_rate))
+
+
+class RHSData:
+    """
+    Memory-mapped data section of an Intan RHS2000 data file.
+
+    Each stream (amplifier, dc_amplifier, stimulation, board_adc, board_dac,
+    board_dig_in and board_dig_out) is an RHSStream, or None if it is not
+    present in the file. Nothing is converted to float before it is read.
+    """
+    def __init__(self, filepath):
+        with open(filepath, 'rb') as f:
+            self.header = _read_rhs_header(f)
+            data_offset = f.tell()
+            filesize = os.fstat(f.fileno()).st_size
+
+        header = self.header
+        self.sample_rate = float(header['sample_rate'])
+        self.block_dtype = rhs_block_dtype(
+            num_amplifier_channels=len(header['amplifier_channels']),
+            num_board_adc_channels=len(header['board_adc_channels']),
+            num_board_dac_channels=len(header['board_dac_channels']),
+            board_dig_in=len(header['board_dig_in_channels']) > 0,
+            board_dig_out=len(header['board_dig_out_channels']) > 0,
+            dc_amp_data_saved=header['dc_amp_data_saved']
+        )
+        num_blocks = (filesize - data_offset) // self.block_dtype.itemsize
+        if num_blocks > 0:
+            self._blocks = np.memmap(filepath, dtype=self.block_dtype, mode='r',
+                                     offset=data_offset, shape=(num_blocks,))
+        else:
+            self._blocks = np.zeros(0, dtype=self.block_dtype)
+
+        def stream(field, **kwargs):
+            if field not in self.block_dtype.names:
+                return None
+            return RHSStream(self._blocks, field, self.sample_rate, **kwargs)
+
+        self.timestamps = stream('timestamps')
+        self.amplifier = stream('amplifier', gain=AMPLIFIER_GAIN,
+                                offset=AMPLIFIER_OFFSET, units=pq.uV)
+        self.dc_amplifier = stream('dc_amplifier', gain=DC_AMPLIFIER_GAIN,
+                                   offset=DC_AMPLIFIER_OFFSET, units=pq.V)
+        if 'stimulation' in self.block_dtype.names:
+            self.stimulation = RHSStimulationStream(
+                self._blocks, self.sample_rate,
+                header['stim_parameters']['stim_step_size'])
+        else:
+            self.stimulation = None
+        self.board_adc = stream('board_adc', gain=BOARD_ANALOG_GAIN,
+                                offset=BOARD_ANALOG_OFFSET, units=pq.V)
+        self.board_dac = stream('board_dac', gain=BOARD_ANALOG_GAIN,
+                                offset=BOARD_ANALOG_OFFSET, units=pq.V)
+        self.board_dig_in = stream('board_dig_in')
+        self.board_dig_out = stream('board_dig_out')
+
+    @property
+    def num_data_blocks(self):
+        return len(self._blocks)
+
+    @property
+    def num_samples(self):
+        return self.num_data_blocks * RHS_SAMPLES_PER_DATA_BLOCK
+
+    @property
+    def duration(self):
+        return self.num_samples / self.sample_rate * pq.s
+
+    def times(self, start=0, stop=None):
+        """Sample times in seconds, from the recorded timestamps."""
+        return self.timestamps[start:stop] / self.sample_rate * pq.s
+
+
+def _digital_edge_times(stream, channels, t):
+    """Times of the rising edges on each digital channel."""
+    if stream is None:
+        return np.array([])
+    raw = stream[:]
+    if np.count_nonzero(raw) == 0:
+        return np.array([])
+    edge_times = []
+    for channel in channels:
+        # find idx of high level
+        idx_high = np.where(raw & (1 << int(channel['native_order'])) > 0)
+        rising, falling = get_rising_falling_edges(idx_high)
+        edge_times.append(t[rising])
+    return np.array(edge_times)
+
+
+def _flag_times(channel_flags, t):
+    """Times where a channel has the given stimulation flag set."""
+    return t[np.flatnonzero(channel_flags)] if np.any(channel_flags) else []
+
+
+def _stimulation_data(stream, num_channels, stim_step_size, t):
+    """
+    Stimulation current of the channels with nonzero current, and the times
+    of the amplifier settle, charge recovery and compliance limit flags on
+    each channel. The stream is decoded one channel at a time, so memory is
+    bounded by the samples of one channel rather than the whole recording.
+    """
+    stim_channels = []
+    stim_signal = []
+    flag_times = ([], [], [])
+    stimulated = False
+    for channel in range(num_channels):
+        raw = stream[channel]
+        if not np.any(raw):
+            for times in flag_times:
+                times.append([])
+            continue
+        stimulated = True
+        current, *flags = decode_stimulation(raw, stim_step_size)
+        if np.any(current != 0):
+            stim_channels.append(channel)
+            stim_signal.append(current)
+        for times, channel_flags in zip(flag_times, flags):
+            times.append(_flag_times(channel_flags, t))
+    if not stimulated:
+        return None
+    stim_signal = np.array(stim_signal) if stim_signal else np.zeros((0, len(t)))
+    return (np.array(stim_channels, dtype=int), stim_signal) + \
+        tuple(np.array(times) for times in flag_times)
+
+
+def _board_analog_data(stream):
+    """Board ADC or DAC samples in volts, or an empty array if all are zero."""
+    if stream is None:
+        return np.array([])
+    raw = stream[:]
+    if np.count_nonzero(raw) == 0:
+        return np.array([])
+    return stream.to_physical(raw).magnitude
+
+
 class File:
     """
     Class for reading experimental data from an OpenEphys dataset.
@@ -124,6 +609,7 @@ class File:
         self._absolute_foldername = op.split(filename)[0]
         self._channel_info = dict()
         self._channel_groups_dirty = True
+        self._raw_data = None
 
         filenames = [f for f in os.listdir(self._absolute_foldername)]
         if any('amp.dat' in f for f in filenames) and not no_load:
@@ -264,8 +750,17 @@ class File:
                 # save amp.dat
                 fdat = op.join(self._absolute_foldername, 'amp.dat')
                 print('Saving ', fdat)
-                with open(fdat, 'wb') as f:
-                    np.array(data['amplifier_data'], dtype='float32').tofile(f)
+                amplifier = data['amplifier_data']
+                amp_data = np.memmap(fdat, np.dtype('f4'), mode='w+',
+                                     shape=amplifier.shape)
+                # convert a window at a time to keep memory usage bounded
+                window = RHS_SAMPLES_PER_DATA_BLOCK * 1024
+                for start in range(0, amplifier.shape[1], window):
+                    stop = start + window
+                    amp_data[:, start:stop] = amplifier.to_physical(
+                        amplifier[:, start:stop]).magnitude
+                amp_data.flush()
+                del amp_data
 
                 # save binary_data.npz
                 fbin = op.join(self._absolute_foldername, 'binary_data')
@@ -352,6 +847,13 @@ class File:
     def times(self):
         return self._times
 
+    @property
+    def raw_data(self):
+        """Memory-mapped RHS data blocks, see RHSData."""
+        if self._raw_data is None:
+            self._raw_data = RHSData(self._absolute_filename)
+        return self._raw_data
+
 
     def _read_channel_groups(self):
         self._channel_id_to_channel_group = {}
@@ -444,207 +946,33 @@ class File:
         data = dict()
         print('Loading intan data')
 
-        f = open(filepath, 'rb')
-        filesize = os.fstat(f.fileno()).st_size - f.tell()
-
-        # Check 'magic number' at beginning of file to make sure this is an Intan
-        # Technologies RHS2000 data file.
-        magic_number = np.fromfile(f, np.dtype('u4'), 1)
-        if magic_number != int('d69127ac', 16):
-            raise IOError('Unrecognized file type.')
-
-        # Read version number.
-        data_file_main_version_number = np.fromfile(f, 'i2', 1)[0]
-        data_file_secondary_version_number = np.fromfile(f, 'i2', 1)[0]
-
-        print('Reading Intan Technologies RHS2000 Data File, Version ', data_file_main_version_number, \
-            data_file_secondary_version_number)
-
-        num_samples_per_data_block = 128
-
-        # Read information of sampling rate and amplifier frequency settings.
-        sample_rate = np.fromfile(f, 'f4', 1)[0]
-        dsp_enabled = np.fromfile(f, 'i2', 1)[0]
-        actual_dsp_cutoff_frequency = np.fromfile(f, 'f4', 1)[0]
-        actual_lower_bandwidth = np.fromfile(f, 'f4', 1)[0]
-        actual_lower_settle_bandwidth = np.fromfile(f, 'f4', 1)[0]
-        actual_upper_bandwidth = np.fromfile(f, 'f4', 1)[0]
-
-        desired_dsp_cutoff_frequency = np.fromfile(f, 'f4', 1)[0]
-        desired_lower_bandwidth = np.fromfile(f, 'f4', 1)[0]
-        desired_lower_settle_bandwidth = np.fromfile(f, 'f4', 1)[0]
-        desired_upper_bandwidth = np.fromfile(f, 'f4', 1)[0]
-
-        # This tells us if a software 50/60 Hz notch filter was enabled during the data acquistion
-        notch_filter_mode = np.fromfile(f, 'i2', 1)[0]
-        notch_filter_frequency = 0
-        if notch_filter_mode == 1:
-            notch_filter_frequency = 50
-        elif notch_filter_mode == 2:
-            notch_filter_frequency = 60
-
-        desired_impedance_test_frequency = np.fromfile(f, 'f4', 1)[0]
-        actual_impedance_test_frequency = np.fromfile(f, 'f4', 1)[0]
-
-        amp_settle_mode = np.fromfile(f, 'i2', 1)[0]
-        charge_recovery_mode = np.fromfile(f, 'i2', 1)[0]
-
-        stim_step_size = np.fromfile(f, 'f4', 1)[0]
-        charge_recovery_current_limit = np.fromfile(f, 'f4', 1)[0]
-        charge_recovery_target_voltage = np.fromfile(f, 'f4', 1)[0]
-
-        # Place notes in data structure
-        notes = {'note1': _fread_QString(f),
-                 'note2': _fread_QString(f),
-                 'note3': _fread_QString(f)}
-
-        # See if dc amplifier was saved
-        dc_amp_data_saved = np.fromfile(f, 'i2', 1)[0]
-
-        # Load eval board mode
-        eval_board_mode = np.fromfile(f, 'i2', 1)[0]
-
-        reference_channel = _fread_QString(f)
-
-        # Place frequency-related information in data structure.
-        frequency_parameters = {
-        'amplifier_sample_rate': sample_rate * pq.Hz,
-        'board_adc_sample_rate': sample_rate * pq.Hz,
-        'board_dig_in_sample_rate': sample_rate * pq.Hz,
-        'desired_dsp_cutoff_frequency': desired_dsp_cutoff_frequency,
-        'actual_dsp_cutoff_frequency': actual_dsp_cutoff_frequency,
-        'dsp_enabled': dsp_enabled,
-        'desired_lower_bandwidth': desired_lower_bandwidth,
-        'desired_lower_settle_bandwidth': desired_lower_settle_bandwidth,
-        'actual_lower_bandwidth': actual_lower_bandwidth,
-        'actual_lower_settle_bandwidth': actual_lower_settle_bandwidth,
-        'desired_upper_bandwidth': desired_upper_bandwidth,
-        'actual_upper_bandwidth': actual_upper_bandwidth,
-        'notch_filter_frequency': notch_filter_frequency,
-        'desired_impedance_test_frequency': desired_impedance_test_frequency,
-        'actual_impedance_test_frequency': actual_impedance_test_frequency}
-
-        stim_parameters = {
-        'stim_step_size': stim_step_size,
-        'charge_recovery_current_limit': charge_recovery_current_limit,
-        'charge_recovery_target_voltage': charge_recovery_target_voltage,
-        'amp_settle_mode': amp_settle_mode,
-        'charge_recovery_mode': charge_recovery_mode}
-
-        # Define data structure for spike trigger settings.
-        spike_trigger_struct = {
-        'voltage_trigger_mode': {},
-        'voltage_threshold': {},
-        'digital_trigger_channel': {},
-        'digital_edge_polarity': {} }
-
-
-        spike_triggers = []
-
-        # Define data structure for data channels.
-        channel_struct = {
-        'native_channel_name': {},
-        'custom_channel_name': {},
-        'native_order': {},
-        'custom_order': {},
-        'board_stream': {},
-        'chip_channel': {},
-        'port_name': {},
-        'port_prefix': {},
-        'port_number': {},
-        'electrode_impedance_magnitude': {},
-        'electrode_impedance_phase': {} }
-
-        # Create structure arrays for each type of data channel.
-        amplifier_channels = []
-        board_adc_channels = []
-        board_dac_channels = []
-        board_dig_in_channels = []
-        board_dig_out_channels = []
-
-        amplifier_index = 0
-        board_adc_index = 0
-        board_dac_index = 0
-        board_dig_in_index = 0
-        board_dig_out_index = 0
-
-        # Read signal summary from data file header.
-
-        number_of_signal_groups = np.fromfile(f, 'i2', 1)[0]
-        print('Signal groups: ', number_of_signal_groups)
-
-        for signal_group in range(number_of_signal_groups):
-            signal_group_name = _fread_QString(f)
-            signal_group_prefix = _fread_QString(f)
-            signal_group_enabled = np.fromfile(f, 'i2', 1)[0]
-            signal_group_num_channels = np.fromfile(f, 'i2', 1)[0]
-            signal_group_num_amp_channels = np.fromfile(f, 'i2', 1)[0]
-
-            if signal_group_num_channels > 0 and signal_group_enabled > 0:
-                new_channel = {}
-                new_trigger_channel = {}
-
-                new_channel['port_name'] = signal_group_name
-                new_channel['port_prefix'] = signal_group_prefix
-                new_channel['port_number'] = signal_group
-                for signal_channel in range(signal_group_num_channels):
-                    new_channel['native_channel_name'] = _fread_QString(f)
-                    new_channel['custom_channel_name'] = _fread_QString(f)
-                    new_channel['native_order'] = np.fromfile(f, 'i2', 1)[0]
-                    new_channel['custom_order'] = np.fromfile(f, 'i2', 1)[0]
-                    signal_type = np.fromfile(f, 'i2', 1)[0]
-                    channel_enabled = np.fromfile(f, 'i2', 1)[0]
-                    new_channel['chip_channel'] = np.fromfile(f, 'i2', 1)[0]
-                    skip = np.fromfile(f, 'i2', 1)[0] # ignore command_stream
-                    new_channel['board_stream'] = np.fromfile(f, 'i2', 1)[0]
-                    new_trigger_channel['voltage_trigger_mode'] = np.fromfile(f, 'i2', 1)[0]
-                    new_trigger_channel['voltage_threshold'] = np.fromfile(f, 'i2', 1)[0]
-                    new_trigger_channel['digital_trigger_channel'] = np.fromfile(f, 'i2', 1)[0]
-                    new_trigger_channel['digital_edge_polarity'] = np.fromfile(f, 'i2', 1)[0]
-                    new_channel['electrode_impedance_magnitude'] = np.fromfile(f, 'f4', 1)[0]
-                    new_channel['electrode_impedance_phase'] = np.fromfile(f, 'f4', 1)[0]
-
-                    if channel_enabled:
-                        if signal_type == 0:
-                            ch = new_channel.copy()
-                            amplifier_channels.append(ch)
-                            spike_triggers.append(new_trigger_channel)
-                            amplifier_index = amplifier_index + 1
-                        elif signal_type == 1:
-                            # aux inputs not used in RHS2000 system
-                            pass
-                        elif signal_type == 2:
-                            # supply voltage not used in RHS2000 system
-                            pass
-                        elif signal_type == 3:
-                            ch = new_channel.copy()
-                            board_adc_channels.append(ch)
-                            board_adc_index = board_adc_index + 1
-                        elif signal_type == 4:
-                            ch = new_channel.copy()
-                            board_dac_channels.append(ch)
-                            board_dac_index = board_dac_index + 1
-                        elif signal_type == 5:
-                            ch = new_channel.copy()
-                            board_dig_in_channels.append(ch)
-                            board_dig_in_index = board_dig_in_index + 1
-                        elif signal_type == 6:
-                            ch = new_channel.copy()
-                            board_dig_out_channels.append(ch)
-                            board_dig_out_index = board_dig_out_index + 1
-                        else:
-                            raise Exception('Unknown channel type')
+        rhs = RHSData(filepath)
+        header = rhs.header
+        data_file_main_version_number = header['version'][0]
+
+        print('Reading Intan Technologies RHS2000 Data File, Version ', header['version'][0], \
+            header['version'][1])
 
+        sample_rate = header['sample_rate']
+        frequency_parameters = header['frequency_parameters']
+        stim_parameters = header['stim_parameters']
+        dc_amp_data_saved = header['dc_amp_data_saved']
+
+        amplifier_channels = header['amplifier_channels']
+        board_adc_channels = header['board_adc_channels']
+        board_dac_channels = header['board_dac_channels']
+        board_dig_in_channels = header['board_dig_in_channels']
+        board_dig_out_channels = header['board_dig_out_channels']
 
         # Summarize contents of data file.
-        num_amplifier_channels = amplifier_index
-        num_board_adc_channels = board_adc_index
-        num_board_dac_channels = board_dac_index
-        num_board_dig_in_channels = board_dig_in_index
-        num_board_dig_out_channels = board_dig_out_index
+        num_amplifier_channels = len(amplifier_channels)
+        num_board_adc_channels = len(board_adc_channels)
+        num_board_dac_channels = len(board_dac_channels)
+        num_board_dig_in_channels = len(board_dig_in_channels)
+        num_board_dig_out_channels = len(board_dig_out_channels)
 
         print('Found ', num_amplifier_channels, ' amplifier channel' , _plural(num_amplifier_channels))
-        if dc_amp_data_saved != 0:
+        if dc_amp_data_saved:
             print('Found ', num_amplifier_channels, 'DC amplifier channel' , _plural(num_amplifier_channels))
         print('Found ', num_board_adc_channels, ' board ADC channel' , _plural(num_board_adc_channels))
         print('Found ', num_board_dac_channels, ' board DAC channel' , _plural(num_board_adc_channels))
@@ -652,38 +980,9 @@ class File:
         print('Found ', num_board_dig_out_channels, ' board digital output channel' , _plural(num_board_dig_out_channels))
 
         # Determine how many samples the data file contains.
-
-        # Each data block contains num_samplesper_data_block amplifier samples
-        bytes_per_block = num_samples_per_data_block * 4  # timestamp data
-        if dc_amp_data_saved != 0:
-            bytes_per_block += num_samples_per_data_block * (2 + 2 + 2) * num_amplifier_channels
-        else:
-            bytes_per_block += num_samples_per_data_block * (2 + 2) * num_amplifier_channels
-        # Board analog inputs are sampled at same rate as amplifiers
-        bytes_per_block += num_samples_per_data_block * 2 * num_board_adc_channels
-        # Board analog outputs are sampled at same rate as amplifiers
-        bytes_per_block += num_samples_per_data_block * 2 * num_board_dac_channels
-        # Board digital inputs are sampled at same rate as amplifiers
-        if num_board_dig_in_channels > 0:
-            bytes_per_block += num_samples_per_data_block * 2
-        # Board digital outputs are sampled at same rate as amplifiers
-        if num_board_dig_out_channels > 0:
-            bytes_per_block += num_samples_per_data_block * 2
-
-        # How many data blocks remain in this file?
-        data_present = 0
-        bytes_remaining = filesize - f.tell()
-        if bytes_remaining > 0:
-            data_present = 1
-
-
-        num_data_blocks = int(bytes_remaining / bytes_per_block)
-
-        num_amplifier_samples = num_samples_per_data_block * num_data_blocks
-        num_board_adc_samples = num_samples_per_data_block * num_data_blocks
-        num_board_dac_samples = num_samples_per_data_block * num_data_blocks
-        num_board_dig_in_samples = num_samples_per_data_block * num_data_blocks
-        num_board_dig_out_samples = num_samples_per_data_block * num_data_blocks
+        num_data_blocks = rhs.num_data_blocks
+        num_amplifier_samples = rhs.num_samples
+        data_present = num_data_blocks > 0
 
         record_time = num_amplifier_samples / sample_rate
 
@@ -693,335 +992,110 @@ class File:
         else:
             print('Header file contains no data.  Amplifiers were sampled at ', sample_rate / 1000 ,  'kS/s.')
 
-        if data_present:
-
-            anas_gain = 0.195
-            anas_offset = 32768
-            dc_gain = -0.01923
-            dc_offset = 512
+        # Create data dictionary
+        data['notes'] = header['notes']
+        data['frequency_parameters'] = frequency_parameters
+        data['stim_parameters'] = stim_parameters
+        if data_file_main_version_number > 1:
+            data['reference_channel'] = header['reference_channel']
+        if num_amplifier_channels > 0:
+            data['amplifier_channels'] = amplifier_channels
+            data['spike_triggers'] = header['spike_triggers']
+        for name, channels in [('board_adc', board_adc_channels),
+                               ('board_dac', board_dac_channels),
+                               ('board_dig_in', board_dig_in_channels),
+                               ('board_dig_out', board_dig_out_channels)]:
+            if len(channels) > 0:
+                data[name + '_channels'] = channels
+            else:
+                data[name + '_channels'] = np.array([])
+                data[name + '_data'] = np.array([])
 
+        if data_present:
             self._channel_info['gain'] = {}
             for ch in np.arange(num_amplifier_channels):
-                self._channel_info['gain'][str(ch)] = anas_gain
-
-            if not load_binary:
-                # Pre-allocate memory for data.
-                print('Allocating memory for data')
-
-                t = np.zeros(num_amplifier_samples)
-
-                amplifier_data = np.zeros((num_amplifier_channels, num_amplifier_samples))
-                if dc_amp_data_saved != 0:
-                    dc_amplifier_data = np.zeros((num_amplifier_channels, num_amplifier_samples))
-
-                stim_data = np.zeros((num_amplifier_channels, num_amplifier_samples))
-                board_adc_data = np.zeros((num_board_adc_channels, num_board_adc_samples))
-                board_dac_data = np.zeros((num_board_dac_channels, num_board_dac_samples))
-                board_dig_in_raw = np.zeros(num_board_dig_in_samples)
-                board_dig_out_raw = np.zeros(num_board_dig_out_samples)
-
-                # Read sampled data from file.
-                print('Reading data from file')
-
-                amplifier_index = 0
-                board_adc_index = 0
-                board_dac_index = 0
-                board_dig_in_index = 0
-                board_dig_out_index = 0
-
-                print_increment = 10
-                percent_done = print_increment
-
-                print('num_data_blocks: ', num_data_blocks)
-
-                for i in range(num_data_blocks):
-                    t[amplifier_index:(amplifier_index + num_samples_per_data_block)] = \
-                        np.fromfile(f, 'i4', num_samples_per_data_block)
-                    if num_amplifier_channels > 0:
-                        amplifier_data[:, amplifier_index:(amplifier_index + num_samples_per_data_block)] = \
-                            np.reshape(np.fromfile(f, 'u2', num_samples_per_data_block*num_amplifier_channels),
-                                        (num_amplifier_channels, num_samples_per_data_block))
-                        if dc_amp_data_saved != 0:
-                            dc_amplifier_data[:, amplifier_index:(amplifier_index + num_samples_per_data_block)] = \
-                                np.reshape(np.fromfile(f, 'u2', num_samples_per_data_block * num_amplifier_channels),
-                                           (num_amplifier_channels, num_samples_per_data_block))
-                        stim_data[:, amplifier_index:(amplifier_index + num_samples_per_data_block)] = \
-                            np.reshape(np.fromfile(f, 'u2', num_samples_per_data_block * num_amplifier_channels),
-                                       (num_amplifier_channels, num_samples_per_data_block))
-
-                    if num_board_adc_channels > 0:
-                        board_adc_data[:, board_adc_index:(board_adc_index + num_samples_per_data_block)] = \
-                            np.reshape(np.fromfile(f, 'u2', num_samples_per_data_block*num_board_adc_channels),
-                                        (num_board_adc_channels, num_samples_per_data_block))
-                    if num_board_dac_channels > 0:
-                        board_dac_data[:, board_dac_index:(board_dac_index + num_samples_per_data_block)] = \
-                            np.reshape(np.fromfile(f, 'u2', num_samples_per_data_block*num_board_dac_channels),
-                                        (num_board_dac_channels, num_samples_per_data_block))
-                    if num_board_dig_in_channels > 0:
-                        board_dig_in_raw[board_dig_in_index:(board_dig_in_index + num_samples_per_data_block)] = \
-                        np.fromfile(f, 'u2', num_samples_per_data_block)
-                    if num_board_dig_out_channels > 0:
-                        board_dig_out_raw[board_dig_out_index:(board_dig_out_index + num_samples_per_data_block)] = \
-                        np.fromfile(f, 'u2', num_samples_per_data_block)
-
-                    amplifier_index += num_samples_per_data_block
-                    board_adc_index += num_samples_per_data_block
-                    board_dac_index += num_samples_per_data_block
-                    board_dig_in_index += num_samples_per_data_block
-                    board_dig_out_index += num_samples_per_data_block
-
-                    fraction_done = 100 * float((i+1) / float(num_data_blocks))
-                    if fraction_done >= percent_done:
-                        print(percent_done, '% done')
-                        percent_done += print_increment
-
-                # Make sure we have read exactly the right amount of data.
-                bytes_remaining = filesize - f.tell()
-                if bytes_remaining != 0:
-                    # raise Error('Error: End of file not reached.')
-                    pass
-
-                # Close data file.
-                f.close()
-
-                t2 = time.time()
-                print('Loading done. time: ', t2 - t1)
-
-                if data_present:
-
-                    print('Parsing data')
-
-                    # Check for gaps in timestamps.
-                    num_gaps = len(np.where(np.diff(t) != 1)[0])
-                    if num_gaps == 0:
-                        print('No missing timestamps in data.')
-                    else:
-                        print('Warning: ', num_gaps, ' gaps in timestamp data found.  Time scale will not be uniform!')
-                    # Scale time steps (units = seconds).
-                    t = t / frequency_parameters['amplifier_sample_rate']
-
-                    # # Extract digital input channels times separate variables.
-                    if np.count_nonzero(board_dig_in_raw) != 0:
-                        board_dig_in_data = []
-                        for i in range(num_board_dig_in_channels):
-                            # find idx of high level
-                            mask = 2**board_dig_in_channels[i]['native_order']*np.ones(len(board_dig_in_raw))
-                            idx_high = np.where(np.bitwise_and(board_dig_in_raw.astype(dtype='int'),
-                                                               mask.astype(dtype='int')) > 0)
-                            rising, falling = get_rising_falling_edges(idx_high)
-                            board_dig_in_data.append(t[rising])
-                        board_dig_in_data = np.array(board_dig_in_data)
-                    else:
-                        print('No digital input data')
-                        board_dig_in_data = np.array([])
-
-                    if np.count_nonzero(board_dig_out_raw) != 0:
-                        board_dig_out_data = []
-                        for i in range(num_board_dig_out_channels):
-                            # find idx of high level
-                            mask = 2 ** board_dig_out_channels[i]['native_order'] * np.ones(len(board_dig_out_raw))
-                            print(mask.shape, len(board_dig_out_data))
-                            idx_high = np.where(np.bitwise_and(board_dig_out_raw.astype(dtype='int'),
-                                                               mask.astype(dtype='int')) > 0)
-                            rising, falling = get_rising_falling_edges(idx_high)
-                            board_dig_out_data.append(t[rising])
-                        board_dig_out_data = np.array(board_dig_out_data)
-                    else:
-                        print('No digital output data')
-                        board_dig_out_data = np.array([])
-
-                    # Clear variables
-                    del board_dig_out_raw
-                    del board_dig_in_raw
-
-                    #TODO optimize memory-wise: e.g. only save time and chan of compliance, ampsett, charge recovery as list
-
-                    # Scale voltage levels appropriately.
-                    amplifier_data -= anas_offset  # units = microvolts
-                    amplifier_data *= anas_gain  # units = microvolts
-                    if dc_amp_data_saved != 0:
-                        dc_amplifier_data -= dc_offset  # units = volts
-                        dc_amplifier_data *= dc_gain  # units = volts
-
-
-                    if np.count_nonzero(stim_data) != 0:
-                        # TODO only save stim channel and respective signals waveform
-                        stim_polarity = np.zeros((num_amplifier_channels, num_amplifier_samples))
-
-                        compliance_limit_data_idx = np.where(stim_data >= 2 ** 15)
-                        stim_data[compliance_limit_data_idx] -= 2 ** 15
-                        charge_recovery_data_idx = np.where(stim_data >= 2 ** 14)
-                        stim_data[charge_recovery_data_idx] -= 2 ** 14
-                        amp_settle_data_idx = np.where(stim_data >= 2 ** 13)
-                        stim_data[amp_settle_data_idx] -= 2 ** 13
-
-                        stim_polarity_idx = np.where(stim_data >= 2 ** 8)
-                        stim_polarity[stim_polarity_idx] = 1
-                        stim_data[stim_polarity_idx] -= 2 ** 8
-                        stim_polarity = 1 - 2 * stim_polarity  # convert(0 = pos, 1 = neg) to + / -1
-                        stim_data *= stim_polarity
-                        stim_data = stim_parameters['stim_step_size'] * stim_data / float(1e-6)  # units = microamps
-
-                        stim_channels = []
-                        stim_signal = []
-
-                        for ch, stim in enumerate(stim_data):
-                            if np.count_nonzero(stim) != 0:
-                                stim_channels.append(ch)
-                                stim_signal.append(stim)
-                        stim_channels = np.array(stim_channels)
-                        stim_signal = np.array(stim_signal)
-
-                        # Clear variables
-                        del stim_polarity, stim_data
-
-                        amp_settle_data = []
-                        charge_recovery_data = []
-                        compliance_limit_data = []
-
-                        for chan in np.arange(num_amplifier_channels):
-                            if len(np.where(amp_settle_data_idx[0] == chan)[0]) != 0:
-                                amp_settle_data.append(t[amp_settle_data_idx[1][np.where(amp_settle_data_idx[0] == chan)[0]]])
-                            else:
-                                amp_settle_data.append([])
-                            if len(np.where(charge_recovery_data_idx[0] == chan)[0]) != 0:
-                                charge_recovery_data.append(
-                                    t[charge_recovery_data_idx[1][np.where(charge_recovery_data_idx[0] == chan)[0]]])
-                            else:
-                                charge_recovery_data.append([])
-                            if len(np.where(compliance_limit_data_idx[0] == chan)[0]) != 0:
-                                compliance_limit_data.append(
-                                    t[compliance_limit_data_idx[1][np.where(compliance_limit_data_idx[0] == chan)[0]]])
-                            else:
-                                compliance_limit_data.append([])
-
-                        amp_settle_data = np.array(amp_settle_data)
-                        charge_recovery_data = np.array(charge_recovery_data)
-                        compliance_limit_data = np.array(compliance_limit_data)
-                    else:
-                        print('No stimulation data')
-                        stim_channels = np.array([])
-                        stim_signal = np.array([])
-                        amp_settle_data = np.array([])
-                        charge_recovery_data = np.array([])
-                        compliance_limit_data = np.array([])
-
-                    if np.count_nonzero(board_adc_data) != 0:
-                        board_adc_data -= 32768  # units = volts
-                        board_adc_data *= 312.5e-6  # units = volts
-                    else:
-                        del board_adc_data
-                        print('No ADC data')
-                        board_adc_data = np.array([])
-
-                    if np.count_nonzero(board_dac_data) != 0:
-                        board_dac_data -= 32768  # units = volts
-                        board_dac_data *= 312.5e-6  # units = volts
-                    else:
-                        del board_dac_data
-                        print('No DAC data')
-                        board_dac_data = np.array([])
-
-                    t3 = time.time()
-                    print('Parsing done. time: ', t3 - t2)
-
-                # Create data dictionary
-                print('Creating data structure...')
-                data['notes'] = notes
-                data['frequency_parameters'] = frequency_parameters
-                data['stim_parameters'] =  stim_parameters
-                if data_file_main_version_number > 1:
-                    data['reference_channel'] = reference_channel
-
-                if num_amplifier_channels > 0:
-                    data['amplifier_channels'] = amplifier_channels
-                    if data_present:
-                        data['amplifier_data'] = amplifier_data
-                        if dc_amp_data_saved != 0:
-                            data['dc_amplifier_data'] = dc_amplifier_data
-
-                        data['stim_channels'] = stim_channels
-                        data['stim_signal'] = stim_signal
-                        data['amp_settle_data'] = amp_settle_data
-                        data['charge_recovery_data'] = charge_recovery_data
-                        data['compliance_limit_data'] = compliance_limit_data
-                        data['t'] = t
-
-                    data['spike_triggers'] = spike_triggers
-
-                if num_board_adc_channels > 0:
-                    data['board_adc_channels'] = board_adc_channels
-                    if data_present:
-                        data['board_adc_data'] = board_adc_data
-                else:
-                    data['board_adc_data'] = np.array([])
-                    data['board_adc_channels'] = np.array([])
-
-                if num_board_dac_channels > 0:
-                    data['board_dac_channels'] = board_dac_channels
-                    if data_present:
-                        data['board_dac_data'] = board_dac_data
-                else:
-                    data['board_dac_data'] = np.array([])
-                    data['board_dac_channels'] = np.array([])
-
-                if num_board_dig_in_channels > 0:
-                    data['board_dig_in_channels'] = board_dig_in_channels
-                    if data_present:
-                        data['board_dig_in_data'] = board_dig_in_data
-                else:
-                    data['board_dig_in_data'] = np.array([])
-                    data['board_dig_in_channels'] = np.array([])
-
-
-                if num_board_dig_out_channels > 0:
-                    data['board_dig_out_channels'] = board_dig_out_channels
-                    if data_present:
-                        data['board_dig_out_data'] = board_dig_out_data
-                else:
-                    data['board_dig_out_data'] = np.array([])
-                    data['board_dig_out_channels'] = np.array([])
-
-
-                if data_present:
-                    print('Extracted data are now available in the python workspace.')
-                else:
-                    print('Extracted waveform information is now available in the python workspace.')
+                self._channel_info['gain'][str(ch)] = AMPLIFIER_GAIN
+
+        if data_present and not load_binary:
+            # The data blocks are memory-mapped, so streams are only read
+            # (and converted) where they are needed below
+            print('Reading data from file')
+            t = rhs.timestamps[:]
+
+            t2 = time.time()
+            print('Loading done. time: ', t2 - t1)
+            print('Parsing data')
+
+            # Check for gaps in timestamps.
+            num_gaps = len(np.where(np.diff(t) != 1)[0])
+            if num_gaps == 0:
+                print('No missing timestamps in data.')
+            else:
+                print('Warning: ', num_gaps, ' gaps in timestamp data found.  Time scale will not be uniform!')
+            # Scale time steps (units = seconds).
+            t = t / frequency_parameters['amplifier_sample_rate']
+
+            board_dig_in_data = _digital_edge_times(
+                rhs.board_dig_in, board_dig_in_channels, t)
+            if len(board_dig_in_data) == 0:
+                print('No digital input data')
+            board_dig_out_data = _digital_edge_times(
+                rhs.board_dig_out, board_dig_out_channels, t)
+            if len(board_dig_out_data) == 0:
+                print('No digital output data')
+
+            stimulation = None
+            if num_amplifier_channels > 0:
+                stimulation = _stimulation_data(
+                    rhs.stimulation, num_amplifier_channels,
+                    stim_parameters['stim_step_size'], t)
+            if stimulation is not None:
+                (stim_channels, stim_signal, amp_settle_data,
+                 charge_recovery_data, compliance_limit_data) = stimulation
             else:
-                # Create data dictionary
-                print('Creating data structure...')
-                data['notes'] = notes
-                data['frequency_parameters'] = frequency_parameters
-                data['stim_parameters'] = stim_parameters
-                if data_file_main_version_number > 1:
-                    data['reference_channel'] = reference_channel
-                if num_amplifier_channels > 0:
-                    data['amplifier_channels'] = amplifier_channels
-                    data['spike_triggers'] = spike_triggers
-
-                if num_board_adc_channels > 0:
-                    data['board_adc_channels'] = board_adc_channels
-                else:
-                    data['board_adc_channels'] = np.array([])
-
-                if num_board_dac_channels > 0:
-                    data['board_dac_channels'] = board_dac_channels
-                else:
-                    data['board_dac_channels'] = np.array([])
-
-                if num_board_dig_in_channels > 0:
-                    data['board_dig_in_channels'] = board_dig_in_channels
-                else:
-                    data['board_dig_in_channels'] = np.array([])
-
-                if num_board_dig_out_channels > 0:
-                    data['board_dig_out_channels'] = board_dig_out_channels
-                else:
-                    data['board_dig_out_channels'] = np.array([])
-
-                if data_present:
-                    print('Extracted data are now available in the python workspace.')
-                else:
-                    print('Extracted waveform information is now available in the python workspace.')
-
-        return data
\ No newline at end of file
+                print('No stimulation data')
+                stim_channels = np.array([])
+                stim_signal = np.array([])
+                amp_settle_data = np.array([])
+                charge_recovery_data = np.array([])
+                compliance_limit_data = np.array([])
+
+            board_adc_data = _board_analog_data(rhs.board_adc)
+            if len(board_adc_data) == 0:
+                print('No ADC data')
+            board_dac_data = _board_analog_data(rhs.board_dac)
+            if len(board_dac_data) == 0:
+                print('No DAC data')
+
+            t3 = time.time()
+            print('Parsing done. time: ', t3 - t2)
+
+            if num_amplifier_channels > 0:
+                # NOTE left as raw, memory-mapped streams, use to_physical
+                # or time_slice to get microvolts
+                data['amplifier_data'] = rhs.amplifier
+                if dc_amp_data_saved:
+                    data['dc_amplifier_data'] = rhs.dc_amplifier
+
+                data['stim_channels'] = stim_channels
+                data['stim_signal'] = stim_signal
+                data['amp_settle_data'] = amp_settle_data
+                data['charge_recovery_data'] = charge_recovery_data
+                data['compliance_limit_data'] = compliance_limit_data
+                data['t'] = t
+
+            if num_board_adc_channels > 0:
+                data['board_adc_data'] = board_adc_data
+            if num_board_dac_channels > 0:
+                data['board_dac_data'] = board_dac_data
+            if num_board_dig_in_channels > 0:
+                data['board_dig_in_data'] = board_dig_in_data
+            if num_board_dig_out_channels > 0:
+                data['board_dig_out_data'] = board_dig_out_data
+
+        if data_present:
+            print('Extracted data are now available in the python workspace.')
+        else:
+            print('Extracted waveform information is now available in the python workspace.')
+
+        return data
@@ -5,7 +5,8 @@ import os
 import quantities as pq
 import numpy as np
 import scipy.signal as ss
-import copy
+
+from .tools import iter_chunks, ChunkedSosFilter, ChunkedDecimator
 
 
 # from expipe.core import Filerecord
@@ -62,44 +63,107 @@ def _prepare_channel_groups(exdir_path, openephys_rec):
     return exdir_channel_groups
 
 
-def generate_lfp(exdir_path, openephys_rec):
+def _read_chunks(openephys_rec, channel_ids, chunk_duration, lookahead):
+    """
+    Read the signals of the given channels in chunks of chunk_duration,
+    each followed by up to lookahead samples of the next chunk.
+    """
+    signal = openephys_rec.analog_signals[0].signal
+    num_samples = signal.shape[-1]
+    chunk_size = int(chunk_duration.rescale(pq.s) * openephys_rec.sample_rate.rescale(pq.Hz))
+    for start, stop, end in iter_chunks(num_samples, max(chunk_size, 1), lookahead):
+        yield stop - start, np.asarray(signal[channel_ids, start:end], dtype=float)
+
+
+def _require_timeseries(group, name, gain):
+    timeseries = group.require_group(name)
+    if "data" in timeseries:
+        # NOTE start over, the data of an earlier or interrupted run is replaced
+        data = timeseries["data"]
+        if data.chunks is not None:
+            data.resize(0)
+            return timeseries, data
+        # contiguous datasets from earlier versions cannot be appended to
+        shutil.rmtree(str(data.directory))
+    # NOTE appended to chunk by chunk, so memory is bounded by the chunk size
+    data = timeseries.create_dataset("data", data=np.zeros(0) * gain,
+                                     chunks=True, maxshape=(None,))
+    return timeseries, data
+
+
+def _finish_timeseries(timeseries, data, openephys_rec, openephys_channel_group,
+                       channel_id, sample_rate):
+    num_samples = len(data)
+    t_stop = num_samples / sample_rate
+    assert round(t_stop, 1) == round(openephys_rec.duration, 1), '{}, {}'.format(t_stop, openephys_rec.duration)
+    timeseries.attrs["num_samples"] = num_samples
+    timeseries.attrs["start_time"] = 0 * pq.s
+    timeseries.attrs["stop_time"] = t_stop
+    timeseries.attrs["sample_rate"] = sample_rate
+    timeseries.attrs["electrode_identity"] = channel_id
+    timeseries.attrs["electrode_idx"] = channel_id - openephys_channel_group.id * 4
+    timeseries.attrs['electrode_group_id'] = openephys_channel_group.id
+    data.attrs["num_samples"] = num_samples
+    # NOTE: In exdirio (python-neo) sample rate is required on dset #TODO
+    data.attrs["sample_rate"] = sample_rate
+
+
+def generate_lfp(exdir_path, openephys_rec, chunk_duration=10*pq.s,
+                 overlap=0.2*pq.s):
+    '''
+    Low-pass filter and decimate the signals to 1 kHz LFP.
+
+    The recording is processed in chunks of chunk_duration for all channels
+    in a channel group at once, and each chunk is appended to the exdir
+    datasets, so memory use is bounded by the chunk size.
+
+    Parameters
+    ----------
+    exdir_path : path
+        path to exdir directory
+    openephys_rec :
+        pyopenephys.core.Recording object
+    chunk_duration : float*pq.s
+        duration of each chunk. Default is 10 s
+    overlap : float*pq.s
+        how far past each chunk the zero-phase filter looks ahead. Default is 0.2 s
+    '''
     exdir_channel_groups = _prepare_channel_groups(exdir_path, openephys_rec)
+    target_rate = 1000 * pq.Hz
+    q = int(round(float(openephys_rec.sample_rate / target_rate)))
+    sample_rate = openephys_rec.sample_rate / q
+    lookahead = int(overlap.rescale(pq.s) * openephys_rec.sample_rate.rescale(pq.Hz))
     for channel_group, openephys_channel_group in zip(exdir_channel_groups,
                                                       openephys_rec.channel_groups):
         lfp = channel_group.require_group("LFP")
         group_id = openephys_channel_group.id
         print('Generating LFP, channel group ', group_id)
-        for channel in openephys_channel_group.channels:
-                lfp_timeseries = lfp.require_group(
-                    "LFP_timeseries_{}".format(channel.index)
-                )
-                analog_signal = openephys_channel_group.analog_signals[channel.index]
-                # decimate
-                target_rate = 1000 * pq.Hz
-                signal = np.array(analog_signal.signal, dtype=float)
-                sample_rate = copy.copy(openephys_rec.sample_rate)
-                qs = [10, int((openephys_rec.sample_rate / target_rate) / 10)]
-                for q in qs:
-                    signal = ss.decimate(signal, q=q, zero_phase=True)
-                    sample_rate /= q
-                t_stop = len(signal) / sample_rate
-                assert round(t_stop, 1) == round(openephys_rec.duration, 1), '{}, {}'.format(t_stop, openephys_rec.duration)
-                signal = signal * channel.gain
-                lfp_timeseries.attrs["num_samples"] = len(signal)
-                lfp_timeseries.attrs["start_time"] = 0 * pq.s
-                lfp_timeseries.attrs["stop_time"] = t_stop
-                lfp_timeseries.attrs["sample_rate"] = sample_rate
-                lfp_timeseries.attrs["electrode_identity"] = analog_signal.channel_id
-                lfp_timeseries.attrs["electrode_idx"] = analog_signal.channel_id - openephys_channel_group.id * 4
-                lfp_timeseries.attrs['electrode_group_id'] = group_id
-                data = lfp_timeseries.require_dataset("data", data=signal)
-                data.attrs["num_samples"] = len(signal)
-                # NOTE: In exdirio (python-neo) sample rate is required on dset #TODO
-                data.attrs["sample_rate"] = sample_rate
+        channels = openephys_channel_group.channels
+        timeseries = [
+            _require_timeseries(lfp, "LFP_timeseries_{}".format(channel.index),
+                                channel.gain)
+            for channel in channels
+        ]
+        decimator = ChunkedDecimator(q)
+        for commit, signal in _read_chunks(openephys_rec, [ch.id for ch in channels],
+                                           chunk_duration, lookahead):
+            signal = decimator.decimate(signal, commit)
+            for (_, data), channel_signal, channel in zip(timeseries, signal, channels):
+                data.append(channel_signal * channel.gain)
+        for (lfp_timeseries, data), channel in zip(timeseries, channels):
+            _finish_timeseries(lfp_timeseries, data, openephys_rec,
+                               openephys_channel_group, channel.id, sample_rate)
 
 
-def generate_mua(exdir_path, openephys_rec, N=2, fcrit=300.*pq.Hz, car=True):
+def generate_mua(exdir_path, openephys_rec, N=2, fcrit=300.*pq.Hz, car=True,
+                 chunk_duration=10*pq.s, overlap=0.2*pq.s):
     '''
+    High-pass filter, rectify and decimate the signals to 1 kHz MUA.
+
+    The recording is processed in chunks of chunk_duration for all channels
+    in a channel group at once, so the common average is computed once per
+    chunk and memory use is bounded by the chunk size.
+
     Parameters
     ----------
     exdir_path : path
@@ -112,58 +176,46 @@ def generate_mua(exdir_path, openephys_rec, N=2, fcrit=300.*pq.Hz, car=True):
         Critical frequency for butterworth highpass filter
     car : bool
         subtract the mean non-rectified mua from the signals. Default is True
+    chunk_duration : float*pq.s
+        duration of each chunk. Default is 10 s
+    overlap : float*pq.s
+        how far past each chunk the zero-phase filters look ahead. Default is 0.2 s
     '''
     exdir_channel_groups = _prepare_channel_groups(exdir_path, openephys_rec)
+    target_rate = 1000 * pq.Hz
+    q = int(round(float(openephys_rec.sample_rate / target_rate)))
+    sample_rate = openephys_rec.sample_rate / q
+    lookahead = int(overlap.rescale(pq.s) * openephys_rec.sample_rate.rescale(pq.Hz))
+    wn = float(fcrit.rescale(pq.Hz) / openephys_rec.sample_rate.rescale(pq.Hz) / 2)
+    sos = ss.butter(N=N, Wn=wn, btype='high', output='sos')
     for channel_group, openephys_channel_group in zip(exdir_channel_groups,
                                                       openephys_rec.channel_groups):
         mua = channel_group.require_group("MUA")
         group_id = openephys_channel_group.id
         print('Generating MUA, channel group ', group_id)
-        if car:
-            for i, channel in enumerate(openephys_channel_group.channels):
-                analog_signal = openephys_channel_group.analog_signals[channel.index]
-                sample_rate = copy.copy(openephys_rec.sample_rate)
-                b, a = ss.butter(N=N, Wn=(fcrit/sample_rate/2), btype='high')
-                if i == 0:
-                    mean = ss.filtfilt(b, a, np.array(analog_signal.signal, dtype=float), axis=-1)
-                else:
-                    mean += ss.filtfilt(b, a, np.array(analog_signal.signal, dtype=float), axis=-1)
-
-            mean /= len(openephys_channel_group.analog_signals)
-
-        for channel in openephys_channel_group.channels:
-            mua_timeseries = mua.require_group(
-                "MUA_timeseries_{}".format(channel.index)
-            )
-            analog_signal = openephys_channel_group.analog_signals[channel.index]
-            # highpass-filter data
-            target_rate = 1000 * pq.Hz
-            signal = np.array(analog_signal.signal, dtype=float)
-            sample_rate = copy.copy(openephys_rec.sample_rate)
-            b, a = ss.butter(N=N, Wn=(fcrit/sample_rate/2), btype='high')
-            signal = ss.filtfilt(b, a, signal, axis=-1)
+        channels = openephys_channel_group.channels
+        timeseries = [
+            _require_timeseries(mua, "MUA_timeseries_{}".format(channel.index),
+                                channel.gain)
+            for channel in channels
+        ]
+        highpass = ChunkedSosFilter(sos)
+        decimator = ChunkedDecimator(q)
+        # NOTE read twice the lookahead, the decimator needs lookahead of
+        # the rectified signal, which in turn needs lookahead to be filtered
+        for commit, signal in _read_chunks(openephys_rec, [ch.id for ch in channels],
+                                           chunk_duration, 2 * lookahead):
+            signal = highpass.filter(signal, commit)
             if car:
-                signal -= mean
+                signal -= signal.mean(axis=0)
             # rectify
-            signal = abs(signal)
-            # decimate
-            q = int(openephys_rec.sample_rate / target_rate)
-            signal = ss.decimate(signal, q=q, n=q*2, ftype='fir', zero_phase=True)
-            sample_rate /= q
-            t_stop = len(signal) / sample_rate
-            assert round(t_stop, 1) == round(openephys_rec.duration, 1), '{}, {}'.format(t_stop, openephys_rec.duration)
-            signal = signal * channel.gain
-            mua_timeseries.attrs["num_samples"] = len(signal)
-            mua_timeseries.attrs["start_time"] = 0 * pq.s
-            mua_timeseries.attrs["stop_time"] = t_stop
-            mua_timeseries.attrs["sample_rate"] = sample_rate
-            mua_timeseries.attrs["electrode_identity"] = analog_signal.channel_id
-            mua_timeseries.attrs["electrode_idx"] = analog_signal.channel_id - openephys_channel_group.id * 4
-            mua_timeseries.attrs['electrode_group_id'] = group_id
-            data = mua_timeseries.require_dataset("data", data=signal)
-            data.attrs["num_samples"] = len(signal)
-            # NOTE: In exdirio (python-neo) sample rate is required on dset #TODO
-            data.attrs["sample_rate"] = sample_rate
+            signal = abs(signal[:, :commit + lookahead])
+            signal = decimator.decimate(signal, commit)
+            for (_, data), channel_signal, channel in zip(timeseries, signal, channels):
+                data.append(channel_signal * channel.gain)
+        for (mua_timeseries, data), channel in zip(timeseries, channels):
+            _finish_timeseries(mua_timeseries, data, openephys_rec,
+                               openephys_channel_group, channel.id, sample_rate)
 
 
 def generate_spike_trains(exdir_path, openephys_rec, source='klusta'):
@@ -6,6 +6,7 @@ import quantities as pq
 import os
 import os.path as op
 import numpy as np
+import scipy.signal as ss
 import locale
 import struct
 import platform
@@ -512,3 +513,88 @@ def assign_ttl(soft_ts, ttl):
         else:
             ts[i], ttl_idx[i] = find_nearest(ttl, s_ts, greater_than=ts[i-1])
     return ts, ttl_idx
+
+
+def iter_chunks(num_samples, chunk_size, overlap):
+    '''
+    Split num_samples into consecutive chunks.
+
+    :param num_samples: total number of samples
+    :param chunk_size: number of samples in each chunk (the last may be shorter)
+    :param overlap: number of samples to read past the end of each chunk
+    :return: iterator over (start, stop, end) where [start, stop) is the chunk
+             and [stop, end) the lookahead
+    '''
+    for start in range(0, num_samples, chunk_size):
+        stop = min(start + chunk_size, num_samples)
+        yield start, stop, min(stop + overlap, num_samples)
+
+
+class ChunkedSosFilter:
+    '''
+    Filters (channels, samples) chunks with second-order sections,
+    continuing from the previous chunk.
+
+    The forward pass carries its state from chunk to chunk, so it gives the
+    same result as filtering the whole signal at once. With zero_phase, each
+    chunk is also filtered backwards, starting from the end of its
+    lookahead samples, which approximates sosfiltfilt as long as the
+    lookahead is longer than the filter transient.
+    '''
+    def __init__(self, sos, zero_phase=True):
+        self.sos = np.asarray(sos)
+        self.zero_phase = zero_phase
+        self._zi = None
+
+    def _steady_state(self, samples):
+        # filter state as if the signal had been constant at samples forever
+        return ss.sosfilt_zi(self.sos)[:, np.newaxis, :] * samples[np.newaxis, :, np.newaxis]
+
+    def filter(self, x, commit=None):
+        '''
+        :param x: array of shape (channels, samples), the chunk followed by
+                  its lookahead
+        :param commit: number of samples in the chunk, only these advance
+                       the filter state. Defaults to all of x.
+        :return: filtered x, the lookahead part is only an estimate
+        '''
+        x = np.asarray(x, dtype=float)
+        num_samples = x.shape[-1]
+        if commit is None:
+            commit = num_samples
+        if num_samples == 0:
+            return x.copy()
+        if self._zi is None:
+            self._zi = self._steady_state(x[:, 0])
+        y, zi = ss.sosfilt(self.sos, x[:, :commit], axis=-1, zi=self._zi)
+        if commit < num_samples:
+            lookahead, _ = ss.sosfilt(self.sos, x[:, commit:], axis=-1, zi=zi)
+            y = np.concatenate((y, lookahead), axis=-1)
+        self._zi = zi
+        if not self.zero_phase:
+            return y
+        backward = y[:, ::-1]
+        backward, _ = ss.sosfilt(self.sos, backward, axis=-1,
+                                 zi=self._steady_state(backward[:, 0]))
+        return backward[:, ::-1]
+
+
+class ChunkedDecimator:
+    '''
+    Low-pass filters and downsamples (channels, samples) chunks by an
+    integer factor q, using the same Chebyshev type I filter as
+    scipy.signal.decimate. Which samples are kept is tracked across chunks.
+    '''
+    def __init__(self, q, order=8, zero_phase=True):
+        self.q = int(q)
+        sos = ss.cheby1(order, 0.05, 0.8 / self.q, output='sos')
+        self._filter = ChunkedSosFilter(sos, zero_phase=zero_phase)
+        self._position = 0
+
+    def decimate(self, x, commit=None):
+        if commit is None:
+            commit = np.shape(x)[-1]
+        y = self._filter.filter(x, commit)[:, :commit]
+        first = (-self._position) % self.q
+        self._position += commit
+        return y[:, first::self.q]
@@ -31,3 +31,128 @@
 #     expipe.axona.generate_units(exdir_path)
 #     expipe.axona.generate_inp(exdir_path)
 #     expipe.axona.generate_tracking(exdir_path)
+
+
+import os
+import pytest
+import numpy as np
+import quantities as pq
+
+exdir = pytest.importorskip('exdir')
+pyxona = pytest.importorskip('pyxona')
+
+from expipe_io_neuro.axona import axona
+
+
+def _write_raw(filename, attrs, data):
+    header = ''.join('{} {}\r\n'.format(key, value) for key, value in attrs.items())
+    with open(filename, 'wb') as f:
+        f.write(header.encode('latin-1'))
+        f.write(b'data_start')
+        f.write(data.tobytes())
+        f.write(b'\r\ndata_end\r\n')
+
+
+def write_axona_session(directory, num_channel_groups=4, num_spikes=1000,
+                        duration=10, seed=0):
+    """Write a synthetic Axona session with one LFP channel per channel group."""
+    rng = np.random.RandomState(seed)
+    basename = os.path.join(str(directory), 'session')
+    set_attrs = {
+        'trial_date': 'Thursday, 31 Oct 2013',
+        'trial_time': '10:00:00',
+        'duration': duration,
+        'ADC_fullscale_mv': 1500,
+        'tracked_spots': 1
+    }
+    for channel in range(num_channel_groups * 4):
+        set_attrs['gain_ch_{}'.format(channel)] = 10000
+        set_attrs['mode_ch_{}'.format(channel)] = 0
+        set_attrs['b_in_ch_{}'.format(channel)] = channel
+        set_attrs['ref_{}'.format(channel)] = channel
+    for group in range(num_channel_groups):
+        set_attrs['EEG_ch_{}'.format(group + 1)] = group * 4
+    with open(basename + '.set', 'w') as f:
+        f.write(''.join('{} {}\r\n'.format(key, value) for key, value in set_attrs.items()))
+
+    for group in range(num_channel_groups):
+        dtype = np.dtype([('times', '>u4'), ('waveforms', 'i1', (50,))])
+        data = np.zeros(num_spikes * 4, dtype=dtype)
+        times = np.sort(rng.randint(0, duration * 96000, num_spikes))
+        data['times'] = np.repeat(times, 4)
+        data['waveforms'] = rng.randint(-128, 128, data['waveforms'].shape)
+        _write_raw(basename + '.{}'.format(group + 1), {
+            'num_spikes': num_spikes, 'num_chans': 4, 'samples_per_spike': 50,
+            'timebase': '96000 hz', 'bytes_per_timestamp': 4,
+            'bytes_per_sample': 1, 'rawrate': 48000
+        }, data)
+
+        with open(basename + '_{}.cut'.format(group + 1), 'w') as f:
+            f.write('n_clusters: 3\nExact_cut_for: session spikes: {}\n'.format(num_spikes))
+            f.write(' '.join(str(i) for i in rng.randint(0, 4, num_spikes)) + '\n')
+
+        suffix = '' if group == 0 else str(group + 1)
+        num_samples = duration * 250
+        _write_raw(basename + '.eeg' + suffix, {
+            'num_EEG_samples': num_samples, 'sample_rate': '250.0 hz',
+            'bytes_per_sample': 1, 'num_chans': 1
+        }, rng.randint(-128, 128, num_samples).astype('i1'))
+
+    num_positions = duration * 50
+    dtype = np.dtype([('t', '>i4'), ('coords', '>i2', (2,)), ('pixel_count', '>i4', (2,))])
+    data = np.zeros(num_positions, dtype=dtype)
+    data['t'] = np.arange(num_positions)
+    data['coords'] = rng.randint(0, 500, (num_positions, 2))
+    _write_raw(basename + '.pos', {
+        'sample_rate': '50.0 hz', 'EEG_samples_per_position': 5,
+        'num_pos_samples': num_positions, 'bytes_per_timestamp': 4,
+        'bytes_per_coord': 2, 'timebase': '50.0 hz',
+        'window_min_x': 0, 'window_max_x': 500,
+        'window_min_y': 0, 'window_max_y': 500
+    }, data)
+    return basename + '.set'
+
+
+def convert_per_stage(axona_file, exdir_path):
+    axona.convert(axona_file, exdir_path)
+    axona.generate_tracking(exdir_path, axona_file)
+    axona.generate_analog_signals(exdir_path, axona_file)
+    axona.generate_spike_trains(exdir_path, axona_file)
+    axona.generate_units(exdir_path, axona_file)
+    axona.generate_clusters(exdir_path, axona_file)
+
+
+def _assert_trees_equal(first, second):
+    assert sorted(first) == sorted(second)
+    for key in first:
+        a, b = first[key], second[key]
+        assert type(a) == type(b)
+        if isinstance(a, exdir.core.Dataset):
+            assert np.array_equal(a.data, b.data)
+        elif isinstance(a, exdir.core.Group):
+            _assert_trees_equal(a, b)
+
+
+@pytest.mark.parametrize('processes', [None, 2])
+def test_convert_session_matches_per_stage(tmpdir, processes):
+    set_filename = write_axona_session(tmpdir.mkdir('raw'), num_channel_groups=3,
+                                       num_spikes=200)
+    expected_path = str(tmpdir.join('expected.exdir'))
+    convert_per_stage(pyxona.File(set_filename), expected_path)
+
+    exdir_path = str(tmpdir.join('session.exdir'))
+    timings = axona.convert_session(pyxona.File(set_filename), exdir_path,
+                                    processes=processes)
+    for stage in ['copy', 'tracking', 'plan', 'analog_signals', 'spike_trains',
+                  'units', 'clusters', 'channel_groups']:
+        assert timings[stage] >= 0
+
+    expected = exdir.File(expected_path)
+    result = exdir.File(exdir_path)
+    _assert_trees_equal(expected['processing'], result['processing'])
+    channel_group = result['processing']['electrophysiology']['channel_group_1']
+    assert channel_group.attrs['electrode_group_id'] == 1
+    assert list(channel_group['LFP']) == ['LFP_timeseries_1']
+    units = channel_group['UnitTimes']
+    assert sorted(units) == ['0', '1', '2']
+    assert channel_group['EventWaveform']['waveform_timeseries']['data'].shape == (200, 4, 50)
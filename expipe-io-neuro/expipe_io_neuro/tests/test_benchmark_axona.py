@@ -0,0 +1,42 @@
+import itertools
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+pyxona = pytest.importorskip('pyxona')
+
+from expipe_io_neuro.axona import axona
+from expipe_io_neuro.tests.test_axona import write_axona_session, convert_per_stage
+
+
+@pytest.fixture(scope='module')
+def axona_session(tmpdir_factory):
+    # eight tetrodes with 20000 spikes each
+    directory = tmpdir_factory.mktemp('axona')
+    return write_axona_session(directory, num_channel_groups=8,
+                               num_spikes=20000, duration=600)
+
+
+@pytest.fixture
+def exdir_paths(tmpdir):
+    counter = itertools.count()
+    return lambda: str(tmpdir.join('session_{}.exdir'.format(next(counter))))
+
+
+def _run(benchmark, convert, set_filename, exdir_paths):
+    def setup():
+        return (pyxona.File(set_filename), exdir_paths()), {}
+    benchmark.pedantic(convert, setup=setup, rounds=3)
+
+
+def test_convert_per_stage(benchmark, axona_session, exdir_paths):
+    _run(benchmark, convert_per_stage, axona_session, exdir_paths)
+
+
+def test_convert_session(benchmark, axona_session, exdir_paths):
+    _run(benchmark, axona.convert_session, axona_session, exdir_paths)
+
+
+def test_convert_session_parallel(benchmark, axona_session, exdir_paths):
+    def convert(axona_file, exdir_path):
+        return axona.convert_session(axona_file, exdir_path, processes=4)
+    _run(benchmark, convert, axona_session, exdir_paths)
@@ -0,0 +1,203 @@
+import struct
+
+import pytest
+import numpy as np
+import quantities as pq
+
+from expipe_io_neuro.intan.pyintan import (File, RHSData, decode_stimulation,
+                                           rhs_block_dtype,
+                                           RHS_SAMPLES_PER_DATA_BLOCK)
+
+
+def _qstring(text):
+    encoded = text.encode('utf-16-le')
+    return struct.pack('<I', len(encoded)) + encoded
+
+
+def _channel(name, native_order, signal_type):
+    return (_qstring(name) + _qstring(name) +
+            struct.pack('<hhhhhhh', native_order, native_order, signal_type,
+                        1, native_order, 0, 0) +
+            struct.pack('<hhhh', 0, 0, 0, 0) +
+            struct.pack('<ff', 0., 0.))
+
+
+def write_rhs(path, blocks, num_amplifier_channels, num_board_adc_channels,
+              num_board_dig_in_channels, sample_rate=30000.,
+              stim_step_size=1e-6):
+    header = struct.pack('<Ihh', int('d69127ac', 16), 1, 0)
+    header += struct.pack('<fhffff', sample_rate, 0, 0., 0., 0., 0.)
+    header += struct.pack('<ffff', 0., 0., 0., 0.)
+    header += struct.pack('<hff', 0, 0., 0.)
+    header += struct.pack('<hh', 0, 0)
+    header += struct.pack('<fff', stim_step_size, 0., 0.)
+    header += _qstring('') + _qstring('') + _qstring('')
+    header += struct.pack('<hh', 0, 0)
+    header += _qstring('hardware')
+    channels = ([_channel('A-%03d' % i, i, 0) for i in range(num_amplifier_channels)] +
+                [_channel('ANALOG-IN-%d' % i, i, 3) for i in range(num_board_adc_channels)] +
+                [_channel('DIGITAL-IN-%02d' % i, i, 5) for i in range(num_board_dig_in_channels)])
+    header += struct.pack('<h', 1)
+    header += _qstring('Port A') + _qstring('A')
+    header += struct.pack('<hhh', 1, len(channels), num_amplifier_channels)
+    header += b''.join(channels)
+    with open(str(path), 'wb') as f:
+        f.write(header)
+        f.write(blocks.tobytes())
+
+
+@pytest.fixture
+def rhs_file(tmpdir):
+    num_blocks = 5
+    dtype = rhs_block_dtype(3, num_board_adc_channels=2, board_dig_in=True)
+    blocks = np.zeros(num_blocks, dtype=dtype)
+    rng = np.random.RandomState(42)
+    blocks['timestamps'] = np.arange(num_blocks * RHS_SAMPLES_PER_DATA_BLOCK).reshape(num_blocks, -1)
+    for field in ['amplifier', 'stimulation', 'board_adc', 'board_dig_in']:
+        blocks[field] = rng.randint(0, 2 ** 16, size=blocks[field].shape)
+    path = tmpdir.join('session_170101_120000.rhs')
+    write_rhs(path, blocks, 3, 2, 1)
+    return str(path), blocks
+
+
+def _concatenate(blocks, field):
+    # the per-block reading done by File.loadRHS before the streams
+    return np.concatenate(list(blocks[field]), axis=-1)
+
+
+def test_rhs_streams(rhs_file):
+    path, blocks = rhs_file
+    rhs = RHSData(path)
+    assert rhs.num_data_blocks == 5
+    assert rhs.sample_rate == 30000.
+    assert rhs.dc_amplifier is None
+    assert rhs.board_dac is None
+    assert rhs.board_dig_out is None
+
+    amplifier = _concatenate(blocks, 'amplifier')
+    assert rhs.amplifier.shape == amplifier.shape
+    assert rhs.amplifier.dtype == np.uint16
+    np.testing.assert_array_equal(rhs.amplifier[:, :], amplifier)
+    np.testing.assert_array_equal(rhs.amplifier[1, 100:300], amplifier[1, 100:300])
+    np.testing.assert_array_equal(rhs.amplifier[[2, 0], 5:600:7], amplifier[[2, 0], 5:600:7])
+    np.testing.assert_array_equal(rhs.amplifier[:, ::-3], amplifier[:, ::-3])
+    np.testing.assert_array_equal(rhs.amplifier[:, [400, 3, 129]], amplifier[:, [400, 3, 129]])
+    assert rhs.amplifier[0, -1] == amplifier[0, -1]
+
+    np.testing.assert_array_equal(rhs.board_adc[...], _concatenate(blocks, 'board_adc'))
+    np.testing.assert_array_equal(rhs.board_dig_in[10:500], _concatenate(blocks, 'board_dig_in')[10:500])
+    np.testing.assert_array_equal(np.asarray(rhs.stimulation), _concatenate(blocks, 'stimulation'))
+    np.testing.assert_array_equal(rhs.timestamps[:], np.arange(5 * RHS_SAMPLES_PER_DATA_BLOCK))
+
+
+def test_rhs_time_slice(rhs_file):
+    path, blocks = rhs_file
+    rhs = RHSData(path)
+    amplifier = _concatenate(blocks, 'amplifier')
+
+    window = rhs.amplifier.time_slice(0.001, 0.015)
+    assert window.units == pq.uV
+    np.testing.assert_allclose(window.magnitude, (amplifier[:, 30:450] - 32768.) * 0.195)
+
+    window = rhs.board_adc.time_slice(1 * pq.ms, 2 * pq.ms, channel=1)
+    adc = _concatenate(blocks, 'board_adc')
+    np.testing.assert_allclose(window.rescale(pq.V).magnitude, (adc[1, 30:60] - 32768.) * 312.5e-6)
+
+    current = rhs.stimulation.time_slice(0, 0.01)
+    expected = decode_stimulation(_concatenate(blocks, 'stimulation')[:, :300], 1e-6)[0]
+    np.testing.assert_allclose(current.magnitude, expected)
+
+
+def test_decode_stimulation():
+    raw = np.array([[0, 2 ** 8 + 3, 2 ** 15 + 2 ** 13 + 5, 2 ** 14]], dtype='u2')
+    current, amp_settle, charge_recovery, compliance_limit = decode_stimulation(raw, 2e-6)
+    np.testing.assert_allclose(current, [[0, -6, 10, 0]])
+    np.testing.assert_array_equal(amp_settle, [[False, False, True, False]])
+    np.testing.assert_array_equal(charge_recovery, [[False, False, False, True]])
+    np.testing.assert_array_equal(compliance_limit, [[False, False, True, False]])
+
+
+def test_rhs_empty(tmpdir):
+    path = tmpdir.join('empty.rhs')
+    write_rhs(path, np.zeros(0, dtype=rhs_block_dtype(2)), 2, 0, 0)
+    rhs = RHSData(str(path))
+    assert rhs.num_data_blocks == 0
+    assert rhs.amplifier.shape == (2, 0)
+    assert rhs.amplifier[:, :].shape == (2, 0)
+
+
+def _stimulation_reference(raw, t, stim_step_size=1e-6):
+    # the whole-recording decoding done by File.loadRHS before
+    current = decode_stimulation(raw, stim_step_size)[0]
+    stim_channels = np.flatnonzero(np.any(current != 0, axis=1))
+    flags = [[t[np.flatnonzero(channel_flags)] if np.any(channel_flags) else []
+              for channel_flags in raw & bit]
+             for bit in [2 ** 13, 2 ** 14, 2 ** 15]]
+    return stim_channels, current[stim_channels], flags
+
+
+@pytest.fixture
+def stimulation_file(tmpdir):
+    num_blocks = 200
+    dtype = rhs_block_dtype(16, num_board_adc_channels=1, board_dig_in=True)
+    blocks = np.zeros(num_blocks, dtype=dtype)
+    blocks['timestamps'] = np.arange(num_blocks * RHS_SAMPLES_PER_DATA_BLOCK).reshape(num_blocks, -1)
+    rng = np.random.RandomState(0)
+    blocks['amplifier'] = rng.randint(0, 2 ** 16, size=blocks['amplifier'].shape)
+    # pulses on channel 3, flags only on channel 7
+    stimulation = blocks['stimulation']
+    stimulation[::20, 3, :10] = 2 ** 13 + 2 ** 8 + 5
+    stimulation[::20, 3, 10:20] = 2 ** 14 + 5
+    stimulation[5, 7, 50] = 2 ** 15
+    path = tmpdir.join('session_170101_120000.rhs')
+    write_rhs(path, blocks, 16, 1, 1)
+    return str(path), blocks
+
+
+def _load_rhs(path):
+    # loadRHS without the rest of File.__init__
+    intan_file = File.__new__(File)
+    intan_file._channel_info = {}
+    return intan_file.loadRHS(path, load_binary=False)
+
+
+def test_load_rhs_stimulation(stimulation_file):
+    path, blocks = stimulation_file
+    data = _load_rhs(path)
+    t = data['t']
+    assert t.shape == (200 * RHS_SAMPLES_PER_DATA_BLOCK,)
+    stim_channels, stim_signal, flags = _stimulation_reference(
+        _concatenate(blocks, 'stimulation'), t)
+    np.testing.assert_array_equal(data['stim_channels'], [3])
+    np.testing.assert_array_equal(data['stim_channels'], stim_channels)
+    np.testing.assert_allclose(data['stim_signal'], stim_signal)
+    for name, expected in zip(['amp_settle_data', 'charge_recovery_data',
+                               'compliance_limit_data'], flags):
+        assert len(data[name]) == 16
+        for times, expected_times in zip(data[name], expected):
+            np.testing.assert_array_equal(times, expected_times)
+    assert len(data['amp_settle_data'][3]) == 100
+    np.testing.assert_array_equal(data['compliance_limit_data'][7], [t[5 * 128 + 50]])
+
+
+def test_load_rhs_no_stimulation(tmpdir):
+    path = tmpdir.join('quiet_170101_120000.rhs')
+    blocks = np.zeros(3, dtype=rhs_block_dtype(2))
+    write_rhs(path, blocks, 2, 0, 0)
+    data = _load_rhs(str(path))
+    assert len(data['stim_channels']) == 0
+    assert len(data['stim_signal']) == 0
+    assert len(data['amp_settle_data']) == 0
+
+
+def test_load_rhs_stimulation_memory(stimulation_file):
+    import tracemalloc
+    path, blocks = stimulation_file
+    tracemalloc.start()
+    try:
+        _load_rhs(path)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    # decoding all channels at once needs 16 channels x samples x float64
+    assert peak < blocks['stimulation'].size * 8 / 2
@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+import pytest
+import numpy as np
+import quantities as pq
+import scipy.signal as ss
+
+exdir = pytest.importorskip('exdir')
+
+from expipe_io_neuro.openephys import openephys
+
+
+def fake_recording(num_channel_groups=2, duration=4, sample_rate=30000, seed=0):
+    """The parts of a pyopenephys Recording used by generate_lfp and generate_mua."""
+    rng = np.random.RandomState(seed)
+    num_samples = int(duration * sample_rate)
+    signal = rng.randint(-2000, 2000, (num_channel_groups * 4, num_samples)).astype('int16')
+    channel_groups = []
+    for group_id in range(num_channel_groups):
+        channels = [SimpleNamespace(index=i, id=group_id * 4 + i, gain=0.195 * pq.uV)
+                    for i in range(4)]
+        channel_groups.append(SimpleNamespace(id=group_id, channels=channels))
+    return SimpleNamespace(
+        sample_rate=sample_rate * pq.Hz,
+        duration=duration * pq.s,
+        channel_groups=channel_groups,
+        analog_signals=[SimpleNamespace(signal=signal)]
+    )
+
+
+def _timeseries(exdir_path, kind, group_id, channel_index):
+    exdir_file = exdir.File(exdir_path)
+    group = exdir_file['processing']['electrophysiology']['channel_group_{}'.format(group_id)]
+    return group[kind]['{}_timeseries_{}'.format(kind, channel_index)]
+
+
+def test_generate_lfp_chunked(tmpdir):
+    recording = fake_recording()
+    openephys.generate_lfp(str(tmpdir.join('chunked.exdir')), recording,
+                           chunk_duration=0.7 * pq.s)
+
+    lfp = _timeseries(str(tmpdir.join('chunked.exdir')), 'LFP', 1, 2)
+    assert lfp.attrs['sample_rate'] == 1000 * pq.Hz
+    assert lfp.attrs['electrode_identity'] == 6
+    data = lfp['data']
+    assert data.shape == (4000,)
+    assert data.attrs['num_samples'] == 4000
+    sos = ss.cheby1(8, 0.05, 0.8 / 30, output='sos')
+    expected = ss.sosfiltfilt(sos, recording.analog_signals[0].signal[6].astype(float))[::30] * 0.195
+    assert np.allclose(data[100:-100].magnitude, expected[100:-100], atol=1e-6)
+
+
+def test_generate_mua_chunked(tmpdir):
+    recording = fake_recording(num_channel_groups=1)
+    openephys.generate_mua(str(tmpdir.join('chunked.exdir')), recording,
+                           chunk_duration=0.7 * pq.s)
+    openephys.generate_mua(str(tmpdir.join('whole.exdir')), recording,
+                           chunk_duration=10 * pq.s)
+
+    for channel_index in range(4):
+        chunked = _timeseries(str(tmpdir.join('chunked.exdir')), 'MUA', 0, channel_index)['data']
+        whole = _timeseries(str(tmpdir.join('whole.exdir')), 'MUA', 0, channel_index)['data']
+        assert chunked.shape == whole.shape == (4000,)
+        assert chunked.attrs['unit'] == 'uV'
+        assert np.allclose(chunked[:].magnitude, whole[:].magnitude, atol=1e-6)
+
+
+def test_generate_lfp_twice(tmpdir):
+    exdir_path = str(tmpdir.join('twice.exdir'))
+    recording = fake_recording(num_channel_groups=1)
+    openephys.generate_lfp(exdir_path, recording, chunk_duration=0.7 * pq.s)
+    first = _timeseries(exdir_path, 'LFP', 0, 1)['data'][:]
+    # an interrupted run leaves a partial dataset behind
+    _timeseries(exdir_path, 'LFP', 0, 2)['data'].resize(1234)
+    openephys.generate_lfp(exdir_path, recording, chunk_duration=0.7 * pq.s)
+    for channel_index in range(4):
+        data = _timeseries(exdir_path, 'LFP', 0, channel_index)['data']
+        assert data.shape == (4000,)
+        assert data.attrs['num_samples'] == 4000
+    assert np.array_equal(_timeseries(exdir_path, 'LFP', 0, 1)['data'][:], first)
+
+
+def test_generate_lfp_over_contiguous_dataset(tmpdir):
+    exdir_path = str(tmpdir.join('contiguous.exdir'))
+    recording = fake_recording(num_channel_groups=1)
+    openephys.generate_lfp(exdir_path, recording, chunk_duration=0.7 * pq.s)
+    # as written before the LFP was streamed in chunks
+    timeseries = _timeseries(exdir_path, 'LFP', 0, 0)
+    expected = timeseries['data'][:]
+    import shutil
+    shutil.rmtree(str(timeseries['data'].directory))
+    timeseries.create_dataset('data', data=np.zeros(5) * pq.uV)
+    openephys.generate_lfp(exdir_path, recording, chunk_duration=0.7 * pq.s)
+    data = _timeseries(exdir_path, 'LFP', 0, 0)['data']
+    assert data.chunks is not None
+    assert np.array_equal(data[:], expected)
@@ -42,3 +42,42 @@ def test_cut_to_same_len():
     assert np.array_equal(t_, t[:-1])
     assert np.array_equal(x_, x)
     assert np.array_equal(y_, y[:-2])
+
+
+def test_chunked_sos_filter_forward_matches_sosfilt():
+    import scipy.signal as ss
+    from expipe_io_neuro.openephys.tools import ChunkedSosFilter, iter_chunks
+    x = np.random.RandomState(0).randn(3, 10000)
+    sos = ss.butter(4, 0.1, output='sos')
+    zi = ss.sosfilt_zi(sos)[:, np.newaxis, :] * x[np.newaxis, :, 0, np.newaxis]
+    expected, _ = ss.sosfilt(sos, x, axis=-1, zi=zi)
+    chunked = ChunkedSosFilter(sos, zero_phase=False)
+    result = np.concatenate([chunked.filter(x[:, start:stop])
+                             for start, stop, _ in iter_chunks(10000, 999, 0)], axis=-1)
+    assert np.allclose(result, expected)
+
+
+def test_chunked_sos_filter_zero_phase():
+    import scipy.signal as ss
+    from expipe_io_neuro.openephys.tools import ChunkedSosFilter, iter_chunks
+    x = np.random.RandomState(1).randn(2, 20000)
+    sos = ss.butter(2, 0.02, btype='high', output='sos')
+    expected = ss.sosfiltfilt(sos, x, axis=-1)
+    chunked = ChunkedSosFilter(sos)
+    result = np.concatenate([chunked.filter(x[:, start:end], stop - start)[:, :stop - start]
+                             for start, stop, end in iter_chunks(20000, 3000, 1000)], axis=-1)
+    # the edges of the whole signal are padded differently from sosfiltfilt
+    assert np.allclose(result[:, 1000:-1000], expected[:, 1000:-1000], atol=1e-8)
+
+
+def test_chunked_decimator():
+    import scipy.signal as ss
+    from expipe_io_neuro.openephys.tools import ChunkedDecimator, iter_chunks
+    x = np.random.RandomState(2).randn(2, 30000)
+    sos = ss.cheby1(8, 0.05, 0.8 / 30, output='sos')
+    expected = ss.sosfiltfilt(sos, x, axis=-1)[:, ::30]
+    decimator = ChunkedDecimator(30)
+    result = np.concatenate([decimator.decimate(x[:, start:end], stop - start)
+                             for start, stop, end in iter_chunks(30000, 7001, 3000)], axis=-1)
+    assert result.shape == expected.shape
+    assert np.allclose(result[:, 100:-100], expected[:, 100:-100], atol=1e-8)
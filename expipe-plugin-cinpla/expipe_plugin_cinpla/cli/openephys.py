@@ -17,6 +17,11 @@ def validate_depth(ctx, param, depth):
                                  'separated with white space i.e ' +
                                  '<"key num depth physical_unit"> (ommit <>).')
 
+
+class _AbortRegistration(Exception):
+    pass
+
+
 def attach_to_cli(cli):
     @cli.command('openephys',
                  short_help='Register an open-ephys recording-action to database.')
@@ -127,42 +132,48 @@ def attach_to_cli(cli):
             session_dtime = datetime.strftime(openephys_exp.datetime, '%d%m%y')
             action_id = entity_id + '-' + session_dtime + '-' + session
         print('Generating action', action_id)
-        action = project.create_action(action_id, overwrite=overwrite)
-        fr = action.require_filerecord()
-        action.datetime = openephys_exp.datetime
-        action.type = 'Recording'
-        action.tags.extend(list(tag) + ['open-ephys'])
-        print('Registering entity id ' + entity_id)
-        action.entities = [entity_id]
-        user = user or PAR.USERNAME
-        print('Registering user ' + user)
-        action.users = [user]
-        print('Registering location ' + location)
-        action.location = location
+        # NOTE the action, its file record, fields, modules and messages are
+        # sent in one request, and nothing is sent if registration is aborted
+        try:
+            with project.batch():
+                action = project.create_action(action_id, overwrite=overwrite)
+                action.require_filerecord()
+                action.datetime = openephys_exp.datetime
+                action.type = 'Recording'
+                action.tags.extend(list(tag) + ['open-ephys'])
+                print('Registering entity id ' + entity_id)
+                action.entities = [entity_id]
+                user = user or PAR.USERNAME
+                print('Registering user ' + user)
+                action.users = [user]
+                print('Registering location ' + location)
+                action.location = location
 
-        if not no_modules:
-            if 'openephys' not in PAR.TEMPLATES:
-                raise ValueError('Could not find "openephys" in ' +
-                                 'PAR.TEMPLATES: available keys are:"' +
-                                 '{}"'.format(PAR.TEMPLATES.keys()))
-            if depth is not None:
-                correct_depth = action_tools.register_depth(
-                    project=project, action=action, depth=depth,
-                    overwrite=overwrite)
-                if not correct_depth:
-                    print('Aborting registration!')
-                    return
-            action_tools.generate_templates(action, 'openephys',
-                                            overwrite=overwrite)
+                if not no_modules:
+                    if 'openephys' not in PAR.TEMPLATES:
+                        raise ValueError('Could not find "openephys" in ' +
+                                         'PAR.TEMPLATES: available keys are:"' +
+                                         '{}"'.format(PAR.TEMPLATES.keys()))
+                    if depth is not None:
+                        correct_depth = action_tools.register_depth(
+                            project=project, action=action, depth=depth,
+                            overwrite=overwrite)
+                        if not correct_depth:
+                            raise _AbortRegistration
+                    action_tools.generate_templates(action, 'openephys',
+                                                    overwrite=overwrite)
 
-        for m in message:
-            action.create_message(text=m, user=user, datetime=datetime.now())
+                for m in message:
+                    action.create_message(text=m, user=user, datetime=datetime.now())
 
-            # TODO update to messages
-            # for idx, m in enumerate(openephys_rec.messages):
-            #     secs = float(m['time'].rescale('s').magnitude)
-            #     dtime = openephys_file.datetime + timedelta(secs)
-            #     action.create_message(text=m['message'], user=user, datetime=dtime)
+                    # TODO update to messages
+                    # for idx, m in enumerate(openephys_rec.messages):
+                    #     secs = float(m['time'].rescale('s').magnitude)
+                    #     dtime = openephys_file.datetime + timedelta(secs)
+                    #     action.create_message(text=m['message'], user=user, datetime=dtime)
+        except _AbortRegistration:
+            print('Aborting registration!')
+            return
 
         if not no_files:
             fr = action.require_filerecord()
@@ -1,18 +1,25 @@
 import os
 import os.path as op
+import random
 import requests
 import collections
+import threading
+import time
 import datetime as dt
 import quantities as pq
 import numpy as np
 import warnings
 import copy
 import abc
+import asyncio
+import functools
+import concurrent.futures
 import expipe
 
 
 datetime_format = '%Y-%m-%dT%H:%M:%S'
 verbose = False
+snapshot_paths = ['actions', 'action_modules', 'action_messages']
 
 def vprint(*arg):
     if verbose:
@@ -202,10 +209,10 @@ class ModuleManager:
         return collections.abc.ValuesView(self)
 
     def to_dict(self):
-        d = {}
-        for name in self.keys():
-            d[name] = self[name].to_dict()
-        return d
+        names = list(self.keys())
+        values = _get_many(self._db, names)
+        return {name: _module_content(value) or {}
+                for name, value in zip(names, values)}
 
     def to_json(self, fname=None):
         warnings.warn("module_manager.to_json() is deprecated. Will be removed in next version!")
@@ -244,7 +251,14 @@ class MessageManager:
         return self._get(name)
 
     def __contains__(self, item):
-        return item in [a.to_dict() for a in self]
+        return item in self.to_list()
+
+    def to_list(self):
+        """
+        Contents of all messages as dictionaries, requested concurrently
+        """
+        return [_message_content(value)
+                for value in _get_many(self._db, list(self.keys()))]
 
     def __iter__(self):
         keys = self.keys()
@@ -277,6 +291,19 @@ class ExpipeObject:
     def modules(self):
         return ModuleManager(self)
 
+    def batch(self):
+        """
+        Context manager that collects all writes to the database in this
+        thread and sends them as one multi-location update when the
+        outermost batch exits. Reads within the batch see the collected
+        writes. Nothing is written if an exception is raised.
+
+        >>> with action.batch():  # doctest: +SKIP
+        ...     action.type = 'Recording'
+        ...     action.tags = ['open-ephys']
+        """
+        return WriteBatch()
+
     def require_module(self, name=None, template=None, contents=None):
         """
         Get a module, creating it if it doesn’t exist.
@@ -484,6 +511,27 @@ class Project(ExpipeObject):
         self._db_templates.delete(name)
         del template
 
+    def prefetch(self, paths=None):
+        """
+        Read the whole trees in paths (by default actions, action_modules
+        and action_messages) of the project with one request each. The
+        actions, modules and messages are then read from the cache until
+        it expires. Returns a dictionary with the tree of each path.
+        """
+        paths = paths or snapshot_paths
+        trees = {}
+        for path in paths:
+            trees[path] = FirebaseBackend("/".join(["", path, self.id])).get() or {}
+        return trees
+
+    def snapshot(self, paths=None):
+        """
+        Read-only view of the project built from one request per tree
+        in paths, see prefetch. Add 'entities', 'entity_modules',
+        'entity_messages' or 'project_modules' to paths to include them.
+        """
+        return ProjectSnapshot(self, self.prefetch(paths))
+
 
 class Entity(ExpipeObject):
     """
@@ -528,8 +576,7 @@ class Entity(ExpipeObject):
         return self.messages[result["name"]]
 
     def delete_messages(self):
-        for message in self.messages:
-            self._db_messages.delete(name=message.name)
+        _delete_many(self._db_messages, list(self.messages.keys()))
 
     def _assert_message_dtype(self, text, user, datetime):
         _assert_message_text_dtype(text)
@@ -642,8 +689,7 @@ class Action(ExpipeObject):
         return self.messages[result["name"]]
 
     def delete_messages(self):
-        for message in self.messages:
-            self._db_messages.delete(name=message.name)
+        _delete_many(self._db_messages, list(self.messages.keys()))
 
     def _assert_message_dtype(self, text, user, datetime):
         _assert_message_text_dtype(text)
@@ -794,12 +840,15 @@ class Module:
         return result.values()
 
     def _get_module_content(self):
-        result = self._db.get()
-        if isinstance(result, list):
-            if len(result) > 0:
-                raise TypeError('Got nonempty list, expected dict')
-            result = None
-        return result
+        return _module_content(self._db.get())
+
+
+def _module_content(result):
+    if isinstance(result, list):
+        if len(result) > 0:
+            raise TypeError('Got nonempty list, expected dict')
+        result = None
+    return result
 
 
 class Template:
@@ -857,6 +906,113 @@ class Template:
         return result
 
 
+class ModuleSnapshot:
+    """
+    Read-only view of a module in a ProjectSnapshot
+    """
+    def __init__(self, parent, module_id, data):
+        self.parent = parent
+        self.id = module_id
+        self._data = data
+
+    def __getitem__(self, name):
+        if not isinstance(self._data, dict) or name not in self._data:
+            raise KeyError("Module '{}' does not exist".format(name))
+        return ModuleSnapshot(self, name, self._data[name])
+
+    def to_dict(self):
+        if not isinstance(self._data, dict):
+            return {}
+        return copy.deepcopy(self._data)
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def items(self):
+        return self.to_dict().items()
+
+    def values(self):
+        return self.to_dict().values()
+
+
+class ObjectSnapshot:
+    """
+    Read-only view of an action or entity in a ProjectSnapshot
+    """
+    def __init__(self, project, object_id, data, modules=None, messages=None):
+        self.project = project
+        self.id = object_id
+        self._data = data if isinstance(data, dict) else {}
+        self.modules = {
+            name: ModuleSnapshot(self, name, contents)
+            for name, contents in (modules or {}).items()
+        }
+        self.messages = []
+        for name in sorted(messages or {}):
+            message = copy.deepcopy(messages[name])
+            if message.get('datetime') is not None:
+                message['datetime'] = dt.datetime.strptime(message['datetime'],
+                                                           datetime_format)
+            self.messages.append(message)
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+    @property
+    def location(self):
+        return self._data.get('location')
+
+    @property
+    def type(self):
+        return self._data.get('type')
+
+    @property
+    def datetime(self):
+        value = self._data.get('datetime')
+        if value is None:
+            return None
+        return dt.datetime.strptime(value, datetime_format)
+
+    @property
+    def entities(self):
+        return list(self._data.get('entities') or [])
+
+    @property
+    def users(self):
+        return list(self._data.get('users') or [])
+
+    @property
+    def tags(self):
+        return list(self._data.get('tags') or [])
+
+
+class ProjectSnapshot:
+    """
+    Read-only view of the actions, entities and modules of a project,
+    see Project.snapshot
+    """
+    def __init__(self, project, trees):
+        self.project = project
+        self.id = project.id
+        self.actions = self._objects(trees, 'actions', 'action_modules',
+                                     'action_messages')
+        self.entities = self._objects(trees, 'entities', 'entity_modules',
+                                      'entity_messages')
+        self.modules = {
+            name: ModuleSnapshot(self, name, contents)
+            for name, contents in (trees.get('project_modules') or {}).items()
+        }
+
+    def _objects(self, trees, path, modules_path, messages_path):
+        modules = trees.get(modules_path) or {}
+        messages = trees.get(messages_path) or {}
+        return {
+            name: ObjectSnapshot(self.project, name, data, modules.get(name),
+                                 messages.get(name))
+            for name, data in (trees.get(path) or {}).items()
+        }
+
+
 class Message:
     """
     Message class
@@ -915,11 +1071,14 @@ class Message:
         self._db.set(name="datetime", value=value_str)
 
     def to_dict(self):
-        content = self._db.get()
-        if content:
-            content['datetime'] = dt.datetime.strptime(content['datetime'],
-                                                       datetime_format)
-        return content
+        return _message_content(self._db.get())
+
+
+def _message_content(content):
+    if content:
+        content['datetime'] = dt.datetime.strptime(content['datetime'],
+                                                   datetime_format)
+    return content
 
 
 ######################################################################################################
@@ -954,55 +1113,423 @@ class AbstractBackend(abc.ABC):
         pass
 
 
-class FirebaseBackend(AbstractBackend):
-    def __init__(self, path):
-        super(FirebaseBackend, self).__init__(
-            path=path
-        )
+firebase_auth_url = "https://www.googleapis.com/identitytoolkit/v3/relyingparty/verifyPassword?key={api_key}"
+firebase_token_url = "https://securetoken.googleapis.com/v1/token?key={api_key}"
+# maximum number of requests in flight from AsyncFirebaseBackend, also the
+# size of the connection pool
+firebase_concurrency = 16
+
+
+class FirebaseAuth:
+    """
+    Firebase tokens and pooled HTTP session shared by all FirebaseBackend
+    instances in a process
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._session = None
+        self._session_pid = None
+        self.reset()
+
+    def reset(self):
         self.id_token = None
         self.refresh_token = None
         self.token_expiration = dt.datetime.now()
+        self._credentials = None
 
-    def ensure_auth(self):
-        current_time = dt.datetime.now()
-        api_key = expipe.settings["firebase"]["config"]["apiKey"]
+    @property
+    def session(self):
+        # NOTE connections cannot be shared with a forked process
+        if self._session is None or self._session_pid != os.getpid():
+            self._session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_maxsize=firebase_concurrency)
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
+            self._session_pid = os.getpid()
+        return self._session
 
-        if self.id_token is not None and self.refresh_token is not None:
-            if current_time + dt.timedelta(0, 10) < self.token_expiration and False:
+    def ensure_auth(self):
+        firebase = expipe.settings["firebase"]
+        api_key = firebase["config"]["apiKey"]
+        credentials = (api_key, firebase["email"], firebase["password"])
+        with self._lock:
+            if self._credentials != credentials:
+                self.reset()
+            current_time = dt.datetime.now()
+            if self.id_token is not None and self.refresh_token is not None:
+                if current_time + dt.timedelta(0, 10) < self.token_expiration:
+                    return
+                auth_url = firebase_token_url.format(api_key=api_key)
+                auth_data = {
+                    "grant_type": "refresh_token",
+                    "refresh_token": self.refresh_token
+                }
+                response = _request("refresh", "post", auth_url, json=auth_data)
+                value = response.json()
+                assert(response.status_code == 200)
+                assert("errors" not in value)
+                self.id_token = value["id_token"]
+                self.refresh_token = value["refresh_token"]
+                self.token_expiration = current_time + dt.timedelta(0, int(value["expires_in"]))
                 return
-            auth_url = "https://securetoken.googleapis.com/v1/token?key={}".format(api_key)
+
+            auth_url = firebase_auth_url.format(api_key=api_key)
             auth_data = {
-                "grant_type": "refresh_token",
-                "refresh_token": self.refresh_token
+                "email": firebase["email"],
+                "password": firebase["password"],
+                "returnSecureToken": True
             }
-
-            response = requests.post(auth_url, json=auth_data)
-            value = response.json()
+            response = _request("auth", "post", auth_url, json=auth_data)
             assert(response.status_code == 200)
+            value = response.json()
             assert("errors" not in value)
-            self.id_token = value["id_token"]
-            self.refresh_token = value["refresh_token"]
+            self.refresh_token = value["refreshToken"]
+            self.id_token = value["idToken"]
+            self.token_expiration = current_time + dt.timedelta(0, int(value["expiresIn"]))
+            self._credentials = credentials
+
+
+firebase_auth = FirebaseAuth()
+
+_request_stats = {}
+_request_stats_lock = threading.Lock()
+
+
+def _request(operation, method, url, **kwargs):
+    start = time.perf_counter()
+    response = firebase_auth.session.request(method, url, **kwargs)
+    latency = time.perf_counter() - start
+    with _request_stats_lock:
+        stats = _request_stats.setdefault(operation, {"count": 0, "time": 0.})
+        stats["count"] += 1
+        stats["time"] += latency
+    vprint("{} {} took {:.3f} s".format(method.upper(), operation, latency))
+    return response
+
+
+def request_stats():
+    """
+    Number of requests and their total time in seconds for each kind of
+    operation (get, set, push, update, auth and refresh) since the last
+    reset_request_stats()
+    """
+    with _request_stats_lock:
+        return copy.deepcopy(_request_stats)
+
+
+def reset_request_stats():
+    with _request_stats_lock:
+        _request_stats.clear()
+
+
+def _normalize_path(path):
+    return "/".join(key for key in path.split("/") if key)
+
+
+def _shallow(value):
+    if isinstance(value, dict):
+        return {key: True for key in value}
+    if isinstance(value, list):
+        return {str(key): True for key, val in enumerate(value) if val is not None}
+    return value
+
+
+class FirebaseCache:
+    """
+    Read-through cache of FirebaseBackend.get shared by all backends in a
+    process. Entries expire after ttl seconds and are invalidated by writes
+    through any FirebaseBackend, so only changes by other clients can be up
+    to ttl seconds old. The cache is disabled with ttl = 0.
+    """
+    def __init__(self, ttl=5.):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._writes = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "invalidations": self.invalidations,
+                    "entries": len(self._entries)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._writes += 1
+
+    def _fresh(self, path, shallow, now):
+        entry = self._entries.get((path, shallow))
+        if entry is None:
+            return None
+        if now - entry[0] > self.ttl:
+            del self._entries[(path, shallow)]
+            return None
+        return entry
+
+    def _lookup(self, path, shallow, exists):
+        now = time.monotonic()
+        entry = self._fresh(path, shallow, now)
+        if entry is not None:
+            return True, entry[1]
+        # the value can also be taken from a full value of path or one of
+        # its parents
+        keys = path.split("/") if path else []
+        for i in range(len(keys), -1, -1):
+            entry = self._fresh("/".join(keys[:i]), False, now)
+            if entry is None:
+                continue
+            value = entry[1]
+            for key in keys[i:]:
+                if isinstance(value, dict):
+                    value = value.get(key)
+                elif isinstance(value, list) and key.isdigit() and int(key) < len(value):
+                    value = value[int(key)]
+                else:
+                    value = None
+            return True, _shallow(value) if shallow else value
+        if keys:
+            # the listing of the parent tells whether a child exists
+            entry = self._fresh("/".join(keys[:-1]), True, now)
+            if entry is not None:
+                if not isinstance(entry[1], dict) or keys[-1] not in entry[1]:
+                    return True, None
+                if exists:
+                    return True, True
+        return False, None
+
+    def lookup(self, path, shallow=False, exists=False):
+        """
+        Returns (found, value), value is a copy of the cached JSON. With
+        exists=True, value is only guaranteed to be None or not None.
+        """
+        if not self.ttl:
+            return False, None
+        path = _normalize_path(path)
+        with self._lock:
+            found, value = self._lookup(path, shallow, exists)
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return found, copy.deepcopy(value)
+
+    def writes(self):
+        return self._writes
+
+    def store(self, path, shallow, value, writes):
+        """
+        Store value read from the database when the number of writes was
+        writes, it is dropped if something was written since then.
+        """
+        if not self.ttl:
             return
+        path = _normalize_path(path)
+        with self._lock:
+            if writes != self._writes:
+                return
+            self._entries[(path, shallow)] = (time.monotonic(), copy.deepcopy(value))
 
-        auth_url = "https://www.googleapis.com/identitytoolkit/v3/relyingparty/verifyPassword?key={}".format(api_key)
-        auth_data = {
-            "email": expipe.settings["firebase"]["email"],
-            "password": expipe.settings["firebase"]["password"],
-            "returnSecureToken": True
-        }
-        response = requests.post(auth_url, json=auth_data)
-        assert(response.status_code == 200)
-        value = response.json()
-        assert("errors" not in value)
-        self.refresh_token = value["refreshToken"]
-        self.id_token = value["idToken"]
-        self.token_expiration = current_time + dt.timedelta(0, int(value["expiresIn"]))
+    def invalidate(self, path):
+        """
+        Drop path, its children and its parents.
+        """
+        path = _normalize_path(path)
+        with self._lock:
+            self._writes += 1
+            for entry_path, shallow in list(self._entries):
+                if (entry_path == path or not entry_path or not path or
+                        entry_path.startswith(path + "/") or
+                        path.startswith(entry_path + "/")):
+                    del self._entries[(entry_path, shallow)]
+                    self.invalidations += 1
+
+    def process_event(self, path, event_name, event_data):
+        """
+        Invalidate the changes of an event from the Firebase streaming
+        endpoint (for instance as parsed by expipebrowser's
+        parse_event_stream) listening on path.
+        """
+        import json
+        if event_name not in ("put", "patch"):
+            return
+        data = json.loads(event_data)
+        event_path = "/".join([path, data["path"]])
+        if event_name == "patch" and isinstance(data["data"], dict):
+            for key in data["data"]:
+                self.invalidate("/".join([event_path, key]))
+        else:
+            self.invalidate(event_path)
 
-    def build_url(self, name=None):
-        if name is None:
-            full_path = self.path
+
+firebase_cache = FirebaseCache()
+
+
+_batch_state = threading.local()
+
+
+def _current_batch():
+    return getattr(_batch_state, "batch", None)
+
+
+_push_chars = "-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+_push_state = {"time": None, "random": None}
+_push_lock = threading.Lock()
+
+
+def _push_id():
+    """
+    Chronologically ordered key like the ones generated by Firebase push
+    """
+    with _push_lock:
+        now = int(time.time() * 1000)
+        if now == _push_state["time"]:
+            # increment the random part to keep the order within a millisecond
+            rand = _push_state["random"]
+            i = len(rand) - 1
+            while i >= 0 and rand[i] == 63:
+                rand[i] = 0
+                i -= 1
+            rand[i] += 1
+        else:
+            rand = [random.randrange(64) for _ in range(12)]
+        _push_state["time"] = now
+        _push_state["random"] = rand
+        chars = []
+        for _ in range(8):
+            chars.append(_push_chars[now % 64])
+            now //= 64
+        return "".join(reversed(chars)) + "".join(_push_chars[r] for r in rand)
+
+
+def _set_child(value, keys, child):
+    """
+    Returns value with child set at keys, a child None is deleted
+    """
+    if not keys:
+        return child
+    if isinstance(value, list):
+        value = {str(i): v for i, v in enumerate(value) if v is not None}
+    elif not isinstance(value, dict):
+        value = {}
+    result = _set_child(value.get(keys[0]), keys[1:], child)
+    if result is None or result == {}:
+        value.pop(keys[0], None)
+    else:
+        value[keys[0]] = result
+    return value or None
+
+
+def _get_child(value, keys):
+    for key in keys:
+        if isinstance(value, dict):
+            value = value.get(key)
+        elif isinstance(value, list) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
         else:
-            full_path = "/".join([self.path, name])
+            return None
+    return value
+
+
+class WriteBatch:
+    """
+    Writes collected by ExpipeObject.batch, as a dictionary from path to
+    value where no path is the parent of another
+    """
+    def __init__(self):
+        self.writes = collections.OrderedDict()
+        self._parent = None
+
+    def __enter__(self):
+        self._parent = _current_batch()
+        if self._parent is None:
+            _batch_state.batch = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._parent is not None:
+            return False
+        _batch_state.batch = None
+        if exc_type is None:
+            self.flush()
+        return False
+
+    def flush(self):
+        if not self.writes:
+            return
+        writes = self.writes
+        self.writes = collections.OrderedDict()
+        FirebaseBackend("").update(writes)
+
+    def set(self, path, value):
+        path = _normalize_path(path)
+        if value == {}:
+            value = None
+        value = copy.deepcopy(value)
+        for other in list(self.writes):
+            if other == path or other.startswith(path + "/") or not path:
+                del self.writes[other]
+        for other in self.writes:
+            if not other or path.startswith(other + "/"):
+                keys = path[len(other):].strip("/").split("/")
+                self.writes[other] = _set_child(self.writes[other], keys, value)
+                return
+        self.writes[path] = value
+
+    def read(self, path, shallow, fetch):
+        """
+        Returns (found, value) of path with the collected writes applied,
+        found is False if no write touches path. fetch() returns the
+        value in the database.
+        """
+        path = _normalize_path(path)
+        for other in self.writes:
+            if other == path or not other or path.startswith(other + "/"):
+                keys = path[len(other):].strip("/").split("/") if path != other else []
+                value = copy.deepcopy(_get_child(self.writes[other], keys))
+                return True, _shallow(value) if shallow else value
+        children = [other for other in self.writes
+                    if not path or other.startswith(path + "/")]
+        if not children:
+            return False, None
+        value = fetch()
+        for other in children:
+            keys = other[len(path):].strip("/").split("/")
+            value = _set_child(value, keys, copy.deepcopy(self.writes[other]))
+        return True, _shallow(value) if shallow else value
+
+
+# NOTE distinguishes set(value) from set(name, None), which deletes name
+_MISSING = object()
+
+
+class FirebaseBackend(AbstractBackend):
+    def __init__(self, path):
+        super(FirebaseBackend, self).__init__(
+            path=path
+        )
+
+    @property
+    def id_token(self):
+        return firebase_auth.id_token
+
+    def ensure_auth(self):
+        firebase_auth.ensure_auth()
+
+    def full_path(self, name=None):
+        if name is None:
+            return self.path
+        return "/".join([self.path, name])
+
+    def build_url(self, name=None):
+        full_path = self.full_path(name)
         database_url = expipe.settings["firebase"]["config"]["databaseURL"]
         return "{database_url}/{name}.json?auth={id_token}".format(
             database_url=database_url,
@@ -1011,80 +1538,246 @@ class FirebaseBackend(AbstractBackend):
         )
 
     def exists(self, name=None):
-        self.ensure_auth()
-        value = self.get(name, shallow=True)
+        if _current_batch() is not None:
+            value = self.get(name, shallow=True)
+        else:
+            found, value = firebase_cache.lookup(self.full_path(name),
+                                                 shallow=True, exists=True)
+            if not found:
+                value = self._fetch(name, shallow=True)
         if value is not None:
             return True
         else:
             return False
 
-    def get(self, name=None, shallow=False):
+    def _fetch(self, name=None, shallow=False):
+        writes = firebase_cache.writes()
         self.ensure_auth()
         url = self.build_url(name)
         if shallow:
             url += "&shallow=true"
         vprint("URL", url)
-        response = requests.get(url)
+        response = _request("get", "get", url)
         vprint("Get result", response.json())
         assert(response.status_code == 200)
         value = response.json()
+        if isinstance(value, dict):
+            assert("errors" not in value)
+        firebase_cache.store(self.full_path(name), shallow, value, writes)
+        return value
+
+    def _read(self, name=None, shallow=False):
+        found, value = firebase_cache.lookup(self.full_path(name), shallow)
+        if not found:
+            value = self._fetch(name, shallow)
+        return value
+
+    def get(self, name=None, shallow=False):
+        batch = _current_batch()
+        found = False
+        if batch is not None:
+            found, value = batch.read(self.full_path(name), shallow,
+                                      lambda: self._read(name))
+        if not found:
+            value = self._read(name, shallow)
         if value is None:
             return value
-        assert("errors" not in value)
         value = convert_from_firebase(value)
         return value
 
     # def get_keys(self, name=None):
     #     return self.get(name, shallow=True)
 
-    def set(self, name=None, value=None):
+    def set(self, name=None, value=_MISSING):
+        if value is _MISSING:
+            value, name = name, None
+        batch = _current_batch()
+        if batch is not None:
+            batch.set(self.full_path(name), value)
+            return
         self.ensure_auth()
         url = self.build_url(name)
-        if value is None:
-            value = name
         vprint("URL", url)
-        response = requests.put(url, json=value)
+        response = _request("set", "put", url, json=value)
+        firebase_cache.invalidate(self.full_path(name))
         vprint("Set result", response.json())
         assert(response.status_code == 200)
         value = response.json()
-        if value is not None:
+        if isinstance(value, dict):
             assert("errors" not in value)
 
-    def push(self, name=None, value=None):
+    def push(self, name=None, value=_MISSING):
+        if value is _MISSING:
+            value, name = name, None
+        batch = _current_batch()
+        if batch is not None:
+            key = _push_id()
+            batch.set("/".join([self.full_path(name), key]), value)
+            return {"name": key}
         self.ensure_auth()
         url = self.build_url(name)
-        if value is None:
-            value = name
         vprint("URL", url)
-        response = requests.post(url, json=value)
+        response = _request("push", "post", url, json=value)
+        firebase_cache.invalidate(self.full_path(name))
         vprint("Push result", response.json())
         assert(response.status_code == 200)
         value = response.json()
         if value is None:
             return value
-        assert("errors" not in value)
+        if isinstance(value, dict):
+            assert("errors" not in value)
         return value
 
     def delete(self, name):
         self.set(name, {})
 
-    def update(self, name, value=None):
+    def update(self, name, value=_MISSING):
+        if value is _MISSING:
+            value, name = name, None
+        value = convert_to_firebase(value)
+        batch = _current_batch()
+        if batch is not None:
+            for key, val in value.items():
+                batch.set("/".join([self.full_path(name), key]), val)
+            return convert_from_firebase(copy.deepcopy(value))
         self.ensure_auth()
         url = self.build_url(name)
-        if value is None:
-            value = name
-        value = convert_to_firebase(value)
         vprint("URL", url)
-        response = requests.patch(url, json=value)
+        response = _request("update", "patch", url, json=value)
+        # NOTE the keys can be paths of a multi-location update
+        for key in value:
+            firebase_cache.invalidate("/".join([self.full_path(name), key]))
         vprint("Set result", response.json())
         assert(response.status_code == 200)
         value = response.json()
         if value is None:
             return value
-        assert("errors" not in value)
+        if isinstance(value, dict):
+            assert("errors" not in value)
         value = convert_from_firebase(value)
         return value
 
+    def get_many(self, names, shallow=False):
+        """
+        Values of names, requested concurrently
+        """
+        return AsyncFirebaseBackend(self.path).get_many(names, shallow)
+
+    def delete_many(self, names):
+        """
+        Deletes names with concurrent requests
+        """
+        AsyncFirebaseBackend(self.path).delete_many(names)
+
+
+_async_state = {"pid": None, "loop": None, "executor": None}
+_async_lock = threading.Lock()
+
+
+def _async_runtime():
+    # NOTE threads and event loops do not survive a fork
+    with _async_lock:
+        if _async_state["pid"] != os.getpid():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, daemon=True)
+            thread.start()
+            _async_state["pid"] = os.getpid()
+            _async_state["loop"] = loop
+            _async_state["executor"] = concurrent.futures.ThreadPoolExecutor(
+                max_workers=firebase_concurrency)
+        return _async_state["loop"], _async_state["executor"]
+
+
+def _run(coroutine):
+    """
+    Runs coroutine to completion on the loop of AsyncFirebaseBackend, which
+    also works when the caller is inside a running event loop (Jupyter)
+    """
+    loop, executor = _async_runtime()
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+
+class AsyncFirebaseBackend(FirebaseBackend):
+    """
+    FirebaseBackend with coroutines for all requests. Requests are sent
+    from a thread pool, at most firebase_concurrency at a time, and share
+    the token, session, cache and batch logic of FirebaseBackend. The
+    blocking methods are inherited, so it can be used wherever a
+    FirebaseBackend is.
+    """
+    def __init__(self, path, concurrency=None):
+        super(AsyncFirebaseBackend, self).__init__(path=path)
+        self.concurrency = concurrency or firebase_concurrency
+
+    async def _call(self, method, *args):
+        # NOTE a batch is local to the thread that opened it
+        if _current_batch() is not None:
+            return method(*args)
+        loop, executor = _async_runtime()
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, functools.partial(method, *args))
+
+    async def exists_async(self, name=None):
+        return await self._call(super().exists, name)
+
+    async def get_async(self, name=None, shallow=False):
+        return await self._call(super().get, name, shallow)
+
+    async def set_async(self, name=None, value=_MISSING):
+        return await self._call(super().set, name, value)
+
+    async def push_async(self, name=None, value=_MISSING):
+        return await self._call(super().push, name, value)
+
+    async def delete_async(self, name):
+        return await self._call(super().delete, name)
+
+    async def update_async(self, name, value=_MISSING):
+        return await self._call(super().update, name, value)
+
+    async def _gather(self, coroutine_function, names, *args):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def call(name):
+            async with semaphore:
+                return await coroutine_function(name, *args)
+        return await asyncio.gather(*[call(name) for name in names])
+
+    async def get_many_async(self, names, shallow=False):
+        return await self._gather(self.get_async, names, shallow)
+
+    async def delete_many_async(self, names):
+        await self._gather(self.delete_async, names)
+
+    def get_many(self, names, shallow=False):
+        names = list(names)
+        if _current_batch() is not None or len(names) < 2:
+            return [self.get(name, shallow) for name in names]
+        return _run(self.get_many_async(names, shallow))
+
+    def delete_many(self, names):
+        names = list(names)
+        if _current_batch() is not None or len(names) < 2:
+            for name in names:
+                self.delete(name)
+            return
+        _run(self.delete_many_async(names))
+
+
+def _get_many(db, names):
+    # NOTE backends other than Firebase fall back to one request at a time
+    if hasattr(db, "get_many"):
+        return db.get_many(names)
+    return [db.get(name) for name in names]
+
+
+def _delete_many(db, names):
+    if hasattr(db, "delete_many"):
+        db.delete_many(names)
+        return
+    for name in names:
+        db.delete(name)
+
 
 class Filerecord:
     def __init__(self, action, filerecord_id=None):
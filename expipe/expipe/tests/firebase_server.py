@@ -0,0 +1,196 @@
+import json
+import time
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # bursts of concurrent connections overflow the default backlog of 5
+    request_queue_size = 128
+
+
+class FirebaseServer:
+    """
+    Local stand-in for the Firebase REST API and the token endpoints.
+
+    Requests are recorded as (method, path) in requests and each request
+    is delayed by latency seconds.
+    """
+    def __init__(self, data=None, latency=0., expires_in=3600):
+        self.data = {} if data is None else data
+        self.latency = latency
+        self.expires_in = expires_in
+        self.requests = []
+        self.id_tokens = set()
+        self._counter = 0
+        self._lock = threading.Lock()
+        self._server = _Server(('127.0.0.1', 0), _make_handler(self))
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self._server.server_address[1])
+
+    def settings(self):
+        return {
+            'allow_tests': 'true',
+            'username': 'nobody',
+            'firebase': {
+                'email': 'test@example.com',
+                'password': 'secret',
+                'config': {
+                    'apiKey': 'key',
+                    'databaseURL': self.url + '/db',
+                }
+            }
+        }
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def count(self, method=None, prefix=''):
+        return len([r for r in self.requests
+                    if (method is None or r[0] == method) and r[1].startswith(prefix)])
+
+    def _new_tokens(self):
+        self._counter += 1
+        id_token = 'id-{}'.format(self._counter)
+        self.id_tokens.add(id_token)
+        return id_token, 'refresh-{}'.format(self._counter)
+
+    def _push_name(self):
+        self._counter += 1
+        return '-push{:08d}'.format(self._counter)
+
+    def get(self, keys):
+        value = self.data
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                return None
+            value = value[key]
+        return value
+
+    def set(self, keys, value):
+        if value is None or value == {}:
+            self.delete(keys)
+            return
+        if not keys:
+            self.data.clear()
+            self.data.update(value)
+            return
+        node = self.data
+        for key in keys[:-1]:
+            if not isinstance(node.get(key), dict):
+                node[key] = {}
+            node = node[key]
+        node[keys[-1]] = value
+
+    def delete(self, keys):
+        if not keys:
+            self.data.clear()
+            return
+        parents = [self.data]
+        for key in keys[:-1]:
+            node = parents[-1].get(key)
+            if not isinstance(node, dict):
+                return
+            parents.append(node)
+        parents[-1].pop(keys[-1], None)
+        # like Firebase, empty nodes do not exist
+        for parent, key in zip(parents[-2::-1], keys[-2::-1]):
+            if parent[key]:
+                break
+            del parent[key]
+
+
+def _make_handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, value, status=200):
+            body = json.dumps(value).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            return json.loads(self.rfile.read(length).decode() or 'null')
+
+        def _handle(self, method):
+            url = urllib.parse.urlparse(self.path)
+            query = urllib.parse.parse_qs(url.query)
+            body = self._body() if method in ('PUT', 'POST', 'PATCH') else None
+            if server.latency:
+                time.sleep(server.latency)
+            with server._lock:
+                server.requests.append((method, url.path))
+                if url.path.endswith('verifyPassword'):
+                    id_token, refresh_token = server._new_tokens()
+                    return self._reply({'idToken': id_token,
+                                        'refreshToken': refresh_token,
+                                        'expiresIn': str(server.expires_in)})
+                if url.path.endswith('/token'):
+                    id_token, refresh_token = server._new_tokens()
+                    return self._reply({'id_token': id_token,
+                                        'refresh_token': refresh_token,
+                                        'expires_in': str(server.expires_in)})
+                if query.get('auth', [None])[0] not in server.id_tokens:
+                    return self._reply({'error': 'Permission denied'}, 401)
+                path = url.path[len('/db'):]
+                if path.endswith('.json'):
+                    path = path[:-len('.json')]
+                keys = [key for key in path.split('/') if key]
+                if method == 'GET':
+                    value = server.get(keys)
+                    if query.get('shallow') == ['true'] and isinstance(value, dict):
+                        value = {key: True for key in value}
+                    return self._reply(value)
+                if method == 'PUT':
+                    server.set(keys, body)
+                    return self._reply(body)
+                if method == 'POST':
+                    name = server._push_name()
+                    server.set(keys + [name], body)
+                    return self._reply({'name': name})
+                if method == 'PATCH':
+                    for key, value in body.items():
+                        server.set(keys + [k for k in key.split('/') if k], value)
+                    return self._reply(body)
+                if method == 'DELETE':
+                    server.delete(keys)
+                    return self._reply(None)
+
+        def do_GET(self):
+            self._handle('GET')
+
+        def do_PUT(self):
+            self._handle('PUT')
+
+        def do_POST(self):
+            self._handle('POST')
+
+        def do_PATCH(self):
+            self._handle('PATCH')
+
+        def do_DELETE(self):
+            self._handle('DELETE')
+
+    return Handler
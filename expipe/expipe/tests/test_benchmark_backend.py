@@ -0,0 +1,71 @@
+import pytest
+import datetime as dt
+import expipe
+from firebase_server import FirebaseServer
+
+pytest.importorskip('pytest_benchmark')
+
+# round trip of a nearby Firebase server
+LATENCY = 0.02
+N = 100
+
+
+@pytest.fixture
+def firebase(monkeypatch):
+    server = FirebaseServer().start()
+    monkeypatch.setattr(expipe, 'settings', server.settings())
+    monkeypatch.setattr(expipe.core, 'firebase_auth_url',
+                        server.url + '/verifyPassword?key={api_key}')
+    monkeypatch.setattr(expipe.core, 'firebase_token_url',
+                        server.url + '/token?key={api_key}')
+    # every round goes to the server
+    monkeypatch.setattr(expipe.core.firebase_cache, 'ttl', 0)
+    expipe.core.firebase_auth.reset()
+    server.data.update({
+        'projects': {'project': {'registered': 'now'}},
+        'actions': {'project': {'action': {'type': 'recording'}}},
+        'action_modules': {'project': {'action': {
+            'module-{}'.format(i): {'i': i} for i in range(N)}}},
+    })
+    server.latency = LATENCY
+    yield server
+    server.stop()
+    expipe.core.firebase_auth.reset()
+    expipe.core.firebase_cache.clear()
+
+
+def messages_setup():
+    db = expipe.core.FirebaseBackend('action_messages/project/action')
+    datetime = dt.datetime(2018, 1, 1).strftime(expipe.core.datetime_format)
+    db.set({'message-{}'.format(i): {'text': 'hello', 'user': 'me',
+                                     'datetime': datetime}
+            for i in range(N)})
+    return (), {}
+
+
+def test_modules_to_dict_serial(benchmark, firebase):
+    action = expipe.get_project('project').actions['action']
+
+    def run():
+        return {name: action.modules[name].to_dict()
+                for name in action.modules.keys()}
+    assert len(benchmark.pedantic(run, rounds=3)) == N
+
+
+def test_modules_to_dict_async(benchmark, firebase):
+    action = expipe.get_project('project').actions['action']
+    assert len(benchmark.pedantic(action.modules.to_dict, rounds=3)) == N
+
+
+def test_delete_messages_serial(benchmark, firebase):
+    action = expipe.get_project('project').actions['action']
+
+    def run():
+        for message in action.messages:
+            action._db_messages.delete(name=message.name)
+    benchmark.pedantic(run, setup=messages_setup, rounds=3)
+
+
+def test_delete_messages_async(benchmark, firebase):
+    action = expipe.get_project('project').actions['action']
+    benchmark.pedantic(action.delete_messages, setup=messages_setup, rounds=3)
@@ -0,0 +1,448 @@
+import pytest
+import datetime as dt
+import json
+import time
+import numpy as np
+import quantities as pq
+import expipe
+from firebase_server import FirebaseServer
+
+
+@pytest.fixture
+def firebase(monkeypatch):
+    server = FirebaseServer().start()
+    monkeypatch.setattr(expipe, 'settings', server.settings())
+    monkeypatch.setattr(expipe.core, 'firebase_auth_url',
+                        server.url + '/verifyPassword?key={api_key}')
+    monkeypatch.setattr(expipe.core, 'firebase_token_url',
+                        server.url + '/token?key={api_key}')
+    expipe.core.firebase_auth.reset()
+    expipe.core.reset_request_stats()
+    expipe.core.firebase_cache.clear()
+    expipe.core.firebase_cache.reset_stats()
+    yield server
+    server.stop()
+    expipe.core.firebase_auth.reset()
+    expipe.core.firebase_cache.clear()
+
+
+def test_token_reused_between_backends(firebase):
+    one = expipe.core.FirebaseBackend('/actions/project')
+    two = expipe.core.FirebaseBackend('/entities/project')
+    one.set('ret_1', {'type': 'recording'})
+    two.set('mouse', {'type': 'animal'})
+    assert one.get('ret_1') == {'type': 'recording'}
+    assert two.exists('mouse')
+    assert one.get(shallow=True) == {'ret_1': True}
+    assert one.push({'type': 'surgery'})['name'] in one.get()
+    one.delete('ret_1')
+    assert not one.exists('ret_1')
+
+    assert firebase.count('POST', '/verifyPassword') == 1
+    assert firebase.count('POST', '/token') == 0
+    stats = expipe.core.request_stats()
+    assert stats['auth']['count'] == 1
+    assert 'refresh' not in stats
+    assert stats['get']['count'] == 5
+    assert stats['set']['count'] == 3
+    assert stats['push']['count'] == 1
+    assert all(s['time'] > 0 for s in stats.values())
+
+
+def test_token_refreshed_when_expired(firebase, monkeypatch):
+    monkeypatch.setattr(expipe.core.firebase_cache, 'ttl', 0)
+    db = expipe.core.FirebaseBackend('/projects')
+    db.set('project', {'registered': 'now'})
+    expipe.core.firebase_auth.token_expiration = dt.datetime.now()
+    assert db.exists('project')
+    assert db.exists('project')
+    assert firebase.count('POST', '/verifyPassword') == 1
+    assert firebase.count('POST', '/token') == 1
+    assert expipe.core.request_stats()['refresh']['count'] == 1
+
+    # other credentials log in again
+    expipe.settings['firebase']['email'] = 'other@example.com'
+    assert db.exists('project')
+    assert firebase.count('POST', '/verifyPassword') == 2
+
+
+def test_session_is_pooled(firebase):
+    db = expipe.core.FirebaseBackend('/projects')
+    session = expipe.core.firebase_auth.session
+    db.set('project', {'registered': 'now'})
+    assert expipe.core.FirebaseBackend('/actions').get() is None
+    assert expipe.core.firebase_auth.session is session
+
+
+def test_project_over_http(firebase):
+    project = expipe.core.require_project('project')
+    action = project.require_action('action')
+    action.type = 'recording'
+    action.tags = ['one', 'two']
+    action.create_message('hello')
+    project.require_module('module', contents={'a': 1})
+    assert project.actions['action'].type == 'recording'
+    assert set(project.actions['action'].tags) == {'one', 'two'}
+    assert [m.text for m in action.messages] == ['hello']
+    assert project.modules['module'].to_dict() == {'a': 1}
+    assert firebase.count('POST', '/verifyPassword') == 1
+    expipe.core.delete_project('project', remove_all_childs=True)
+    assert firebase.data == {}
+
+
+def make_project(firebase, n_actions=20):
+    firebase.data.update({
+        'projects': {'project': {'registered': 'now'}},
+        'actions': {'project': {
+            'action-{}'.format(i): {'type': 'recording', 'tags': ['a', 'b']}
+            for i in range(n_actions)}},
+        'action_modules': {'project': {
+            'action-{}'.format(i): {'tracking': {'x': i}}
+            for i in range(n_actions)}},
+    })
+    return expipe.core.get_project('project')
+
+
+def test_cache_loop_over_actions(firebase):
+    project = make_project(firebase)
+    firebase.requests.clear()
+    for name in project.actions:
+        action = project.actions[name]
+        assert action.type == 'recording'
+        assert name in project.actions
+        assert len(project.actions) == 20
+    # one listing and one get per action
+    assert firebase.count('GET') == 21
+    firebase.requests.clear()
+    for name, action in project.actions.items():
+        assert action.type == 'recording'
+        assert action.modules['tracking'].to_dict() == {'x': int(name[7:])}
+    assert firebase.count('GET', '/db/actions') == 0
+    assert firebase.count('GET', '/db/action_modules') == 40
+    stats = expipe.core.firebase_cache.stats()
+    assert stats['hits'] > stats['misses']
+
+
+def test_cache_children_of_cached_values(firebase):
+    project = make_project(firebase, n_actions=3)
+    assert len(project.actions.to_dict()) == 3
+    firebase.requests.clear()
+    assert project.actions['action-1'].tags[:] == ['a', 'b']
+    assert 'action-5' not in project.actions
+    with pytest.raises(KeyError):
+        project.actions['action-5']
+    assert firebase.count('GET') == 0
+
+
+def test_cache_invalidated_by_writes(firebase):
+    project = make_project(firebase, n_actions=3)
+    assert len(project.actions) == 3
+    action = project.actions['action-1']
+    assert action.modules['tracking'].to_dict() == {'x': 1}
+    project.require_action('new')
+    assert len(project.actions) == 4
+    action.modules['tracking']['y'] = 2
+    assert action.modules['tracking'].to_dict() == {'x': 1, 'y': 2}
+    action.type = 'surgery'
+    assert project.actions['action-1'].type == 'surgery'
+    project.delete_action('new')
+    assert 'new' not in project.actions
+    assert expipe.core.firebase_cache.stats()['invalidations'] > 0
+
+
+def test_cache_expires(firebase, monkeypatch):
+    project = make_project(firebase, n_actions=3)
+    monkeypatch.setattr(expipe.core.firebase_cache, 'ttl', 0.05)
+    assert len(project.actions) == 3
+    # changed by another client
+    firebase.data['actions']['project']['other'] = {'type': 'surgery'}
+    assert len(project.actions) == 3
+    time.sleep(0.1)
+    assert len(project.actions) == 4
+
+    expipe.core.firebase_cache.process_event(
+        '/actions/project', 'put',
+        json.dumps({'path': '/other', 'data': None}))
+    del firebase.data['actions']['project']['other']
+    assert len(project.actions) == 3
+
+
+def test_cache_disabled(firebase, monkeypatch):
+    project = make_project(firebase, n_actions=3)
+    monkeypatch.setattr(expipe.core.firebase_cache, 'ttl', 0)
+    expipe.core.firebase_cache.clear()
+    firebase.requests.clear()
+    assert len(project.actions) == 3
+    assert len(project.actions) == 3
+    assert firebase.count('GET') == 2
+    assert expipe.core.firebase_cache.stats()['entries'] == 0
+
+
+def test_snapshot(firebase):
+    project = make_project(firebase, n_actions=2000)
+    firebase.data['actions']['project']['action-3']['datetime'] = '2018-01-02T10:00:00'
+    firebase.data['action_messages'] = {'project': {'action-3': {
+        '-b': {'text': 'second', 'user': 'me', 'datetime': '2018-01-02T11:00:00'},
+        '-a': {'text': 'first', 'user': 'me', 'datetime': '2018-01-02T10:00:00'}}}}
+    firebase.data['action_modules']['project']['action-3']['position'] = {
+        'depth': {'value': [1.5, 2.], 'unit': 'mm'}}
+    firebase.requests.clear()
+    snapshot = project.snapshot()
+    assert firebase.count('GET') == 3
+
+    assert len(snapshot.actions) == 2000
+    action = snapshot.actions['action-3']
+    assert action.type == 'recording'
+    assert action.tags == ['a', 'b']
+    assert action.entities == []
+    assert action.datetime == dt.datetime(2018, 1, 2, 10)
+    assert [m['text'] for m in action.messages] == ['first', 'second']
+    assert action.messages[1]['datetime'] == dt.datetime(2018, 1, 2, 11)
+    assert set(action.modules) == {'tracking', 'position'}
+    assert action.modules['tracking'].to_dict() == {'x': 3}
+    assert action.modules['tracking']['x'].to_dict() == {}
+    depth = action.modules['position'].to_dict()['depth']
+    assert isinstance(depth, pq.Quantity)
+    assert np.array_equal(depth, [1.5, 2.] * pq.mm)
+    with pytest.raises(AttributeError):
+        action.type = 'surgery'
+    action.modules['tracking'].to_dict()['x'] = 10
+    assert action.modules['tracking'].to_dict() == {'x': 3}
+    assert snapshot.entities == {}
+
+    snapshot = project.snapshot(paths=['actions', 'entities'])
+    assert snapshot.actions['action-3'].modules == {}
+
+
+def test_prefetch(firebase):
+    project = make_project(firebase, n_actions=50)
+    firebase.requests.clear()
+    trees = project.prefetch()
+    assert set(trees) == {'actions', 'action_modules', 'action_messages'}
+    summary = {}
+    for name in project.actions:
+        action = project.actions[name]
+        summary[name] = (action.type, list(action.tags),
+                         action.modules['tracking'].to_dict())
+    assert summary['action-7'] == ('recording', ['a', 'b'], {'x': 7})
+    assert firebase.count('GET') == 3
+
+
+def test_batch_single_patch(firebase):
+    project = expipe.core.require_project('project')
+    action = project.create_action('action')
+    firebase.requests.clear()
+    with action.batch():
+        action.datetime = dt.datetime(2018, 1, 2, 10)
+        action.type = 'Recording'
+        action.tags = ['open-ephys']
+        action.entities = ['mouse']
+        action.users = ['me']
+        action.location = 'room1'
+        action.create_module('tracking', contents={'x': 1 * pq.m})
+        action.create_message('hello', user='me')
+        # the collected writes are visible inside the batch
+        assert 'tracking' in action.modules
+        assert action.modules['tracking'].to_dict() == {'x': 1 * pq.m}
+        assert [m.text for m in action.messages] == ['hello']
+        assert firebase.count('PATCH') == 0
+        assert firebase.count('PUT') == 0
+        assert firebase.count('POST') == 0
+    assert firebase.count('PATCH') == 1
+    assert firebase.count('PUT') == 0
+    assert firebase.count('POST') == 0
+
+    action = project.actions['action']
+    assert action.type == 'Recording'
+    assert action.datetime == dt.datetime(2018, 1, 2, 10)
+    assert action.tags[:] == ['open-ephys']
+    assert action.location == 'room1'
+    assert 'registered' in action._db.get()
+    assert action.modules['tracking'].to_dict() == {'x': 1 * pq.m}
+    assert [m.text for m in action.messages] == ['hello']
+
+
+def test_batch_all_or_nothing(firebase):
+    project = expipe.core.require_project('project')
+    action = project.create_action('action')
+    with pytest.raises(ValueError):
+        with action.batch():
+            action.type = 'Recording'
+            action.create_module('tracking', contents={'x': 1})
+            raise ValueError
+    assert firebase.count('PATCH') == 0
+    assert project.actions['action'].type is None
+    assert 'tracking' not in action.modules
+
+    with action.batch():
+        with project.batch():
+            action.type = 'Recording'
+        assert firebase.count('PATCH') == 0
+        action.create_module('tracking', contents={'x': 1, 'y': {'z': 2}})
+        action.modules['tracking']['y'] = {'w': 3}
+        assert action.modules['tracking'].to_dict() == {'x': 1, 'y': {'w': 3}}
+        action.delete_module('tracking')
+        assert 'tracking' not in action.modules
+    assert firebase.count('PATCH') == 1
+    assert project.actions['action'].type == 'Recording'
+    assert 'tracking' not in action.modules
+
+
+def test_write_batch_paths():
+    batch = expipe.core.WriteBatch()
+    batch.set('/a/b', {'c': 1})
+    batch.set('a/b/d', 2)
+    batch.set('a/e', 3)
+    assert dict(batch.writes) == {'a/b': {'c': 1, 'd': 2}, 'a/e': 3}
+    batch.set('a', {'f': 4})
+    assert dict(batch.writes) == {'a': {'f': 4}}
+    batch.set('a/f', {})
+    assert dict(batch.writes) == {'a': None}
+    assert batch.read('a/f', False, None) == (True, None)
+
+    batch = expipe.core.WriteBatch()
+    batch.set('a/b/c', 1)
+    batch.set('a/x', None)
+    found, value = batch.read('a', True, lambda: {'x': 5, 'y': 6})
+    assert found
+    assert value == {'y': True, 'b': True}
+    assert batch.read('z', False, None) == (False, None)
+
+
+def test_push_ids_are_ordered():
+    ids = [expipe.core._push_id() for _ in range(1000)]
+    assert len(set(ids)) == 1000
+    assert sorted(ids) == ids
+    assert all(len(key) == 20 for key in ids)
+
+
+def test_async_backend(firebase):
+    import asyncio
+    db = expipe.core.AsyncFirebaseBackend('/actions/project', concurrency=4)
+
+    async def run():
+        await db.set_async('ret_1', {'type': 'recording'})
+        name = (await db.push_async({'type': 'surgery'}))['name']
+        await db.update_async('ret_1', {'tags': ['a']})
+        assert await db.exists_async('ret_1')
+        values = await db.get_many_async(['ret_1', name, 'missing'])
+        await db.delete_async(name)
+        return values
+    values = asyncio.run(run())
+    assert values == [{'type': 'recording', 'tags': ['a']},
+                      {'type': 'surgery'}, None]
+    # the blocking methods are kept
+    assert db.get(shallow=True) == {'ret_1': True}
+    assert isinstance(db, expipe.core.AbstractBackend)
+
+
+def test_async_requests_are_concurrent(firebase, monkeypatch):
+    monkeypatch.setattr(expipe.core.firebase_cache, 'ttl', 0)
+    db = expipe.core.FirebaseBackend('/messages')
+    db.set({'m{}'.format(i): {'i': i} for i in range(40)})
+    names = ['m{}'.format(i) for i in range(40)]
+    firebase.latency = 0.05
+    start = time.perf_counter()
+    values = db.get_many(names)
+    # serial requests would take at least 2 s
+    assert time.perf_counter() - start < 1.
+    assert values == [{'i': i} for i in range(40)]
+    start = time.perf_counter()
+    db.delete_many(names[:20])
+    assert time.perf_counter() - start < 1.
+    assert sorted(db.get(shallow=True)) == sorted(names[20:])
+
+
+def test_async_backend_inside_event_loop(firebase):
+    import asyncio
+    db = expipe.core.FirebaseBackend('/messages')
+    db.set({'a': 1, 'b': 2})
+
+    async def run():
+        # the blocking wrappers also work from a running loop, as in Jupyter
+        return db.get_many(['a', 'b'])
+    assert asyncio.run(run()) == [1, 2]
+
+
+def test_async_bulk_managers(firebase):
+    project = expipe.core.require_project('project')
+    action = project.require_action('action')
+    for i in range(10):
+        action.create_module('module-{}'.format(i), contents={'i': i})
+        action.create_message('message {}'.format(i), user='me',
+                              datetime=dt.datetime(2018, 1, 1, i))
+    assert action.modules.to_dict() == {
+        'module-{}'.format(i): {'i': i} for i in range(10)}
+    messages = action.messages.to_list()
+    assert sorted(m['text'] for m in messages) == [
+        'message {}'.format(i) for i in range(10)]
+    assert {'text': 'message 3', 'user': 'me',
+            'datetime': dt.datetime(2018, 1, 1, 3)} in action.messages
+    firebase.requests.clear()
+    action.delete_messages()
+    assert firebase.count('PUT', '/db/action_messages') == 10
+    assert len(action.messages) == 0
+
+
+def test_async_bulk_in_batch(firebase):
+    project = expipe.core.require_project('project')
+    action = project.require_action('action')
+    action.create_message('hello', user='me')
+    firebase.requests.clear()
+    with action.batch():
+        action.delete_messages()
+        assert len(action.messages) == 0
+        assert firebase.count('PUT') == 0
+    assert firebase.count('PATCH') == 1
+    assert len(action.messages) == 0
+
+
+def test_set_none_targets_name(firebase):
+    project = expipe.core.require_project('project')
+    action = project.require_action('action')
+    action.create_module('a', contents={'x': 1})
+    action.create_module('b', contents={'x': 2})
+    db = expipe.core.FirebaseBackend('action_modules/project/action')
+    firebase.requests.clear()
+    db.set('a', None)
+    assert firebase.requests == [('PUT', '/db/action_modules/project/action/a.json')]
+    assert list(action.modules.keys()) == ['b']
+    with action.batch():
+        db.set('b', None)
+        assert list(action.modules.keys()) == []
+    # only the module is deleted, not its parents
+    assert 'action_modules' not in firebase.data
+    assert 'action' in firebase.data['actions']['project']
+    # a single argument is still the value
+    db.set({'c': {'x': 3}})
+    assert action.modules['c'].to_dict() == {'x': 3}
+
+
+def test_batch_registration(firebase):
+    project = expipe.core.require_project('project')
+    project.create_action('action')
+    action = project.actions['action']
+    action.create_message('old', user='me')
+    action.create_module('old', contents={'x': 1})
+    firebase.requests.clear()
+    # as in the open-ephys registration of expipe-plugin-cinpla
+    with project.batch():
+        action = project.create_action('action', overwrite=True)
+        action.require_filerecord()
+        action.type = 'Recording'
+        action.create_module('tracking', contents={'x': 1})
+    assert firebase.count('PATCH') == 1
+    assert firebase.count('PUT') == firebase.count('POST') == 0
+    assert firebase.data['files']['project']['action'] == {
+        'main': {'path': 'project/action/main.exdir'}}
+    assert list(action.modules.keys()) == ['tracking']
+    assert len(action.messages) == 0
+
+    firebase.requests.clear()
+    with pytest.raises(KeyError):
+        with project.batch():
+            action = project.create_action('other')
+            action.require_filerecord()
+            raise KeyError
+    assert firebase.count('PATCH') == 0
+    assert 'other' not in project.actions
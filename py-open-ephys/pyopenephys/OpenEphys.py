@@ -16,6 +16,9 @@ import time
 import struct
 from copy import deepcopy
 
+# NOTE the vectorised reader in tools replaces the record-by-record loop
+from pyopenephys.tools import loadContinuous
+
 # constants
 NUM_HEADER_BYTES = 1024
 SAMPLES_PER_RECORD = 1024
@@ -103,67 +106,6 @@ def loadFolderToArray(folderpath, channels='all', chprefix='CH',
     return data_array
 
 
-def loadContinuous(filepath, dtype=float):
-    assert dtype in (float, np.int16), \
-        'Invalid data type specified for loadContinous, valid types are float and np.int16'
-
-    # print("Loading continuous data...")
-
-    ch = {}
-
-    # read in the data
-    f = open(filepath, 'rb')
-
-    fileLength = os.fstat(f.fileno()).st_size
-
-    # calculate number of samples
-    recordBytes = fileLength - NUM_HEADER_BYTES
-    if recordBytes % RECORD_SIZE != 0:
-        raise Exception("File size is not consistent with a continuous file: may be corrupt")
-    nrec = recordBytes // RECORD_SIZE
-    nsamp = nrec * SAMPLES_PER_RECORD
-    # pre-allocate samples
-    samples = np.zeros(nsamp, dtype)
-    timestamps = np.zeros(nrec)
-    recordingNumbers = np.zeros(nrec)
-    indices = np.arange(0, nsamp + 1, SAMPLES_PER_RECORD, np.dtype(np.int64))
-
-    header = readHeader(f)
-
-    recIndices = np.arange(0, nrec)
-
-    for recordNumber in recIndices:
-
-        timestamps[recordNumber] = np.fromfile(f, np.dtype('<i8'), 1)  # little-endian 64-bit signed integer
-        N = np.fromfile(f, np.dtype('<u2'), 1)[0]  # little-endian 16-bit unsigned integer
-
-        # print index
-
-        if N != SAMPLES_PER_RECORD:
-            raise Exception('Found corrupted record in block ' + str(recordNumber))
-
-        recordingNumbers[recordNumber] = (np.fromfile(f, np.dtype('>u2'), 1))  # big-endian 16-bit unsigned integer
-
-        if dtype == float:  # Convert data to float array and convert bits to voltage.
-            data = np.fromfile(f, np.dtype('>i2'), N) * float(
-                header['bitVolts'])  # big-endian 16-bit signed integer, multiplied by bitVolts
-        else:  # Keep data in signed 16 bit integer format.
-            data = np.fromfile(f, np.dtype('>i2'), N)  # big-endian 16-bit signed integer
-        samples[indices[recordNumber]:indices[recordNumber + 1]] = data
-
-        marker = f.read(10)  # dump
-
-    # print recordNumber
-    # print index
-
-    ch['header'] = header
-    ch['timestamps'] = timestamps
-    ch['data'] = samples  # OR use downsample(samples,1), to save space
-    ch['recordingNumber'] = recordingNumbers
-    f.close()
-    return ch
-
-
 def loadSpikes(filepath):
     '''
     Loads spike waveforms and timestamps from filepath (should be .spikes file)
@@ -717,20 +717,19 @@ class Recording:
 
                 if len(contFiles) != 0:
                     print('Reading all channels')
-                    anas = np.array([])
+                    channels = []
+                    anas_start = 0
+                    anas_end = None
                     for i_f, f in enumerate(contFiles):
                         print(f)
                         fullpath = op.join(self.absolute_foldername, f)
-                        sig = loadContinuous(fullpath)
+                        # NOTE samples are only decoded when indexed
+                        sig = loadContinuous(fullpath, lazy=True)
                         block_len = int(sig['header']['blockLength'])
                         sample_rate = float(sig['header']['sampleRate'])
-                        if anas.shape[0] < 1:
-                            anas = sig['data'][None, :]
-                        else:
-                            if sig['data'].size == anas[-1].size:
-                                anas = np.append(anas, sig['data'][None, :], axis=0)
-                            else:
-                                raise Exception('Channels must have the same number of samples')
+                        if len(channels) > 0 and len(sig['data']) != len(channels[-1]):
+                            raise Exception('Channels must have the same number of samples')
+                        channels.append(sig['data'])
 
                         if i_f == len(contFiles) - 1:
                             # Recordings number
@@ -745,13 +744,15 @@ class Recording:
                                 anas_start = idx_start*block_len
                                 anas_end = (idx_end + 1)*block_len
                                 ts = np.arange(t_start, t_end) / sample_rate
-                                anas = anas[:, anas_start:anas_end]
+                    anas = ChannelArray(channels, start=anas_start, stop=anas_end)
                     self._processor_sample_rate = sample_rate
                     nsamples = anas.shape[1]
+            if not isinstance(anas, ChannelArray):
+                anas = ChannelArray(anas)
             # Keep only selected channels
             if self._keep_channels is not None:
                 assert anas.shape[1] == nsamples, 'Assumed wrong shape'
-                anas_keep = anas[self._keep_channels, :]
+                anas_keep = anas.select_channels(self._keep_channels)
             else:
                 anas_keep = anas
             self._analog_signals = [AnalogSignal(
@@ -0,0 +1,63 @@
+import os
+import pytest
+import numpy as np
+
+pytest.importorskip('pytest_benchmark')
+
+from pyopenephys.tools import (loadContinuous, readHeader, NUM_HEADER_BYTES,
+                               SAMPLES_PER_RECORD, RECORD_SIZE)
+from pyopenephys.tests.test_continuous import write_continuous
+
+
+def load_continuous_per_record(filepath, dtype=float):
+    """The previous implementation, reading one record at a time."""
+    f = open(filepath, 'rb')
+    fileLength = os.fstat(f.fileno()).st_size
+    nrec = (fileLength - NUM_HEADER_BYTES) // RECORD_SIZE
+    nsamp = nrec * SAMPLES_PER_RECORD
+    samples = np.zeros(nsamp, dtype)
+    timestamps = np.zeros(nrec)
+    recordingNumbers = np.zeros(nrec)
+    indices = np.arange(0, nsamp + 1, SAMPLES_PER_RECORD, np.dtype(np.int64))
+    header = readHeader(f)
+    for recordNumber in np.arange(0, nrec):
+        timestamps[recordNumber] = np.fromfile(f, np.dtype('<i8'), 1)
+        N = np.fromfile(f, np.dtype('<u2'), 1)[0]
+        recordingNumbers[recordNumber] = (np.fromfile(f, np.dtype('>u2'), 1))
+        if dtype == float:
+            data = np.fromfile(f, np.dtype('>i2'), N) * float(header['bitVolts'])
+        else:
+            data = np.fromfile(f, np.dtype('>i2'), N)
+        samples[indices[recordNumber]:indices[recordNumber + 1]] = data
+        f.read(10)
+    f.close()
+    return {'header': header, 'timestamps': timestamps, 'data': samples,
+            'recordingNumber': recordingNumbers}
+
+
+@pytest.fixture(scope='module')
+def long_continuous_file(tmpdir_factory):
+    # about 70 s of one channel at 30 kHz
+    samples = np.random.RandomState(0).randint(-2000, 2000, 2048 * SAMPLES_PER_RECORD)
+    filename = str(tmpdir_factory.mktemp('continuous').join('100_CH1.continuous'))
+    write_continuous(filename, samples)
+    return filename
+
+
+def test_load_continuous_per_record(benchmark, long_continuous_file):
+    ch = benchmark(load_continuous_per_record, long_continuous_file)
+    assert np.array_equal(ch['data'], loadContinuous(long_continuous_file)['data'])
+
+
+def test_load_continuous_vectorised(benchmark, long_continuous_file):
+    benchmark(loadContinuous, long_continuous_file)
+
+
+def test_load_continuous_vectorised_int16(benchmark, long_continuous_file):
+    benchmark(loadContinuous, long_continuous_file, dtype=np.int16)
+
+
+def test_load_continuous_lazy_slice(benchmark, long_continuous_file):
+    def load_slice():
+        return loadContinuous(long_continuous_file, dtype=np.int16, lazy=True)['data'][30000:60000]
+    benchmark(load_slice)
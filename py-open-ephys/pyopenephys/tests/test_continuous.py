@@ -0,0 +1,93 @@
+import os
+import pytest
+import numpy as np
+
+from pyopenephys.tools import (loadContinuous, ContinuousSamples,
+                               NUM_HEADER_BYTES, SAMPLES_PER_RECORD,
+                               RECORD_MARKER)
+
+
+def write_continuous(filename, samples, bit_volts=0.195, recording_numbers=None,
+                     first_timestamp=0):
+    assert len(samples) % SAMPLES_PER_RECORD == 0
+    num_records = len(samples) // SAMPLES_PER_RECORD
+    if recording_numbers is None:
+        recording_numbers = np.zeros(num_records, dtype=int)
+    header = ("header.format = 'Open Ephys Data Format'; \n"
+              "header.version = 0.4;\n"
+              "header.sampleRate = 30000;\n"
+              "header.blockLength = 1024;\n"
+              "header.bitVolts = {};\n".format(bit_volts))
+    with open(filename, 'wb') as f:
+        f.write(header.encode().ljust(NUM_HEADER_BYTES))
+        for i in range(num_records):
+            f.write(np.array(first_timestamp + i * SAMPLES_PER_RECORD, '<i8').tobytes())
+            f.write(np.array(SAMPLES_PER_RECORD, '<u2').tobytes())
+            f.write(np.array(recording_numbers[i], '>u2').tobytes())
+            record = samples[i * SAMPLES_PER_RECORD:(i + 1) * SAMPLES_PER_RECORD]
+            f.write(np.asarray(record, '>i2').tobytes())
+            f.write(RECORD_MARKER.astype('u1').tobytes())
+
+
+@pytest.fixture
+def continuous_file(tmpdir):
+    samples = np.random.RandomState(0).randint(-2000, 2000, 5 * SAMPLES_PER_RECORD)
+    filename = str(tmpdir.join('100_CH1.continuous'))
+    write_continuous(filename, samples, recording_numbers=[0, 0, 1, 1, 1])
+    return filename, samples
+
+
+def test_load_continuous(continuous_file):
+    filename, samples = continuous_file
+
+    ch = loadContinuous(filename)
+    assert ch['header']['bitVolts'] == '0.195'
+    assert ch['data'].dtype == float
+    assert np.allclose(ch['data'], samples * 0.195)
+    assert np.array_equal(ch['timestamps'], np.arange(5) * SAMPLES_PER_RECORD)
+    assert np.array_equal(ch['recordingNumber'], [0, 0, 1, 1, 1])
+    assert np.array_equal(ch['marker'][0], RECORD_MARKER)
+
+    ch = loadContinuous(filename, dtype=np.int16)
+    assert ch['data'].dtype == np.int16
+    assert np.array_equal(ch['data'], samples)
+
+
+@pytest.mark.parametrize('index', [
+    slice(None),
+    slice(1000, 1100),
+    slice(1000, 3000, 7),
+    slice(None, None, -1),
+    slice(3000, 1000, -3),
+    slice(5000, 100000),
+    5,
+    -1,
+    [0, 1023, 1024, 5119],
+])
+def test_load_continuous_lazy(continuous_file, index):
+    filename, samples = continuous_file
+
+    ch = loadContinuous(filename, dtype=np.int16, lazy=True)
+    assert isinstance(ch['data'], ContinuousSamples)
+    assert len(ch['data']) == len(samples)
+    assert np.array_equal(ch['data'][index], samples[index])
+
+    ch = loadContinuous(filename, lazy=True)
+    assert np.allclose(ch['data'][index], samples[index] * 0.195)
+
+
+def test_load_continuous_corrupt(tmpdir):
+    filename = str(tmpdir.join('100_CH1.continuous'))
+    write_continuous(filename, np.zeros(2 * SAMPLES_PER_RECORD))
+    with open(filename, 'r+b') as f:
+        f.seek(NUM_HEADER_BYTES + 8)
+        f.write(np.array(10, '<u2').tobytes())
+
+    with pytest.raises(Exception):
+        loadContinuous(filename)
+
+    with open(filename, 'ab') as f:
+        f.write(b'0')
+
+    with pytest.raises(Exception):
+        loadContinuous(filename)
@@ -18,4 +18,61 @@ def test_clip_spiketrains():
     pass
 
 def test_clip_times():
-    pass
\ No newline at end of file
+    pass
+
+def _channel_sources(tmpdir):
+    from pyopenephys.tests.test_continuous import write_continuous
+    random_state = np.random.RandomState(1)
+    data = random_state.randint(-2000, 2000, (4, 3 * SAMPLES_PER_RECORD))
+    channels = []
+    for i, samples in enumerate(data):
+        filename = str(tmpdir.join('100_CH{}.continuous'.format(i + 1)))
+        write_continuous(filename, samples)
+        channels.append(loadContinuous(filename, dtype=np.int16, lazy=True)['data'])
+    return data, channels
+
+
+@pytest.mark.parametrize('index', [
+    (slice(None), slice(None)),
+    1,
+    -1,
+    (2, slice(100, 200)),
+    ([0, 3], slice(3000, 1000, -2)),
+    (slice(1, 3), [5, 1200, 1499]),
+    (slice(None), 17),
+    (slice(None, None, -1), slice(None, None, -1)),
+    ([], slice(10, 20)),
+])
+def test_channel_array(tmpdir, index):
+    data, channels = _channel_sources(tmpdir)
+
+    anas = ChannelArray(channels)
+    assert anas.shape == data.shape
+    assert anas.dtype == np.int16
+    assert np.array_equal(anas[index], data[index])
+
+    anas = ChannelArray(channels, start=1000, stop=2500)
+    assert anas.shape == (4, 1500)
+    assert np.array_equal(anas[index], data[:, 1000:2500][index])
+
+
+def test_channel_array_select_channels(tmpdir):
+    data, channels = _channel_sources(tmpdir)
+
+    anas = ChannelArray(channels, start=10, stop=100).select_channels([3, 1])
+    assert anas.shape == (2, 90)
+    assert np.array_equal(np.array(anas), data[[3, 1], 10:100])
+    assert np.array_equal(list(anas)[1], data[1, 10:100])
+
+
+def test_channel_array_memmap(tmpdir):
+    data = np.arange(40, dtype='i2').reshape(10, 4)
+    filename = str(tmpdir.join('continuous.dat'))
+    data.tofile(filename)
+
+    with open(filename, 'rb') as fh:
+        samples, nsamples = read_analog_binary_signals(fh, 4)
+    anas = ChannelArray(samples).select_channels([0, 2])
+
+    assert anas.shape == (2, 10)
+    assert np.array_equal(anas[:, 2:5], data.T[[0, 2], 2:5])
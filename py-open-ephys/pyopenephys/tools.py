@@ -135,6 +135,103 @@ def clip_times(times, clipping_times, start_end='start'):
     return times_clip
 
 
+class ChannelArray:
+    """
+    Lazy (channels x samples) view of analog signals.
+
+    source is a sequence of one-dimensional, sample-indexable channels,
+    for instance ContinuousSamples objects or the rows of a memory mapped
+    binary file. Indexing only decodes the selected channels and samples.
+    Use channel_index to select a subset of the source channels and
+    start/stop to restrict the samples.
+    """
+    def __init__(self, source, channel_index=None, start=0, stop=None):
+        self._source = source
+        if channel_index is None:
+            channel_index = np.arange(len(source))
+        self._channel_index = np.asarray(channel_index, dtype=int)
+        if getattr(source, 'ndim', None) == 2:
+            total = source.shape[1]
+            self.dtype = np.dtype(source.dtype)
+        elif len(source) > 0:
+            total = len(source[0])
+            self.dtype = np.dtype(source[0].dtype)
+        else:
+            total = 0
+            self.dtype = np.dtype(float)
+        self._start = int(start)
+        self._stop = total if stop is None else min(int(stop), total)
+
+    def select_channels(self, channel_index):
+        """Return a ChannelArray with a subset of the channels, without decoding."""
+        return ChannelArray(
+            self._source,
+            channel_index=self._channel_index[channel_index],
+            start=self._start,
+            stop=self._stop
+        )
+
+    @property
+    def shape(self):
+        return (len(self._channel_index), max(0, self._stop - self._start))
+
+    @property
+    def ndim(self):
+        return 2
+
+    @property
+    def size(self):
+        return self.shape[0] * self.shape[1]
+
+    def __len__(self):
+        return self.shape[0]
+
+    def _sample_index(self, index):
+        """Translate a sample index into an index on the source channels."""
+        num_samples = self.shape[1]
+        if isinstance(index, slice):
+            start, stop, step = index.indices(num_samples)
+            start += self._start
+            stop += self._start
+            if stop < 0:
+                stop = None
+            return slice(start, stop, step)
+        index = np.asarray(index)
+        if index.dtype == bool:
+            index = np.nonzero(index)[0]
+        if np.any((index < -num_samples) | (index >= num_samples)):
+            raise IndexError('sample index out of bounds')
+        return np.where(index < 0, index + num_samples, index) + self._start
+
+    def __getitem__(self, index):
+        if not isinstance(index, tuple):
+            index = (index,)
+        if len(index) > 2:
+            raise IndexError('too many indices for ChannelArray')
+        channel_index = index[0]
+        sample_index = index[1] if len(index) > 1 else slice(None)
+
+        channels = self._channel_index[channel_index]
+        samples = self._sample_index(sample_index)
+        if np.ndim(channels) == 0:
+            return np.asarray(self._source[int(channels)][samples])
+        if len(channels) == 0:
+            # NOTE index a broadcast scalar to get the shape without allocating
+            dummy = np.broadcast_to(np.empty((), dtype=self.dtype), (self.shape[1],))
+            return np.empty((0,) + dummy[sample_index].shape, dtype=self.dtype)
+        return np.array([self._source[channel][samples] for channel in channels])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __array__(self, dtype=None):
+        result = self[:, :]
+        if dtype is not None:
+            result = result.astype(dtype)
+        return result
+
+
 def read_analog_binary_signals(filehandle, numchan):
 
     numchan=int(numchan)
@@ -165,64 +262,135 @@ MAX_NUMBER_OF_SPIKES = int(1e6)
 MAX_NUMBER_OF_RECORDS = int(1e6)
 MAX_NUMBER_OF_EVENTS = int(1e6)
 
-def loadContinuous(filepath, dtype=float):
-    assert dtype in (float, np.int16), \
-        'Invalid data type specified for loadContinous, valid types are float and np.int16'
-
-    # print("Loading continuous data...")
-
-    ch = {}
-
-    # read in the data
-    f = open(filepath, 'rb')
-
-    fileLength = os.fstat(f.fileno()).st_size
-
-    # calculate number of samples
-    recordBytes = fileLength - NUM_HEADER_BYTES
-    if recordBytes % RECORD_SIZE != 0:
-        raise Exception("File size is not consistent with a continuous file: may be corrupt")
-    nrec = recordBytes // RECORD_SIZE
-    nsamp = nrec * SAMPLES_PER_RECORD
-    # pre-allocate samples
-    samples = np.zeros(nsamp, dtype)
-    timestamps = np.zeros(nrec)
-    recordingNumbers = np.zeros(nrec)
-    indices = np.arange(0, nsamp + 1, SAMPLES_PER_RECORD, np.dtype(np.int64))
-
-    header = readHeader(f)
-
-    recIndices = np.arange(0, nrec)
-
-    for recordNumber in recIndices:
+# layout of one record in a .continuous file
+CONTINUOUS_RECORD_DTYPE = np.dtype([
+    ('timestamp', '<i8'),
+    ('N', '<u2'),
+    ('recordingNumber', '>u2'),
+    ('samples', '>i2', (SAMPLES_PER_RECORD,)),
+    ('marker', 'u1', (len(RECORD_MARKER),)),
+])
+assert CONTINUOUS_RECORD_DTYPE.itemsize == RECORD_SIZE
+
+
+class ContinuousSamples:
+    """
+    Lazy, one-dimensional view of the samples in a .continuous file.
+
+    Only the records covered by an index are decoded. Samples are returned
+    as native int16, or as float multiplied by scale if scale is given.
+    """
+    def __init__(self, samples, scale=None):
+        # samples is the (records, samples per record) big-endian view
+        self._samples = samples
+        self.scale = scale
+        self.shape = (samples.shape[0] * samples.shape[1],)
+        self.dtype = np.dtype(float) if scale is not None else np.dtype(np.int16)
+
+    @property
+    def size(self):
+        return self.shape[0]
+
+    @property
+    def ndim(self):
+        return 1
+
+    def __len__(self):
+        return self.shape[0]
+
+    def _decode(self, samples):
+        if self.scale is not None:
+            return np.multiply(samples, self.scale, dtype=float)
+        return samples.astype(np.int16)
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            if len(index) != 1:
+                raise IndexError('too many indices for ContinuousSamples')
+            index = index[0]
+        record_length = self._samples.shape[1]
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if len(range(start, stop, step)) == 0:
+                return self._decode(self._samples[:0].reshape(-1))
+            first, last = sorted((start, start + (len(range(start, stop, step)) - 1) * step))
+            first_record = first // record_length
+            last_record = last // record_length + 1
+            block = self._samples[first_record:last_record].reshape(-1)
+            offset = first_record * record_length
+            block_stop = stop - offset if stop - offset >= 0 else None
+            return self._decode(block[start - offset:block_stop:step])
+        index = np.asarray(index)
+        if index.dtype == bool:
+            index = np.nonzero(index)[0]
+        index = np.where(index < 0, index + len(self), index)
+        if np.any((index < 0) | (index >= len(self))):
+            raise IndexError('index out of bounds for ContinuousSamples')
+        return self._decode(self._samples[index // record_length, index % record_length])
+
+    def __array__(self, dtype=None):
+        result = self[:]
+        if dtype is not None:
+            result = result.astype(dtype)
+        return result
+
+
+def read_continuous_records(filepath, mmap=False):
+    """
+    Read the header and all records of a .continuous file in one call.
+
+    Returns the header dictionary and a structured array with the fields
+    of CONTINUOUS_RECORD_DTYPE. With mmap=True the records are memory
+    mapped instead of read into memory.
+    """
+    with open(filepath, 'rb') as f:
+        fileLength = os.fstat(f.fileno()).st_size
+        recordBytes = fileLength - NUM_HEADER_BYTES
+        if recordBytes % RECORD_SIZE != 0:
+            raise Exception("File size is not consistent with a continuous file: may be corrupt")
+        nrec = recordBytes // RECORD_SIZE
+        header = readHeader(f)
+        if mmap:
+            records = np.memmap(f, dtype=CONTINUOUS_RECORD_DTYPE, mode='r',
+                                offset=NUM_HEADER_BYTES, shape=(nrec,))
+        else:
+            records = np.fromfile(f, dtype=CONTINUOUS_RECORD_DTYPE, count=nrec)
+    return header, records
 
-        timestamps[recordNumber] = np.fromfile(f, np.dtype('<i8'), 1)  # little-endian 64-bit signed integer
-        N = np.fromfile(f, np.dtype('<u2'), 1)[0]  # little-endian 16-bit unsigned integer
 
-        # print index
+def loadContinuous(filepath, dtype=float, lazy=False):
+    """
+    Load a .continuous file.
 
-        if N != SAMPLES_PER_RECORD:
-            raise Exception('Found corrupted record in block ' + str(recordNumber))
+    All records are decoded at once through a structured dtype. The
+    returned timestamps, recording numbers and markers are views on the
+    records. With dtype=float the samples are converted to voltage using
+    bitVolts from the header.
 
-        recordingNumbers[recordNumber] = (np.fromfile(f, np.dtype('>u2'), 1))  # big-endian 16-bit unsigned integer
+    With lazy=True the file is memory mapped and 'data' is a
+    ContinuousSamples object that only decodes the samples that are
+    indexed. The record sizes are not validated in this mode, since that
+    would require reading the whole file.
+    """
+    assert dtype in (float, np.int16), \
+        'Invalid data type specified for loadContinous, valid types are float and np.int16'
 
-        if dtype == float:  # Convert data to float array and convert bits to voltage.
-            data = np.fromfile(f, np.dtype('>i2'), N) * float(
-                header['bitVolts'])  # big-endian 16-bit signed integer, multiplied by bitVolts
-        else:  # Keep data in signed 16 bit integer format.
-            data = np.fromfile(f, np.dtype('>i2'), N)  # big-endian 16-bit signed integer
-        samples[indices[recordNumber]:indices[recordNumber + 1]] = data
+    header, records = read_continuous_records(filepath, mmap=lazy)
 
-        marker = f.read(10)  # dump
+    if not lazy:
+        corrupted = np.nonzero(records['N'] != SAMPLES_PER_RECORD)[0]
+        if len(corrupted) > 0:
+            raise Exception('Found corrupted record in block ' + str(corrupted[0]))
 
-    # print recordNumber
-    # print index
+    scale = float(header['bitVolts']) if dtype == float else None
+    samples = ContinuousSamples(records['samples'], scale=scale)
 
+    ch = {}
     ch['header'] = header
-    ch['timestamps'] = timestamps
-    ch['data'] = samples  # OR use downsample(samples,1), to save space
-    ch['recordingNumber'] = recordingNumbers
-    f.close()
+    ch['timestamps'] = records['timestamp']
+    ch['data'] = samples if lazy else samples[:]
+    ch['recordingNumber'] = records['recordingNumber']
+    ch['marker'] = records['marker']
     return ch
 
 
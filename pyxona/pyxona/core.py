@@ -111,6 +111,7 @@ class ChannelGroup:
         self.channel_group_id = channel_group_id
         self.channels = channels
         self._adc_fullscale = adc_fullscale
+        self._spike_data = None
 
     @property
     def analog_signals(self):
@@ -118,45 +119,47 @@ class ChannelGroup:
 
     @property
     def spike_train(self):
-        with open(self.filename, "rb") as f:
-            attrs = parse_header_and_leave_cursor(f)
-
-            channel_group_index = self.channel_group_id
-            bytes_per_timestamp = attrs.get("bytes_per_timestamp", 4)
-            bytes_per_sample = attrs.get("bytes_per_sample", 1)
-            num_spikes = attrs.get("num_spikes", 0)
-            num_chans = attrs.get("num_chans", 1)
-            samples_per_spike = attrs.get("samples_per_spike", 50)
-            timebase = int(attrs.get("timebase", "96000 hz").split(" ")[0]) * pq.Hz
-            sample_rate = attrs.get("rawrate", 48000) * pq.Hz
-
-            bytes_per_spike_without_timestamp = samples_per_spike * bytes_per_sample
-            bytes_per_spike = bytes_per_spike_without_timestamp + bytes_per_timestamp
+        return self.read_spike_train()
 
-            timestamp_dtype = ">u" + str(bytes_per_timestamp)
-            waveform_dtype = "<i" + str(bytes_per_sample)
+    def read_spike_train(self, raw_waveforms=False):
+        """
+        Read the spikes of this channel group.
 
-            dtype = np.dtype([("times", (timestamp_dtype, 1), 1), ("waveforms", (waveform_dtype, 1), samples_per_spike)])
+        The file is parsed and memory-mapped once and reused as long as it
+        is unchanged on disk. With raw_waveforms=True, the waveforms are
+        returned as the stored integers (int8 for 1 byte per sample) and
+        spike_train.waveform_scale holds the per-channel factor, with shape
+        (num_chans, 1), that converts them to the scaled waveforms.
+        """
+        attrs, data = self._read_spike_data()
 
-            data = np.fromfile(f, dtype=dtype, count=num_spikes * num_chans)
-            assert_end_of_data(f)
+        bytes_per_sample = attrs.get("bytes_per_sample", 1)
+        num_spikes = attrs.get("num_spikes", 0)
+        num_chans = attrs.get("num_chans", 1)
+        samples_per_spike = attrs.get("samples_per_spike", 50)
+        timebase = int(attrs.get("timebase", "96000 hz").split(" ")[0]) * pq.Hz
+        sample_rate = attrs.get("rawrate", 48000) * pq.Hz
 
-        times = data["times"][::4] / timebase  # time for each waveform is the same, so we take each fourth time
-        waveforms = data["waveforms"]
+        # time for each waveform is the same, so we take the time of the first channel
+        times = data["times"][::num_chans] / timebase
         # TODO is this the correct way to reshape waveforms?
-        waveforms = waveforms.reshape(num_spikes, num_chans, samples_per_spike)
-        waveforms = waveforms.astype(float)
+        waveforms = data["waveforms"].reshape(num_spikes, num_chans, samples_per_spike)
 
-        channel_gain_matrix = np.ones(waveforms.shape)
-        for i, channel in enumerate(self.channels):
-            channel_gain_matrix[:, i, :] *= channel.gain
-
-        waveforms = scale_analog_signal(waveforms,
-                                        channel_gain_matrix,
-                                        self._adc_fullscale,
-                                        bytes_per_sample)
+        gains = np.array([channel.gain for channel in self.channels], dtype=float)
         # HACK until we find the sign on the signal hafting-fyhn group always have reversed spikes
-        waveforms = -waveforms
+        scale = -scale_analog_signal(np.ones(len(gains)),
+                                     gains,
+                                     self._adc_fullscale,
+                                     bytes_per_sample)
+        scale = scale.reshape(-1, 1)
+
+        if raw_waveforms:
+            waveforms = np.array(waveforms)
+            waveform_scale = scale
+        else:
+            waveforms = waveforms * scale
+            waveform_scale = None
+
         # TODO get proper t_stop Mikkel says: isn't that just the duration, Mikkel answers: yes it is
         return SpikeTrain(
             times=times,
@@ -165,9 +168,45 @@ class ChannelGroup:
             channel_count=num_chans,
             samples_per_spike=samples_per_spike,
             sample_rate=sample_rate,
-            attrs=attrs
+            attrs=attrs,
+            waveform_scale=waveform_scale
         )
 
+    def _read_spike_data(self):
+        stat = os.stat(self.filename)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if self._spike_data is not None and self._spike_data[0] == signature:
+            return self._spike_data[1:]
+
+        with open(self.filename, "rb") as f:
+            attrs = parse_header_and_leave_cursor(f)
+            data_offset = f.tell()
+
+            bytes_per_timestamp = attrs.get("bytes_per_timestamp", 4)
+            bytes_per_sample = attrs.get("bytes_per_sample", 1)
+            num_spikes = attrs.get("num_spikes", 0)
+            num_chans = attrs.get("num_chans", 1)
+            samples_per_spike = attrs.get("samples_per_spike", 50)
+
+            timestamp_dtype = ">u" + str(bytes_per_timestamp)
+            waveform_dtype = "<i" + str(bytes_per_sample)
+
+            dtype = np.dtype([("times", timestamp_dtype),
+                              ("waveforms", waveform_dtype, (samples_per_spike,))])
+            count = num_spikes * num_chans
+
+            f.seek(data_offset + count * dtype.itemsize)
+            assert_end_of_data(f)
+
+        if count > 0:
+            data = np.memmap(self.filename, dtype=dtype, mode="r",
+                             offset=data_offset, shape=(count,))
+        else:
+            data = np.zeros(0, dtype=dtype)
+
+        self._spike_data = (signature, attrs, data)
+        return attrs, data
+
     def __str__(self):
         return "<Axona channel_group {}: channel_count: {}>".format(
             self.channel_group_id, len(self.channels)
@@ -177,9 +216,10 @@ class ChannelGroup:
 class SpikeTrain:
     def __init__(self, times, waveforms,
                  spike_count, channel_count, samples_per_spike,
-                 sample_rate, attrs):
+                 sample_rate, attrs, waveform_scale=None):
         self.times = times
         self.waveforms = waveforms
+        self.waveform_scale = waveform_scale
         self.attrs = attrs
 
         assert(self.waveforms.shape[0] == spike_count)
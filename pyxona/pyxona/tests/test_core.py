@@ -1,5 +1,6 @@
 import pyxona
 import numpy as np
+import quantities as pq
 import os
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -58,3 +59,51 @@ def test_inp_reader():
     assert _check_array_equal(times, axona_file.inp_data.times)
     assert _check_array_equal(event_types, axona_file.inp_data.event_types)
     assert _check_array_equal(values, axona_file.inp_data.values)
+
+
+def _read_spike_train_reference(channel_group):
+    # the reader as it was before the spike data was cached and memory-mapped
+    with open(channel_group.filename, "rb") as f:
+        attrs = pyxona.core.parse_header_and_leave_cursor(f)
+        num_spikes = attrs["num_spikes"]
+        num_chans = attrs["num_chans"]
+        samples_per_spike = attrs["samples_per_spike"]
+        dtype = np.dtype([("times", ">u4", (1,)),
+                          ("waveforms", "<i1", (samples_per_spike,))])
+        data = np.fromfile(f, dtype=dtype, count=num_spikes * num_chans)
+    timebase = int(attrs["timebase"].split(" ")[0]) * pq.Hz
+    times = data["times"][::4].ravel() / timebase
+    waveforms = data["waveforms"].reshape(num_spikes, num_chans, samples_per_spike)
+    waveforms = waveforms.astype(float)
+    channel_gain_matrix = np.ones(waveforms.shape)
+    for i, channel in enumerate(channel_group.channels):
+        channel_gain_matrix[:, i, :] *= channel.gain
+    waveforms = pyxona.core.scale_analog_signal(waveforms, channel_gain_matrix,
+                                                channel_group._adc_fullscale, 1)
+    return times, -waveforms
+
+
+def test_spike_train_matches_reference():
+    axona_file = pyxona.File(axona_file_path)
+
+    for channel_group in axona_file.channel_groups:
+        times, waveforms = _read_spike_train_reference(channel_group)
+        spike_train = channel_group.spike_train
+        assert _check_array_equal(times.magnitude, spike_train.times.rescale(times.units).magnitude)
+        assert spike_train.waveforms.units == waveforms.units
+        assert np.allclose(waveforms.magnitude, spike_train.waveforms.magnitude)
+
+        raw = channel_group.read_spike_train(raw_waveforms=True)
+        assert raw.waveforms.dtype == np.int8
+        assert raw.waveform_scale.shape == (len(channel_group.channels), 1)
+        scaled = raw.waveforms * raw.waveform_scale
+        assert np.allclose(waveforms.magnitude, scaled.rescale(waveforms.units).magnitude)
+
+
+def test_spike_data_cached():
+    axona_file = pyxona.File(axona_file_path)
+    channel_group = axona_file.channel_groups[0]
+
+    _, first = channel_group._read_spike_data()
+    _, second = channel_group._read_spike_data()
+    assert first is second